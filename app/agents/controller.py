@@ -1,54 +1,61 @@
 
 from app.agents.tools import rag_tool, calculator_tool, web_scraper_tool
 from app.agents.planner import plan_steps
-from app.services.llama_service import run_llama
+from app.services.llama_service import run_llama, stream_llama
+from app.services.session_service import run_turn, stream_turn
 from app.core.metrics import timer
 from app.utils.latency import measure_latency
 
 
-@measure_latency("Agent Execution")
-def run_agent_controller(task: str):
-
-    start_time = timer()
-
-    steps = plan_steps(task)
-    trace = []
-    metrics = {
-        "tool_times": {},
-        "total_run_time": 0
-    }
-
-    tool_map = {
-        "rag": rag_tool,
-        "calculator": calculator_tool,
-        "web_scraper": web_scraper_tool
-    }
+TOOL_MAP = {
+    "rag": rag_tool,
+    "calculator": calculator_tool,
+    "web_scraper": web_scraper_tool
+}
 
-    tool_outputs = {}
 
-    for step in steps:
+def _run_steps(steps, trace, metrics, tool_outputs):
+    """
+    Run the planned tools in order, filling `trace`, `metrics` and
+    `tool_outputs`. Yields one step event per tool as it finishes.
+    """
+    for index, step in enumerate(steps):
         tool_name = step["tool"]
         tool_input = step["input"]
 
-        if tool_name not in tool_map:
+        if tool_name not in TOOL_MAP:
             trace.append(f"Unknown tool: {tool_name}")
+            yield {"index": index, "tool": tool_name, "status": "unknown_tool"}
             continue
 
-        tool_fn = tool_map[tool_name]
+        tool_fn = TOOL_MAP[tool_name]
 
         tool_start = timer()
         try:
             result = tool_fn(tool_input)
             tool_outputs[tool_name] = result
             trace.append(f"{tool_name} → OK")
+            status = "ok"
         except Exception as e:
             result = f"ERROR: {str(e)}"
             trace.append(f"{tool_name} → ERROR: {str(e)}")
+            status = "error"
 
         tool_end = timer()
         metrics["tool_times"][tool_name] = round(tool_end - tool_start, 4)
 
-    final_prompt = f"""
+        yield {
+            "index": index,
+            "tool": tool_name,
+            "input": tool_input,
+            "status": status,
+            "seconds": metrics["tool_times"][tool_name],
+            "output": str(result)[:800],
+        }
+
+
+def _final_prompt(task, steps, tool_outputs) -> str:
+    return f"""
 User Task:
 {task}
 
@@ -61,7 +68,32 @@ Tool Results:
 Write the final answer in very clear language.
 """
 
-    final_answer, cost_info = run_llama(final_prompt)
+
+@measure_latency("Agent Execution")
+def run_agent_controller(task: str, session=None):
+    """
+    Plan, run the tools, then answer. With a conversation `session`
+    the final call continues that session's context.
+    """
+
+    start_time = timer()
+
+    steps = plan_steps(task)
+    trace = []
+    metrics = {
+        "tool_times": {},
+        "total_run_time": 0
+    }
+    tool_outputs = {}
+
+    for _ in _run_steps(steps, trace, metrics, tool_outputs):
+        pass
+
+    prompt = _final_prompt(task, steps, tool_outputs)
+    if session is not None:
+        final_answer, cost_info = run_turn(session, prompt)
+    else:
+        final_answer, cost_info = run_llama(prompt)
 
     end_time = timer()
     metrics["total_run_time"] = round(end_time - start_time, 4)
@@ -72,3 +104,41 @@ Write the final answer in very clear language.
         "metrics": metrics,
         "llm_cost": cost_info     
     }
+
+
+def stream_agent_controller(task: str, session=None):
+    """
+    run_agent_controller() as events: ("step", {...}) after each tool,
+    ("token", text) while the answer is generated, then ("done", result)
+    with the same dict run_agent_controller() returns.
+    """
+    start_time = timer()
+
+    steps = plan_steps(task)
+    trace = []
+    metrics = {
+        "tool_times": {},
+        "total_run_time": 0
+    }
+    tool_outputs = {}
+
+    for step_event in _run_steps(steps, trace, metrics, tool_outputs):
+        yield "step", step_event
+
+    parts = []
+    prompt = _final_prompt(task, steps, tool_outputs)
+    tokens = stream_turn(session, prompt) if session is not None else stream_llama(prompt)
+
+    for token, cost_info in tokens:
+        if token:
+            parts.append(token)
+            yield "token", token
+
+    metrics["total_run_time"] = round(timer() - start_time, 4)
+
+    yield "done", {
+        "final_answer": " ".join("".join(parts).split()),
+        "steps": trace,
+        "metrics": metrics,
+        "llm_cost": cost_info
+    }
@@ -6,7 +6,9 @@ from langgraph.graph import StateGraph, END
 from app.agents.planner import plan_steps
 from app.agents.tools import rag_tool, calculator_tool, web_scraper_tool
 from app.agents.agent_prompt_builder import build_agent_final_prompt
-from app.services.llama_service import run_llama
+from app.services.llama_service import run_llama, stream_llama
+from app.services.session_service import run_turn, stream_turn
+from app.core.metrics import timer
 
 
 class AgentState(BaseModel):
@@ -106,25 +108,35 @@ def final_node(state: AgentState) -> AgentState:
         answer, cost = llm_answer, None
 
     state.final_answer = str(answer) if answer is not None else ""
+    state.metrics = _final_metrics(state, cost)
 
-    state.metrics = {
+    return state
+
+
+def _final_metrics(state: AgentState, cost) -> Dict[str, Any]:
+    return {
         "total_steps": len(state.steps),
         "tools_used": list(state.tool_results.keys()),
         "tool_outputs": {k: str(v) for k, v in state.tool_results.items()},
         "llm_cost": cost or {},
     }
 
-    return state
-
 
 
 
-def build_agent_workflow():
+def build_agent_workflow(with_final: bool = True):
+    """
+    plan -> act* -> final. Without `with_final` the graph ends after
+    the last tool, for callers that generate the answer themselves.
+    """
     graph = StateGraph(AgentState)
 
     graph.add_node("plan", plan_node)
     graph.add_node("act", act_node)
-    graph.add_node("final", final_node)
+    if with_final:
+        graph.add_node("final", final_node)
+
+    end = "final" if with_final else END
 
     graph.set_entry_point("plan")
 
@@ -135,7 +147,7 @@ def build_agent_workflow():
         "plan",
         after_plan,
         {
-            "final": "final",
+            "final": end,
             "act": "act",
         },
     )
@@ -147,21 +159,23 @@ def build_agent_workflow():
         "act",
         after_act,
         {
-            "final": "final",
+            "final": end,
             "act": "act",
         },
     )
 
-    graph.add_edge("final", END)
+    if with_final:
+        graph.add_edge("final", END)
 
     return graph.compile()
 
 
 _agent_graph = build_agent_workflow()
+_agent_tools_graph = build_agent_workflow(with_final=False)
 
 
 
-def run_langgraph_agent(task: str) -> Dict[str, Any]:
+def run_langgraph_agent(task: str, session=None) -> Dict[str, Any]:
     """
     Runs the LangGraph workflow and returns a plain dict:
 
@@ -171,11 +185,20 @@ def run_langgraph_agent(task: str) -> Dict[str, Any]:
         "metrics": {...}
     }
 
-    This is what /agent expects.
+    This is what /agent expects. With a conversation `session` the
+    final answer continues that session's context.
     """
     initial_state = AgentState(task=task)
 
-    final_state = _agent_graph.invoke(initial_state)
+    if session is not None:
+        final_state = AgentState(**_agent_tools_graph.invoke(initial_state))
+        final_state.steps.append("final_llm")
+
+        answer, cost = run_turn(session, build_agent_final_prompt(final_state.task, final_state.tool_results))
+        final_state.final_answer = answer
+        final_state.metrics = _final_metrics(final_state, cost)
+    else:
+        final_state = _agent_graph.invoke(initial_state)
 
     if isinstance(final_state, AgentState):
         data = final_state.model_dump()
@@ -203,3 +226,53 @@ def run_langgraph_agent(task: str) -> Dict[str, Any]:
         "steps": steps,
         "metrics": metrics,
     }
+
+
+def stream_langgraph_agent(task: str, session=None):
+    """
+    run_langgraph_agent() as events: ("step", {...}) after each tool,
+    ("token", text) while the final answer is generated, then
+    ("done", result) with the dict run_langgraph_agent() returns.
+    """
+    state = None
+    done_steps = 0
+    last = timer()
+
+    for state in _agent_tools_graph.stream(AgentState(task=task), stream_mode="values"):
+        if state["step_index"] > done_steps:
+            done_steps = state["step_index"]
+            step = state["plan"][done_steps - 1]
+            tool_name = step.get("tool")
+            result = state["tool_results"].get(tool_name)
+            failed = isinstance(result, dict) and str(result.get("response", "")).startswith("ERROR")
+
+            yield "step", {
+                "index": done_steps - 1,
+                "tool": tool_name,
+                "input": step.get("input", task),
+                "status": "error" if failed else "ok",
+                "seconds": round(timer() - last, 4),
+                "output": str(result)[:800],
+            }
+            last = timer()
+
+    final = AgentState(**state)
+    final.steps.append("final_llm")
+
+    prompt = build_agent_final_prompt(final.task, final.tool_results)
+    tokens = stream_turn(session, prompt) if session is not None else stream_llama(prompt)
+
+    parts = []
+    for token, cost in tokens:
+        if token:
+            parts.append(token)
+            yield "token", token
+
+    final.final_answer = " ".join("".join(parts).split())
+    final.metrics = _final_metrics(final, cost)
+
+    yield "done", {
+        "final_answer": final.final_answer,
+        "steps": [str(s) for s in final.steps],
+        "metrics": final.metrics,
+    }
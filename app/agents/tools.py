@@ -4,6 +4,8 @@ import requests
 from bs4 import BeautifulSoup
 
 from app.services.rag_service import rag_search
+from app.services.rag_context_builder import build_rag_context
+from app.services.prompt_compressor import compress_results
 from app.services.llama_service import run_llama   # <-- UPDATED
 
 
@@ -11,7 +13,8 @@ def rag_tool(question: str) -> Dict[str, Any]:
 
     rag = rag_search(question)
 
-    context_text = "\n".join([r["text"] for r in rag["results"] if r["text"]])
+    results, compression = compress_results(question, rag["results"])
+    context_text = build_rag_context(results)
 
     prompt = f"""
 Use the following context to answer the question.
@@ -31,7 +34,7 @@ Give a clear and helpful answer.
         "response": {
             "answer": answer,
             "context": rag["results"],
-            "metrics": rag
+            "metrics": {**rag, "compression": compression}
         }
     }
 
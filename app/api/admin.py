@@ -0,0 +1,130 @@
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from pydantic import BaseModel
+
+from app.core.config import REINDEX_BATCH_SIZE, VECTOR_STORE_BACKEND
+from app.services import reindex_service, snapshot_service
+from app.services.qdrant_service import (
+    STORAGE_PROFILES,
+    apply_storage_profile,
+    get_client,
+    get_storage_profile,
+)
+
+router = APIRouter()
+
+
+class StorageProfileRequest(BaseModel):
+    profile: str
+
+
+class SnapshotExportRequest(BaseModel):
+    name: str | None = None
+
+
+class SnapshotImportRequest(BaseModel):
+    snapshot: str
+    verify: bool = True
+    force: bool = False
+
+
+class ReindexRequest(BaseModel):
+    batch_size: int = REINDEX_BATCH_SIZE
+    target: str | None = None
+    drop_old: bool = False
+
+
+@router.post("/reindex")
+def start_reindex(request: ReindexRequest, background_tasks: BackgroundTasks):
+    """
+    Start re-embedding all chunks into a new collection.
+    Poll GET /admin/reindex for progress.
+    """
+    if VECTOR_STORE_BACKEND != "qdrant":
+        raise HTTPException(status_code=400, detail="Reindexing needs the Qdrant backend")
+    if reindex_service.is_running():
+        raise HTTPException(status_code=409, detail="A reindex is already running")
+
+    background_tasks.add_task(
+        reindex_service.reindex,
+        batch_size=request.batch_size,
+        target=request.target,
+        drop_old=request.drop_old,
+    )
+
+    return {"status": "started"}
+
+
+@router.get("/reindex")
+def reindex_status():
+    return reindex_service.get_status()
+
+
+@router.get("/storage-profile")
+def storage_profile():
+    return {"active": get_storage_profile(), "available": list(STORAGE_PROFILES)}
+
+
+@router.post("/storage-profile")
+def migrate_storage_profile(request: StorageProfileRequest):
+    """
+    Switch the live collection to another storage profile
+    (quantization / on-disk vectors). Workers read the profile back
+    from the collection, so they all switch their search params.
+    """
+    if VECTOR_STORE_BACKEND != "qdrant":
+        raise HTTPException(status_code=400, detail="Storage profiles apply to the Qdrant backend only")
+    if request.profile not in STORAGE_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown profile: {request.profile}")
+
+    apply_storage_profile(get_client(), request.profile)
+    return {"active": get_storage_profile()}
+
+
+@router.get("/snapshots")
+def list_snapshots():
+    return {"snapshots": snapshot_service.list_snapshots(), "job": snapshot_service.get_status()}
+
+
+def _check_snapshot_name(name: str):
+    # Names only; arbitrary paths are for the CLI.
+    try:
+        snapshot_service.snapshot_path(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/snapshots/export")
+def export_snapshot(request: SnapshotExportRequest, background_tasks: BackgroundTasks):
+    """
+    Snapshot the vectors and documents/chunks rows to SNAPSHOT_DIR.
+    Poll GET /admin/snapshots for progress.
+    """
+    if request.name is not None:
+        _check_snapshot_name(request.name)
+
+    if snapshot_service.is_running():
+        raise HTTPException(status_code=409, detail="A snapshot job is already running")
+
+    background_tasks.add_task(snapshot_service.run, "export", name=request.name)
+    return {"status": "started"}
+
+
+@router.post("/snapshots/import")
+def import_snapshot(request: SnapshotImportRequest, background_tasks: BackgroundTasks):
+    """
+    Restore a snapshot (name under SNAPSHOT_DIR) and verify counts and
+    vectors. Poll GET /admin/snapshots for the result.
+    """
+    _check_snapshot_name(request.snapshot)
+
+    if snapshot_service.is_running():
+        raise HTTPException(status_code=409, detail="A snapshot job is already running")
+
+    background_tasks.add_task(
+        snapshot_service.run,
+        "import",
+        name_or_path=request.snapshot,
+        verify=request.verify,
+        force=request.force,
+    )
+    return {"status": "started"}
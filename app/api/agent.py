@@ -1,10 +1,15 @@
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import json
-from app.agents.controller import run_agent_controller
-from app.agents.langgraph_agent import run_langgraph_agent   
+from app.agents.controller import run_agent_controller, stream_agent_controller
+from app.agents.langgraph_agent import run_langgraph_agent, stream_langgraph_agent
+from app.core.executors import run_io
 from app.core.schemas import AgentResponse
+from app.api.sessions import begin_turn, session_turn
+from app.services.session_service import store
+from app.utils.sse import SSE_HEADERS, sse_event
 
 router = APIRouter()
 
@@ -12,20 +17,36 @@ router = APIRouter()
 class AgentRequest(BaseModel):
     task: str
     engine: str = "controller"   
+    # From POST /sessions/; the final answer continues the conversation.
+    session_id: str | None = None
 
 
 @router.post("/", response_model=AgentResponse)
 async def run_agent(request: AgentRequest):
     """
     Run agentic reasoning pipeline.
+
+    The tools and the planner are synchronous, so the whole run goes to
+    the I/O pool and the event loop keeps serving other requests.
     """
+    if not request.session_id:
+        return await _run_agent(request)
+
+    with session_turn(request.session_id) as session:
+        response = await _run_agent(request, session)
+        response.metrics["session"] = session.metrics()
+
+    return response
+
+
+async def _run_agent(request: AgentRequest, session=None) -> AgentResponse:
 
     try:
         engine = request.engine.lower()
 
        
         if engine == "controller":
-            result = run_agent_controller(request.task)
+            result = await run_io(run_agent_controller, request.task, session)
 
             return AgentResponse(
                 final_answer=result.get("final_answer", ""),
@@ -35,7 +56,7 @@ async def run_agent(request: AgentRequest):
 
    
         elif engine == "langgraph":
-            raw = run_langgraph_agent(request.task)
+            raw = await run_io(run_langgraph_agent, request.task, session)
 
             if not isinstance(raw, dict):
                 raw = {"final_answer": str(raw)}
@@ -72,3 +93,49 @@ async def run_agent(request: AgentRequest):
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/stream")
+def run_agent_stream(request: AgentRequest):
+    """
+    /agent/ as server-sent events:
+    - "step":  {"index", "tool", "input", "status", "seconds", "output"} per tool
+    - "token": {"text"} for each piece of the final answer
+    - "done":  {"final_answer", "steps", "metrics"}, as in /agent/
+    - "error": {"detail"} if the agent fails mid-stream
+    """
+    engine = request.engine.lower()
+    if engine not in ("controller", "langgraph"):
+        raise HTTPException(status_code=400, detail="Invalid engine type.")
+
+    session = begin_turn(request.session_id) if request.session_id else None
+
+    if engine == "controller":
+        agent_events = stream_agent_controller(request.task, session)
+    else:
+        agent_events = stream_langgraph_agent(request.task, session)
+
+    def events():
+        try:
+            for event, data in agent_events:
+                if event == "token":
+                    yield sse_event("token", {"text": data})
+                elif event == "done":
+                    metrics = data.get("metrics", {})
+                    if session is not None:
+                        metrics["session"] = session.metrics()
+
+                    yield sse_event("done", {
+                        "final_answer": data.get("final_answer", ""),
+                        "steps": data.get("steps", []),
+                        "metrics": metrics,
+                    })
+                else:
+                    yield sse_event(event, data)
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            if session is not None:
+                store.end(session)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
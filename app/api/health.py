@@ -1,7 +1,45 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.metrics import get_counters, get_summaries
+from app.services import model_registry
 
 router = APIRouter()
 
 @router.get("/health")
 def health_check():
     return {"status": "ok"}
+
+
+@router.get("/live")
+async def liveness_check():
+    """
+    Answered on the event loop itself (not the threadpool), so its
+    latency shows whether the loop is blocked.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness_check():
+    """
+    Readiness for the load balancer: 503 until every shared model and
+    client has been loaded by the startup warmup.
+    """
+    state = model_registry.readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+
+@router.get("/metrics")
+def metrics():
+    counters = get_counters()
+
+    # Hit ratio for every "<cache>.hits" / "<cache>.misses" counter pair.
+    hit_ratios = {}
+    for name, hits in counters.items():
+        if name.endswith(".hits"):
+            prefix = name[: -len(".hits")]
+            total = hits + counters.get(f"{prefix}.misses", 0)
+            hit_ratios[prefix] = round(hits / total, 4) if total else 0.0
+
+    return {"counters": counters, "hit_ratios": hit_ratios, "summaries": get_summaries()}
@@ -3,6 +3,7 @@ import uuid
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
 
+from app.core.executors import run_ingest
 from app.db.database import SessionLocal
 from app.db import crud
 
@@ -11,8 +12,8 @@ from app.multimodal.audio_processor import process_audio
 from app.multimodal.video_processor import process_video
 
 from app.utils.chunker import chunk_text
-from app.services.embedding_service import embed_text
-from app.services.qdrant_service import insert_embedding
+from app.services.embedding_service import embed_texts
+from app.services.vector_store import insert_embedding, insert_embeddings
 
 from pypdf import PdfReader  
 
@@ -33,8 +34,26 @@ def save_uploaded_file(upload_file: UploadFile, upload_dir: str) -> str:
 
 @router.post("/ingest")
 async def ingest_file(file: UploadFile = File(...)):
+    """
+    Parsing, captioning, transcription, embedding and the Postgres
+    writes are all blocking, so the whole pipeline runs on the ingest
+    pool (INGEST_EXECUTOR_WORKERS at a time) and the event loop stays
+    free for queries.
+    """
+    return await run_ingest(_ingest_file, file)
+
+
+def _ingest_file(file: UploadFile):
 
     db: Session = SessionLocal()
+    try:
+        return _ingest(db, file)
+    finally:
+        db.close()
+
+
+def _ingest(db: Session, file: UploadFile):
+
     doc_id = str(uuid.uuid4())
 
     upload_dir = "uploaded_files"
@@ -103,23 +122,27 @@ async def ingest_file(file: UploadFile = File(...)):
             raise HTTPException(400, "Text content is empty.")
 
         chunks = chunk_text(text, max_words=250, overlap_words=40)
+        vectors = embed_texts(chunks)
 
-        for idx, text_chunk in enumerate(chunks):
-            chunk_id = str(uuid.uuid4())
-            vector = embed_text(text_chunk)
+        chunk_ids = [str(uuid.uuid4()) for _ in chunks]
+        source = "pdf" if extracted_text is not None else "txt"
 
-            insert_embedding(
-                doc_id=doc_id,
-                chunk_id=chunk_id,
-                vector=vector,
-                metadata={
+        insert_embeddings(
+            doc_id=doc_id,
+            chunk_ids=chunk_ids,
+            vectors=vectors,
+            metadatas=[
+                {
                     "type": "text",
                     "chunk_index": idx,
                     "text": text_chunk,
-                    "source": "pdf" if extracted_text is not None else "txt"
+                    "source": source
                 }
-            )
+                for idx, text_chunk in enumerate(chunks)
+            ],
+        )
 
+        for idx, (chunk_id, text_chunk) in enumerate(zip(chunk_ids, chunks)):
             crud.create_chunk(
                 db=db,
                 chunk_id=chunk_id,
@@ -1,18 +1,22 @@
 from fastapi import APIRouter, File, UploadFile, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import os
 
-from app.services.llava_service import run_llava_caption
-from app.services.whisper_service import transcribe_audio
-from app.services.llama_service import run_llama
-from app.services.rag_service import rag_search
+from app.core.executors import run_cpu, run_io
+from app.services.whisper_service import atranscribe_audio
+from app.services.llama_service import arun_llama, astream_llama
+from app.services.rag_service import arag_search
+from app.services.answer_cache import cache_answer, get_cached_answer
+from app.services.prompt_compressor import compress_results
 
-from app.multimodal.image_processor import process_image_for_query
-from app.multimodal.video_processor import process_video_for_query
+from app.multimodal.image_processor import aprocess_image_for_query
+from app.multimodal.video_processor import aprocess_video_for_query
 from app.multimodal.fusion import fuse_modalities
 from app.multimodal.final_prompt_builder import build_multimodal_prompt
 
 from app.utils.latency import measure_latency
+from app.utils.sse import SSE_HEADERS, sse_event
 
 
 router = APIRouter()
@@ -27,12 +31,10 @@ class MultiModalResponse(BaseModel):
     rag_metrics: dict
 
 
-@router.post("/")
-@measure_latency("Multimodal Query")
-async def multimodal_query(
-    query: str = Form(...),
-    file: UploadFile | None = File(None),
-):
+async def _prepare(query: str, file: UploadFile | None, include_rouge: bool, compress: bool | None) -> dict:
+    """
+    Process the upload, retrieve and build the final prompt.
+    """
     caption = None
     transcript = None
     video_text = None
@@ -43,43 +45,137 @@ async def multimodal_query(
 
         os.makedirs("uploaded_files", exist_ok=True)
 
-        with open(filepath, "wb") as f:
-            f.write(await file.read())
+        await run_io(_save, filepath, await file.read())
 
         if ext in ["png", "jpg", "jpeg", "webp"]:
-            caption = process_image_for_query(filepath)
+            caption = await aprocess_image_for_query(filepath)
 
         elif ext in ["mp3", "wav", "m4a", "aac", "flac", "ogg"]:
-            transcript = transcribe_audio(filepath)
+            transcript = await atranscribe_audio(filepath)
 
         elif ext in ["mp4", "mov", "avi", "mkv", "webm"]:
-            video_text = process_video_for_query(filepath)
+            video_text = await aprocess_video_for_query(filepath)
 
     
     fused_query = fuse_modalities(query, caption, transcript, video_text)
 
-    rag = rag_search(fused_query)
+    # Embedding + search run off the event loop.
+    rag = await arag_search(fused_query, with_rouge=include_rouge)
+
+    # Sentences are scored against the fused query, which carries the
+    # caption/transcript as well as the question.
+    rag_results, compression = await run_cpu(compress_results, fused_query, rag["results"], enabled=compress)
 
-    final_prompt = build_multimodal_prompt(
+    final_prompt = await run_cpu(
+        build_multimodal_prompt,
         query=query,
         caption=caption,
         transcript=transcript,
         video_text=video_text,
-        rag_results=rag["results"]
+        rag_results=rag_results,
+        compress=False,
     )
 
-    final_answer, _ = run_llama(final_prompt)
+    return {
+        "caption": caption,
+        "transcript": transcript,
+        "video_text": video_text,
+        "fused_query": fused_query,
+        "rag": rag,
+        "compression": compression,
+        "final_prompt": final_prompt,
+    }
+
+
+def _save(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _rag_metrics(prepared: dict, cached: dict | None) -> dict:
+    rag = prepared["rag"]
+    return {
+        "similarity_stats": rag["similarity_stats"],
+        "hit_rate": rag["hit_rate"],
+        "rouge_stats": rag["rouge_stats"],
+        "rerank": rag["rerank"],
+        "compression": prepared["compression"],
+        "answer_cache_hit": cached is not None,
+    }
+
+
+@router.post("/")
+@measure_latency("Multimodal Query")
+async def multimodal_query(
+    query: str = Form(...),
+    file: UploadFile | None = File(None),
+    include_rouge: bool = Form(False),
+    compress: bool | None = Form(None),
+):
+    prepared = await _prepare(query, file, include_rouge, compress)
+    rag = prepared["rag"]
+
+    # The fused query carries the caption/transcript, so a cache hit
+    # means an equivalent question about equivalent media.
+    cached = await run_cpu(get_cached_answer, prepared["fused_query"], rag["results"], scope="multimodal")
+    if cached is not None:
+        final_answer = cached["answer"]
+    else:
+        final_answer, cost_info = await arun_llama(prepared["final_prompt"])
+        await run_cpu(cache_answer, prepared["fused_query"], rag["results"], "multimodal", final_answer, cost_info)
 
 
     return MultiModalResponse(
         final_answer=final_answer,
-        image_caption=caption,
-        audio_transcript=transcript,
-        video_summary=video_text,
+        image_caption=prepared["caption"],
+        audio_transcript=prepared["transcript"],
+        video_summary=prepared["video_text"],
         rag_context=rag["results"],
-        rag_metrics={
-            "similarity_stats": rag["similarity_stats"],
-            "hit_rate": rag["hit_rate"],
-            "rouge_stats": rag["rouge_stats"],
-        },
+        rag_metrics=_rag_metrics(prepared, cached),
     )
+
+
+@router.post("/stream")
+async def multimodal_query_stream(
+    query: str = Form(...),
+    file: UploadFile | None = File(None),
+    include_rouge: bool = Form(False),
+    compress: bool | None = Form(None),
+):
+    """
+    /multimodal/ as server-sent events:
+    - "retrieval": {"image_caption", "audio_transcript", "video_summary", "rag_context"}
+    - "token":     {"text"} for each piece of the answer
+    - "done":      {"final_answer", "rag_metrics"}, as in /multimodal/
+    """
+    prepared = await _prepare(query, file, include_rouge, compress)
+    rag = prepared["rag"]
+
+    async def events():
+        yield sse_event("retrieval", {
+            "image_caption": prepared["caption"],
+            "audio_transcript": prepared["transcript"],
+            "video_summary": prepared["video_text"],
+            "rag_context": rag["results"],
+        })
+
+        cached = await run_cpu(get_cached_answer, prepared["fused_query"], rag["results"], scope="multimodal")
+        if cached is not None:
+            final_answer = cached["answer"]
+            yield sse_event("token", {"text": final_answer})
+        else:
+            parts = []
+            async for token, cost_info in astream_llama(prepared["final_prompt"]):
+                if token:
+                    parts.append(token)
+                    yield sse_event("token", {"text": token})
+
+            final_answer = " ".join("".join(parts).split())
+            await run_cpu(cache_answer, prepared["fused_query"], rag["results"], "multimodal", final_answer, cost_info)
+
+        yield sse_event("done", {
+            "final_answer": final_answer,
+            "rag_metrics": _rag_metrics(prepared, cached),
+        })
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,16 +1,48 @@
+import asyncio
+import json
+from typing import List, Literal
+
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from app.services.rag_service import rag_search
-from app.services.llm_service import run_llama_rag   
+from app.core.config import QUERY_BATCH_CONCURRENCY, QUERY_BATCH_MAX_QUESTIONS
+from app.core.executors import run_cpu
+from app.core.singleflight import SingleFlight
+from app.core.schemas import SearchFilters
+from app.services.rag_service import arag_search, rag_search_batch
+from app.services.llm_service import arun_llama_rag, astream_llama_rag
+from app.services.answer_cache import cache_answer, get_cached_answer
+from app.services.rag_context_builder import pack_context
+from app.services.prompt_compressor import compress_results
+from app.services.session_service import arun_turn, astream_turn, store
+from app.services.vector_store import get_corpus_generation
+from app.api.sessions import begin_turn, session_turn
+from app.utils.sse import SSE_HEADERS, sse_event
 
 
 router = APIRouter()
 
+# Concurrent identical requests share one retrieval / one generation.
+_retrieval_flight = SingleFlight("singleflight.retrieval")
+_llm_flight = SingleFlight("singleflight.llm")
+
 
 class QueryRequest(BaseModel):
     question: str
     top_k: int = 5
+    filters: SearchFilters | None = None
+    # "dense" or "hybrid" (dense + BM25 keyword match); None uses RAG_SEARCH_MODE.
+    search_mode: Literal["dense", "hybrid"] | None = None
+    # Score ROUGE-L per hit in the request (diagnostics; adds latency).
+    include_rouge: bool = False
+    # Cross-encoder reranking; None uses RERANK_ENABLED.
+    rerank: bool | None = None
+    # Extractive sentence compression; None uses PROMPT_COMPRESSION_ENABLED.
+    compress: bool | None = None
+    # From POST /sessions/. Follow-ups send only the new question and
+    # chunks not shown earlier in the session; no answer cache.
+    session_id: str | None = None
 
 
 class QueryResponse(BaseModel):
@@ -20,21 +52,22 @@ class QueryResponse(BaseModel):
     metrics: dict
 
 
-@router.post("/", response_model=QueryResponse)
-def query_rag(request: QueryRequest):
-
-    rag = rag_search(request.question, top_k=request.top_k)
-
-    if not rag["results"]:
-        raise HTTPException(status_code=404, detail="No matching chunks found")
+class BatchQueryRequest(BaseModel):
+    questions: List[str]
+    top_k: int = 5
+    filters: SearchFilters | None = None
+    search_mode: Literal["dense", "hybrid"] | None = None
+    include_rouge: bool = False
+    rerank: bool | None = None
+    compress: bool | None = None
+    # Generations at once for this batch; at most QUERY_BATCH_CONCURRENCY.
+    concurrency: int = Field(QUERY_BATCH_CONCURRENCY, ge=1, le=QUERY_BATCH_CONCURRENCY)
 
-    context_text = "\n".join(
-        [r["text"] for r in rag["results"] if r["text"]]
-    )
 
-    prompt = f"""
+def _build_prompt(question: str, context_text: str) -> str:
+    return f"""
 You are a RAG assistant.
-User question: {request.question}
+User question: {question}
 
 Context:
 {context_text}
@@ -42,16 +75,284 @@ Context:
 Answer clearly using only the context.
 """
 
-    answer, cost_info = run_llama_rag(prompt)   # FIXED ✔
+
+def _build_followup_prompt(question: str, context_text: str) -> str:
+    return f"""
+Follow-up question: {question}
+
+Additional context:
+{context_text or "(none; use the context given earlier)"}
+
+Answer clearly using only the context in this conversation.
+"""
+
+
+def _session_prompt(session, question: str, packed: dict) -> str:
+    # No context yet, or it was reset: the model has seen no chunks.
+    if not session.context:
+        return _build_prompt(question, packed["text"])
+    return _build_followup_prompt(question, packed["text"])
+
+
+def _build_metrics(rag: dict, packed: dict, compression: dict, cost_info: dict, cached: dict | None = None) -> dict:
+    return {
+        "similarity_stats": rag["similarity_stats"],
+        "hit_rate": rag["hit_rate"],
+        "cost_info": cost_info,
+        "rouge_stats": rag["rouge_stats"],
+        "rerank": rag["rerank"],
+        "context": {
+            "tokens": packed["tokens"],
+            "segments": packed["segments"],
+            "chunks_used": len(packed["chunks_used"]),
+            "chunks_dropped": packed["dropped"],
+        },
+        "compression": compression,
+        "answer_cache": {
+            "hit": cached is not None,
+            "similarity": cached["similarity"] if cached else None,
+        },
+    }
+
+
+def _normalize(question: str) -> str:
+    return " ".join(question.split())
+
+
+async def _answer(question: str, rag: dict, packed: dict):
+    """
+    Serve a cached answer for a paraphrase over the same chunks, or
+    generate one from the packed context and cache it. Identical
+    question + context pairs in flight at once share one call.
+    """
+    return await _llm_flight.do((_normalize(question), packed["text"]), _generate, question, rag, packed)
+
+
+async def _generate(question: str, rag: dict, packed: dict):
+    cached = await run_cpu(get_cached_answer, question, rag["results"], scope="query")
+    if cached is not None:
+        return cached["answer"], cached["cost_info"], cached
+
+    answer, cost_info = await arun_llama_rag(_build_prompt(question, packed["text"]))
+    await run_cpu(cache_answer, question, rag["results"], "query", answer, cost_info)
+    return answer, cost_info, None
+
+
+async def _compress_and_pack(question: str, results: list, compress: bool | None):
+    results, compression = await run_cpu(compress_results, question, results, enabled=compress)
+    return compression, await run_cpu(pack_context, results)
+
+
+async def _retrieve(request: QueryRequest, session=None):
+    """
+    arag_search() + compression + packing; 404 when nothing matches.
+
+    In a session, chunks the model has already seen are left out of the
+    packed context, and a follow-up may go ahead with no new chunks.
+    """
+    filters = request.filters.model_dump(exclude_none=True) if request.filters else None
+    # The corpus generation keeps a search started before an ingest
+    # from being shared with requests that arrive after it.
+    key = (
+        get_corpus_generation(),
+        _normalize(request.question),
+        request.top_k,
+        json.dumps(filters, sort_keys=True),
+        request.search_mode,
+        request.include_rouge,
+        request.rerank,
+    )
+
+    rag = await _retrieval_flight.do(
+        key,
+        arag_search,
+        request.question,
+        top_k=request.top_k,
+        filters=filters,
+        mode=request.search_mode,
+        with_rouge=request.include_rouge,
+        rerank=request.rerank,
+    )
+
+    if not rag["results"] and (session is None or not (session.context or session.recap)):
+        raise HTTPException(status_code=404, detail="No matching chunks found")
+
+    results = rag["results"]
+    if session is not None:
+        results = [r for r in results if str(r["chunk_id"]) not in session.sent_chunks]
+
+    compression, packed = await _compress_and_pack(request.question, results, request.compress)
+    return rag, compression, packed
+
+
+@router.post("/", response_model=QueryResponse)
+async def query_rag(request: QueryRequest):
+
+    if request.session_id:
+        return await _query_session_turn(request)
+
+    rag, compression, packed = await _retrieve(request)
+    answer, cost_info, cached = await _answer(request.question, rag, packed)
 
     return QueryResponse(
         answer=answer,
-        context=context_text.split("\n"),
+        context=packed["text"].split("\n\n"),
         results=rag["results"],
-        metrics={
-            "similarity_stats": rag["similarity_stats"],
-            "hit_rate": rag["hit_rate"],
-            "cost_info": cost_info,
-            "rouge_stats": rag["rouge_stats"],
-        }
+        metrics=_build_metrics(rag, packed, compression, cost_info, cached),
+    )
+
+
+async def _query_session_turn(request: QueryRequest) -> QueryResponse:
+    with session_turn(request.session_id) as session:
+        rag, compression, packed = await _retrieve(request, session)
+
+        answer, cost_info = await arun_turn(
+            session,
+            _session_prompt(session, request.question, packed),
+            packed["chunks_used"],
+        )
+
+        metrics = _build_metrics(rag, packed, compression, cost_info)
+        metrics["session"] = session.metrics()
+
+    return QueryResponse(
+        answer=answer,
+        context=packed["text"].split("\n\n") if packed["text"] else [],
+        results=rag["results"],
+        metrics=metrics,
     )
+
+
+@router.post("/stream")
+async def query_rag_stream(request: QueryRequest):
+    """
+    /query/ as server-sent events:
+    - "retrieval": {"results", "context"} once retrieval is done
+    - "token":     {"text"} for each piece of the answer
+    - "done":      {"answer", "metrics"}, metrics as in /query/
+    """
+    if request.session_id:
+        return await _query_session_stream(request)
+
+    rag, compression, packed = await _retrieve(request)
+
+    async def events():
+        yield sse_event("retrieval", {
+            "results": rag["results"],
+            "context": packed["text"].split("\n\n"),
+        })
+
+        cached = await run_cpu(get_cached_answer, request.question, rag["results"], scope="query")
+        if cached is not None:
+            answer, cost_info = cached["answer"], cached["cost_info"]
+            yield sse_event("token", {"text": answer})
+        else:
+            parts = []
+            async for token, cost_info in astream_llama_rag(_build_prompt(request.question, packed["text"])):
+                if token:
+                    parts.append(token)
+                    yield sse_event("token", {"text": token})
+
+            answer = "".join(parts).strip()
+            await run_cpu(cache_answer, request.question, rag["results"], "query", answer, cost_info)
+
+        yield sse_event("done", {
+            "answer": answer,
+            "metrics": _build_metrics(rag, packed, compression, cost_info, cached),
+        })
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def _query_session_stream(request: QueryRequest) -> StreamingResponse:
+    session = begin_turn(request.session_id)
+    try:
+        rag, compression, packed = await _retrieve(request, session)
+    except BaseException:
+        store.end(session)
+        raise
+
+    async def events():
+        try:
+            yield sse_event("retrieval", {
+                "results": rag["results"],
+                "context": packed["text"].split("\n\n") if packed["text"] else [],
+            })
+
+            parts = []
+            prompt = _session_prompt(session, request.question, packed)
+            async for token, cost_info in astream_turn(session, prompt, packed["chunks_used"]):
+                if token:
+                    parts.append(token)
+                    yield sse_event("token", {"text": token})
+
+            metrics = _build_metrics(rag, packed, compression, cost_info)
+            metrics["session"] = session.metrics()
+
+            yield sse_event("done", {"answer": "".join(parts).strip(), "metrics": metrics})
+        finally:
+            store.end(session)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/batch")
+async def query_rag_batch(request: BatchQueryRequest):
+    """
+    Answer many questions in one request.
+
+    All questions are embedded in one batch and retrieved with one
+    batched vector search; generation then runs with at most
+    `concurrency` LLM calls at once. Results stream back as NDJSON, one
+    line per question in completion order; `index` is the position in
+    `questions`.
+    """
+    if len(request.questions) > QUERY_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {QUERY_BATCH_MAX_QUESTIONS} questions per batch",
+        )
+
+    rags = await run_cpu(
+        rag_search_batch,
+        request.questions,
+        top_k=request.top_k,
+        filters=request.filters.model_dump(exclude_none=True) if request.filters else None,
+        mode=request.search_mode,
+        with_rouge=request.include_rouge,
+        rerank=request.rerank,
+    )
+
+    semaphore = asyncio.Semaphore(request.concurrency)
+
+    async def answer(index: int, question: str, rag: dict) -> dict:
+        if not rag["results"]:
+            return {"index": index, "question": question, "error": "No matching chunks found"}
+
+        compression, packed = await _compress_and_pack(question, rag["results"], request.compress)
+
+        async with semaphore:
+            answer_text, cost_info, cached = await _answer(question, rag, packed)
+
+        return {
+            "index": index,
+            "question": question,
+            "answer": answer_text,
+            "results": rag["results"],
+            "metrics": _build_metrics(rag, packed, compression, cost_info, cached),
+        }
+
+    async def stream():
+        tasks = [
+            asyncio.create_task(answer(i, q, rag))
+            for i, (q, rag) in enumerate(zip(request.questions, rags))
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done, default=str) + "\n"
+        finally:
+            # Client went away: drop generations that have not started.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
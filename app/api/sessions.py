@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+
+from fastapi import APIRouter, HTTPException
+
+from app.services.session_service import SessionBusy, SessionNotFound, store
+
+
+router = APIRouter()
+
+
+def begin_turn(session_id: str):
+    """
+    store.begin() for endpoints: 404 for an unknown/expired session,
+    409 while another turn is running in it.
+    """
+    try:
+        return store.begin(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    except SessionBusy:
+        raise HTTPException(status_code=409, detail="A turn is already running in this session")
+
+
+@contextmanager
+def session_turn(session_id: str):
+    session = begin_turn(session_id)
+    try:
+        yield session
+    finally:
+        store.end(session)
+
+
+@router.post("/")
+def create_session():
+    """
+    Start a conversation. Pass the returned `session_id` to /query/ or
+    /agent/; follow-up turns then reuse the model's context instead of
+    resending the history.
+    """
+    return store.create().metrics()
+
+
+@router.get("/")
+def list_sessions():
+    return {"sessions": [s.metrics() for s in store.list()]}
+
+
+@router.get("/{session_id}")
+def get_session(session_id: str):
+    try:
+        return store.get(session_id).metrics()
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+
+
+@router.delete("/{session_id}")
+def delete_session(session_id: str):
+    try:
+        store.delete(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return {"deleted": session_id}
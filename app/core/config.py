@@ -0,0 +1,256 @@
+import os
+
+
+# ------------------------------------------------------------
+# Embeddings
+# ------------------------------------------------------------
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "nomic-ai/nomic-embed-text-v1")
+
+# "torch" (fp32 reference) or "onnx" (ONNX Runtime, int8 graph by default;
+# needs requirements-optional.txt).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_quantized.onnx")
+
+# Output dimension. Values below the model's native size (768) are
+# Matryoshka-truncated; pair this with a Matryoshka-trained model such as
+# nomic-ai/nomic-embed-text-v1.5. Changing it requires a new collection.
+EMBEDDING_NATIVE_DIM = int(os.getenv("EMBEDDING_NATIVE_DIM", 768))
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", EMBEDDING_NATIVE_DIM))
+
+# Batch size used by embed_texts() for ingestion.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 32))
+
+# Query-time micro-batcher: concurrent embed_text() calls are merged
+# into one encode() call, waiting at most this long for company.
+EMBED_MICROBATCH_ENABLED = os.getenv("EMBED_MICROBATCH_ENABLED", "true").lower() == "true"
+EMBED_MICROBATCH_MAX_WAIT_MS = float(os.getenv("EMBED_MICROBATCH_MAX_WAIT_MS", 5))
+EMBED_MICROBATCH_MAX_SIZE = int(os.getenv("EMBED_MICROBATCH_MAX_SIZE", 32))
+
+# Embedding cache: in-memory LRU + memory-mapped on-disk tier.
+# Set EMBED_CACHE_DIR to an empty string to keep the cache in memory only.
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+EMBED_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBED_CACHE_MEMORY_ENTRIES", 10000))
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "embedding_cache")
+EMBED_CACHE_DISK_ENTRIES = int(os.getenv("EMBED_CACHE_DISK_ENTRIES", 200000))
+
+# Out-of-process embedding workers (python -m app.services.embedding_workers).
+# When enabled, the API sends texts over a local socket and reads the
+# vectors back from shared memory instead of loading the model itself.
+EMBED_WORKERS_ENABLED = os.getenv("EMBED_WORKERS_ENABLED", "false").lower() == "true"
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", 2))
+EMBED_WORKER_THREADS = int(os.getenv("EMBED_WORKER_THREADS", max(1, (os.cpu_count() or 1) // EMBED_WORKERS)))
+EMBED_WORKER_QUEUE_SIZE = int(os.getenv("EMBED_WORKER_QUEUE_SIZE", 64))
+EMBED_WORKER_ADDRESS = os.getenv("EMBED_WORKER_ADDRESS", "/tmp/agentforge-embed.sock")
+EMBED_WORKER_AUTHKEY = os.getenv("EMBED_WORKER_AUTHKEY", "agentforge").encode()
+EMBED_WORKER_TIMEOUT_S = float(os.getenv("EMBED_WORKER_TIMEOUT_S", 60))
+
+# ------------------------------------------------------------
+# Warmup
+# ------------------------------------------------------------
+# After a shared model/client fails to load, requests fail fast for this
+# long instead of retrying inline; the background warmup retries at the
+# same interval until it loads.
+WARMUP_RETRY_INTERVAL_S = float(os.getenv("WARMUP_RETRY_INTERVAL_S", 30))
+
+# ------------------------------------------------------------
+# Reindexing
+# ------------------------------------------------------------
+REINDEX_BATCH_SIZE = int(os.getenv("REINDEX_BATCH_SIZE", 256))
+
+# ------------------------------------------------------------
+# Vector store
+# ------------------------------------------------------------
+# "qdrant" (server) or "local" (in-process index, no Qdrant needed).
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "qdrant").lower()
+
+# Local backend: memory-mapped vectors + payload sidecar in this directory.
+LOCAL_STORE_DIR = os.getenv("LOCAL_STORE_DIR", "vector_store")
+
+# Brute-force search up to this many vectors, then an HNSW graph
+# (requires hnswlib from requirements-optional.txt). 0 disables HNSW.
+LOCAL_STORE_HNSW_THRESHOLD = int(os.getenv("LOCAL_STORE_HNSW_THRESHOLD", 50000))
+LOCAL_STORE_HNSW_M = int(os.getenv("LOCAL_STORE_HNSW_M", 16))
+LOCAL_STORE_HNSW_EF_CONSTRUCTION = int(os.getenv("LOCAL_STORE_HNSW_EF_CONSTRUCTION", 200))
+LOCAL_STORE_HNSW_EF_SEARCH = int(os.getenv("LOCAL_STORE_HNSW_EF_SEARCH", 64))
+
+
+# ------------------------------------------------------------
+# Qdrant
+# ------------------------------------------------------------
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_TIMEOUT_S = int(os.getenv("QDRANT_TIMEOUT_S", 30))
+
+# Keep-alive connection pool shared by every request in the process.
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", 32))
+QDRANT_KEEPALIVE_S = float(os.getenv("QDRANT_KEEPALIVE_S", 60))
+
+# Vector storage profile for a new collection: memory | scalar_int8 |
+# binary | on_disk_int8 (see qdrant_service.STORAGE_PROFILES). Once the
+# collection exists its actual layout wins, re-read every
+# QDRANT_PROFILE_REFRESH_S, so /admin/storage-profile migrations reach
+# every worker and survive restarts and reindexes.
+QDRANT_STORAGE_PROFILE = os.getenv("QDRANT_STORAGE_PROFILE", "memory")
+QDRANT_PROFILE_REFRESH_S = float(os.getenv("QDRANT_PROFILE_REFRESH_S", 30))
+
+# Bulk writes: points per upsert request and how many requests may be
+# in flight at once.
+QDRANT_UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", 64))
+QDRANT_UPSERT_PARALLEL = int(os.getenv("QDRANT_UPSERT_PARALLEL", 4))
+
+
+# ------------------------------------------------------------
+# Hybrid retrieval
+# ------------------------------------------------------------
+# Default rag_search mode: "dense" or "hybrid" (dense + BM25 sparse
+# vectors fused with reciprocal-rank fusion).
+RAG_SEARCH_MODE = os.getenv("RAG_SEARCH_MODE", "dense").lower()
+
+# Candidates fetched from each of the dense and sparse searches before fusion.
+HYBRID_PREFETCH_LIMIT = int(os.getenv("HYBRID_PREFETCH_LIMIT", 20))
+
+# BM25 term-frequency saturation; IDF is applied by Qdrant at query time.
+# BM25_AVG_DOC_LEN is the average chunk length in tokens.
+BM25_K1 = float(os.getenv("BM25_K1", 1.2))
+BM25_B = float(os.getenv("BM25_B", 0.75))
+BM25_AVG_DOC_LEN = float(os.getenv("BM25_AVG_DOC_LEN", 250))
+
+
+# ------------------------------------------------------------
+# Batch queries (/query/batch)
+# ------------------------------------------------------------
+# Generations running at once per batch request; match OLLAMA_NUM_PARALLEL.
+QUERY_BATCH_CONCURRENCY = int(os.getenv("QUERY_BATCH_CONCURRENCY", 4))
+QUERY_BATCH_MAX_QUESTIONS = int(os.getenv("QUERY_BATCH_MAX_QUESTIONS", 1000))
+
+
+# ------------------------------------------------------------
+# Snapshots
+# ------------------------------------------------------------
+# Exported snapshots (vectors + documents/chunks rows) live here.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", 512))
+
+
+# ------------------------------------------------------------
+# Retrieval diagnostics
+# ------------------------------------------------------------
+# ROUGE-L between the query and each hit, when a request does not ask
+# for it inline: "background" (scored after the request, reported on
+# /health/metrics) or "off".
+RAG_ROUGE_MODE = os.getenv("RAG_ROUGE_MODE", "background").lower()
+
+# Background scoring queue; queries beyond it are not scored.
+RAG_ROUGE_QUEUE_SIZE = int(os.getenv("RAG_ROUGE_QUEUE_SIZE", 256))
+
+
+# ------------------------------------------------------------
+# Semantic answer cache
+# ------------------------------------------------------------
+# Reuse a generated answer for a paraphrased question: the question
+# embeddings must reach ANSWER_CACHE_THRESHOLD cosine similarity and the
+# retrieved chunk set must be identical.
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", 3600))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 5000))
+
+
+# ------------------------------------------------------------
+# Retrieval cache
+# ------------------------------------------------------------
+# rag_search results for identical (query, top_k, filters, mode), keyed
+# by the corpus generation so any ingestion makes older entries unreachable.
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", 10000))
+# Upper bound for changes made outside this process (other API workers,
+# direct Qdrant writes).
+RETRIEVAL_CACHE_TTL_S = float(os.getenv("RETRIEVAL_CACHE_TTL_S", 300))
+
+
+# ------------------------------------------------------------
+# Reranking
+# ------------------------------------------------------------
+# Optional cross-encoder stage: fetch RERANK_CANDIDATES hits, rescore
+# them in one batched pass and keep the best top_k. If scoring takes
+# longer than RERANK_TIMEOUT_MS per query, the vector-search order is
+# kept. One pass runs at a time; others wait up to RERANK_QUEUE_WAIT_MS
+# (within their timeout) and then skip reranking. Raise it to queue
+# longer under load, or set 0 to skip at once.
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL_NAME = os.getenv("RERANK_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 20))
+RERANK_TIMEOUT_MS = float(os.getenv("RERANK_TIMEOUT_MS", 300))
+RERANK_QUEUE_WAIT_MS = float(os.getenv("RERANK_QUEUE_WAIT_MS", 150))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", 32))
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", 512))
+
+
+# ------------------------------------------------------------
+# Prompt context
+# ------------------------------------------------------------
+# Retrieved context is packed into this many Llama tokens.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+
+# Hugging Face tokenizer matching the Ollama model (llama3.1). If it
+# cannot be loaded, token counts fall back to a word/punctuation estimate.
+LLAMA_TOKENIZER_NAME = os.getenv("LLAMA_TOKENIZER_NAME", "unsloth/Meta-Llama-3.1-8B-Instruct")
+
+
+# ------------------------------------------------------------
+# Prompt compression
+# ------------------------------------------------------------
+# Keep only the retrieved sentences closest to the question before
+# packing the context. Per request override: QueryRequest.compress.
+PROMPT_COMPRESSION_ENABLED = os.getenv("PROMPT_COMPRESSION_ENABLED", "false").lower() == "true"
+
+# Fraction of the retrieved tokens to keep (0 < ratio <= 1).
+PROMPT_COMPRESSION_RATIO = float(os.getenv("PROMPT_COMPRESSION_RATIO", 0.5))
+
+# Prefill cost used for "prefill_saved_ms" until Ollama has reported
+# its own prompt_eval timings in this process.
+PREFILL_MS_PER_TOKEN = float(os.getenv("PREFILL_MS_PER_TOKEN", 5.0))
+
+
+# ------------------------------------------------------------
+# Async request path
+# ------------------------------------------------------------
+# Async endpoints hand blocking work to these bounded thread pools
+# (app.core.executors) instead of running it on the event loop.
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", 4))   # numpy/torch/tokenizer work
+IO_EXECUTOR_WORKERS = int(os.getenv("IO_EXECUTOR_WORKERS", 16))    # DB, files, agent tools
+INGEST_EXECUTOR_WORKERS = int(os.getenv("INGEST_EXECUTOR_WORKERS", 2))  # whole ingestion pipelines
+
+# Ollama endpoint used for Whisper transcription (multipart upload).
+WHISPER_URL = os.getenv("WHISPER_URL", "http://localhost:11434/api/generate")
+WHISPER_TIMEOUT_S = float(os.getenv("WHISPER_TIMEOUT_S", 300))
+
+# LLaVA caption calls in flight at once (query-time image/video frames).
+LLAVA_MAX_CONCURRENCY = int(os.getenv("LLAVA_MAX_CONCURRENCY", 2))
+
+
+# ------------------------------------------------------------
+# Conversation sessions
+# ------------------------------------------------------------
+# Multi-turn /query and /agent sessions keep Ollama's `context` (the
+# token state of the conversation) so follow-ups only send new tokens.
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", 1000))
+SESSION_IDLE_TTL_S = float(os.getenv("SESSION_IDLE_TTL_S", 1800))
+
+# Keep below the Ollama server's context length (OLLAMA_CONTEXT_LENGTH);
+# past it the next turn starts a new context seeded with the last answer
+# (reported as "context_reset" in the session metrics).
+SESSION_MAX_CONTEXT_TOKENS = int(os.getenv("SESSION_MAX_CONTEXT_TOKENS", 4096))
+
+# How long Ollama keeps the model (and its KV cache) loaded between turns.
+SESSION_KEEP_ALIVE = os.getenv("SESSION_KEEP_ALIVE", "30m")
+
+
+# ------------------------------------------------------------
+# Request coalescing
+# ------------------------------------------------------------
+# Identical /query requests in flight at the same time share one
+# retrieval and one LLM call (see app.core.singleflight).
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
@@ -0,0 +1,36 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import (
+    CPU_EXECUTOR_WORKERS,
+    IO_EXECUTOR_WORKERS,
+    INGEST_EXECUTOR_WORKERS,
+)
+
+
+# Separate pools so a burst of long ingestions or slow agent tools
+# cannot take the threads short CPU steps of /query need.
+_cpu_executor = ThreadPoolExecutor(max_workers=CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu")
+_io_executor = ThreadPoolExecutor(max_workers=IO_EXECUTOR_WORKERS, thread_name_prefix="io")
+_ingest_executor = ThreadPoolExecutor(max_workers=INGEST_EXECUTOR_WORKERS, thread_name_prefix="ingest")
+
+
+async def _run(executor, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Await a CPU-bound call (numpy, torch, tokenizers) off the event loop."""
+    return await _run(_cpu_executor, fn, *args, **kwargs)
+
+
+async def run_io(fn, *args, **kwargs):
+    """Await a blocking I/O call (SQLAlchemy, files, sync HTTP) off the event loop."""
+    return await _run(_io_executor, fn, *args, **kwargs)
+
+
+async def run_ingest(fn, *args, **kwargs):
+    """Await a whole ingestion pipeline; at most INGEST_EXECUTOR_WORKERS run at once."""
+    return await _run(_ingest_executor, fn, *args, **kwargs)
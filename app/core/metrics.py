@@ -1,5 +1,47 @@
 import time
+import threading
+from collections import defaultdict
+from typing import Dict
+
+_counters: Dict[str, float] = defaultdict(float)
+_summaries: Dict[str, Dict[str, float]] = {}
+_lock = threading.Lock()
+
 
 def timer():
     """Simple helper to measure time."""
     return time.perf_counter()
+
+
+def incr(name: str, value: float = 1):
+    """Increment a process-wide counter (e.g. cache hits)."""
+    with _lock:
+        _counters[name] += value
+
+
+def get_counters() -> Dict[str, float]:
+    """Snapshot of all counters, exposed on /health/metrics."""
+    with _lock:
+        return dict(_counters)
+
+
+def observe(name: str, value: float):
+    """Record one sample of a measured value (count/sum/min/max/avg)."""
+    with _lock:
+        summary = _summaries.get(name)
+        if summary is None:
+            _summaries[name] = {"count": 1, "sum": value, "min": value, "max": value}
+        else:
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["min"] = min(summary["min"], value)
+            summary["max"] = max(summary["max"], value)
+
+
+def get_summaries() -> Dict[str, Dict[str, float]]:
+    """Snapshot of all observed values, exposed on /health/metrics."""
+    with _lock:
+        return {
+            name: {**s, "avg": s["sum"] / s["count"]}
+            for name, s in _summaries.items()
+        }
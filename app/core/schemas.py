@@ -5,6 +5,13 @@ class IngestResponse(BaseModel):
     document_id: str
     status: str
 
+class SearchFilters(BaseModel):
+    """Restrict retrieval to chunks whose payload matches every given field."""
+    doc_id: Optional[List[str]] = None
+    type: Optional[List[str]] = None
+    source: Optional[List[str]] = None
+
+
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 4
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable
+
+from app.core.config import SINGLE_FLIGHT_ENABLED
+from app.core.metrics import incr
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls with the same key.
+
+    The first caller starts the computation as its own task; callers
+    that arrive with the same key while it runs await that task instead
+    of starting another. Every caller gets the same result object (or
+    exception), so treat it as read-only. Nothing is kept once the call
+    finishes; this is not a cache.
+
+    A caller that is cancelled (client went away) does not cancel the
+    shared task, so the others still get their answer.
+
+    Counters: "<name>.misses" for calls that ran, "<name>.hits" for
+    calls that joined one already in flight.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved if every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable], *args, **kwargs):
+        if not SINGLE_FLIGHT_ENABLED:
+            return await fn(*args, **kwargs)
+
+        task = self._inflight.get(key)
+        if task is None:
+            incr(f"{self.name}.misses")
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            incr(f"{self.name}.hits")
+
+        return await asyncio.shield(task)
+
+    def __len__(self):
+        return len(self._inflight)
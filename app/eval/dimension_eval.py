@@ -0,0 +1,95 @@
+import argparse
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app.core.config import EMBEDDING_BACKEND, EMBEDDING_NATIVE_DIM
+from app.eval.embedding_parity import load_sample_texts
+from app.services.embedding_backends import load_backend, matryoshka_truncate
+
+
+def build_self_retrieval_set(chunks: List[str], query_words: int = 20) -> List[str]:
+    """
+    One query per chunk: its first `query_words` words.
+    The chunk it came from is the single relevant answer.
+    """
+    return [" ".join(c.split()[:query_words]) for c in chunks]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    k = min(k, corpus.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def compare_dimensions(
+    queries: List[str],
+    corpus: List[str],
+    dims: Sequence[int] = (768, 512, 256, 128),
+    k: int = 5,
+) -> Dict:
+    """
+    Retrieval quality and cost of Matryoshka-truncated embeddings.
+
+    Each query's relevant document is corpus[i]. Embeddings are computed
+    once at full size and truncated per dimension. For each dimension:
+    - hit@k / MRR on the self-retrieval set
+    - overlap@k with the full-dimension top-k
+    - vector bytes and brute-force search time per query
+    """
+    model = load_backend(EMBEDDING_BACKEND)
+    q_full = np.asarray(model.encode(queries, convert_to_numpy=True, show_progress_bar=False), dtype=np.float32)
+    c_full = np.asarray(model.encode(corpus, convert_to_numpy=True, show_progress_bar=False), dtype=np.float32)
+
+    full_dim = c_full.shape[1]
+    reference = _top_k(_normalize(q_full), _normalize(c_full), k)
+
+    report = {}
+    for dim in dims:
+        q = _normalize(matryoshka_truncate(q_full, dim))
+        c = _normalize(matryoshka_truncate(c_full, dim))
+
+        start = time.perf_counter()
+        top = _top_k(q, c, k)
+        search_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        ranks = []
+        for i, row in enumerate(top):
+            hits = np.where(row == i)[0]
+            ranks.append(int(hits[0]) + 1 if len(hits) else None)
+
+        overlap = [len(set(top[i]) & set(reference[i])) / len(reference[i]) for i in range(len(queries))]
+
+        report[min(dim, full_dim)] = {
+            f"hit@{k}": round(sum(r is not None for r in ranks) / len(ranks), 4),
+            "mrr": round(sum(1 / r for r in ranks if r) / len(ranks), 4),
+            f"overlap@{k}_vs_full": round(float(np.mean(overlap)), 4),
+            "bytes_per_vector": min(dim, full_dim) * 4,
+            "search_ms_per_query": round(search_ms, 4),
+        }
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matryoshka dimension comparison")
+    parser.add_argument("--texts", default="examples/*.txt")
+    parser.add_argument("--dims", default=f"{EMBEDDING_NATIVE_DIM},512,256,128")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    chunks = load_sample_texts(args.texts, limit=1000)
+
+    print(compare_dimensions(
+        build_self_retrieval_set(chunks),
+        chunks,
+        dims=[int(d) for d in args.dims.split(",")],
+        k=args.k,
+    ))
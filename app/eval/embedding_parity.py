@@ -0,0 +1,95 @@
+import argparse
+import glob
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.embedding_backends import load_backend
+from app.utils.chunker import chunk_text
+
+
+def load_sample_texts(pattern: str = "examples/*.txt", limit: int = 256) -> List[str]:
+    """
+    Chunk the example text files into a small parity corpus.
+    """
+    texts = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            texts.extend(chunk_text(f.read(), max_words=250, overlap_words=40))
+
+    return texts[:limit]
+
+
+def _timed_encode(model, texts: List[str], batch_size: int):
+    # One warm-up call so lazy graph/session setup is not measured.
+    model.encode(texts[:1], convert_to_numpy=True, show_progress_bar=False)
+
+    start = time.perf_counter()
+    vectors = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    elapsed = time.perf_counter() - start
+
+    return np.asarray(vectors, dtype=np.float32), elapsed
+
+
+def compare_backends(
+    texts: List[str],
+    reference: str = "torch",
+    candidate: str = "onnx",
+    batch_size: int = 32,
+) -> Dict:
+    """
+    Embed the same texts with two backends and report:
+    - cosine similarity between matching vectors (drift from reference)
+    - throughput of each backend, total and per CPU core
+    """
+    if not texts:
+        raise ValueError("No texts to compare")
+
+    ref_vectors, ref_time = _timed_encode(load_backend(reference), texts, batch_size)
+    cand_vectors, cand_time = _timed_encode(load_backend(candidate), texts, batch_size)
+
+    ref_norm = ref_vectors / np.linalg.norm(ref_vectors, axis=1, keepdims=True)
+    cand_norm = cand_vectors / np.linalg.norm(cand_vectors, axis=1, keepdims=True)
+    cosines = np.sum(ref_norm * cand_norm, axis=1)
+
+    cores = os.cpu_count() or 1
+
+    return {
+        "texts": len(texts),
+        "cosine": {
+            "mean": round(float(cosines.mean()), 6),
+            "min": round(float(cosines.min()), 6),
+            "p5": round(float(np.percentile(cosines, 5)), 6),
+        },
+        "throughput": {
+            reference: {
+                "texts_per_sec": round(len(texts) / ref_time, 2),
+                "texts_per_sec_per_core": round(len(texts) / ref_time / cores, 2),
+            },
+            candidate: {
+                "texts_per_sec": round(len(texts) / cand_time, 2),
+                "texts_per_sec_per_core": round(len(texts) / cand_time / cores, 2),
+            },
+        },
+        "speedup": round(ref_time / cand_time, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding backend parity check")
+    parser.add_argument("--texts", default="examples/*.txt", help="glob of text files to embed")
+    parser.add_argument("--reference", default="torch")
+    parser.add_argument("--candidate", default="onnx")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    report = compare_backends(
+        load_sample_texts(args.texts),
+        reference=args.reference,
+        candidate=args.candidate,
+        batch_size=args.batch_size,
+    )
+
+    print(report)
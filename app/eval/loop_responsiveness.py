@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+import numpy as np
+
+
+PROBE_PATH = "/health/live"
+
+
+def _summary(samples: List[float]) -> Dict:
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+async def _probe_once(client: httpx.AsyncClient, scheduled: float = None) -> float:
+    """
+    Milliseconds from `scheduled` (default: now) until the probe
+    answered. Counting from the planned send time also captures the
+    delay when the loop was too busy to send it.
+    """
+    start = time.perf_counter() if scheduled is None else scheduled
+    await client.get(PROBE_PATH)
+    return (time.perf_counter() - start) * 1000
+
+
+async def measure_responsiveness(
+    client: httpx.AsyncClient,
+    path: str,
+    payload: Dict,
+    concurrency: int,
+    probe_interval_ms: float = 20,
+    idle_probes: int = 20,
+) -> Dict:
+    """
+    Fire `concurrency` identical slow requests at once and, while they
+    are in flight, keep timing the async liveness probe. If anything on
+    the request path blocks the event loop, probe latency jumps to the
+    length of the blocking call.
+    """
+    idle = [await _probe_once(client) for _ in range(idle_probes)]
+
+    under_load: List[float] = []
+    done = asyncio.Event()
+
+    async def probe():
+        scheduled = time.perf_counter()
+        while not done.is_set():
+            under_load.append(await _probe_once(client, scheduled))
+            scheduled = time.perf_counter() + probe_interval_ms / 1000
+            await asyncio.sleep(probe_interval_ms / 1000)
+
+    async def request() -> tuple:
+        start = time.perf_counter()
+        try:
+            response = await client.post(path, json=payload)
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        return ok, (time.perf_counter() - start) * 1000
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(request() for _ in range(concurrency)))
+    wall_ms = (time.perf_counter() - start) * 1000
+    done.set()
+    await prober
+
+    latencies = [ms for _, ms in results]
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "errors": sum(1 for ok, _ in results if not ok),
+        "wall_ms": round(wall_ms, 2),
+        "request_latency": _summary(latencies),
+        "probe_idle": _summary(idle),
+        "probe_under_load": _summary(under_load),
+    }
+
+
+async def _run(args) -> Dict:
+    if args.in_process:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://in-process"
+    else:
+        transport = None
+        base_url = args.url
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=None) as client:
+        return await measure_responsiveness(
+            client,
+            args.path,
+            {"question": args.question},
+            args.concurrency,
+            args.probe_interval_ms,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Event loop responsiveness under concurrent requests")
+    parser.add_argument("--url", default="http://localhost:8000", help="running server (single worker)")
+    parser.add_argument("--in-process", action="store_true", help="drive app.main:app in this process instead")
+    parser.add_argument("--path", default="/query/")
+    parser.add_argument("--question", default="What is this document about?")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--probe-interval-ms", type=float, default=20)
+    parser.add_argument("--max-probe-ms", type=float, default=250,
+                        help="fail if probe p99 under load exceeds this")
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(args))
+    print(report)
+
+    p99 = report["probe_under_load"].get("p99_ms", 0)
+    if p99 > args.max_probe_ms:
+        print(f"[LOOP] Event loop blocked: probe p99 {p99} ms > {args.max_probe_ms} ms")
+        sys.exit(1)
+
+    print(f"[LOOP] Event loop responsive: probe p99 {p99} ms")
@@ -4,8 +4,9 @@ from app.api.query import router as query_router
 from app.api.health import router as health_router
 from app.api.agent import router as agent_router
 from app.api.multimodal import router as multimodal_router
-from app.services.qdrant_service import init_qdrant
-from qdrant_client import QdrantClient
+from app.api.admin import router as admin_router
+from app.api.sessions import router as sessions_router
+from app.services import model_registry
 from app.db.database import Base , engine
 
 app = FastAPI(
@@ -14,10 +15,21 @@ app = FastAPI(
     version="1.0.0"
 )
 
+
+def _create_tables():
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+model_registry.register("database", _create_tables)
+
+
 @app.on_event("startup")
 async def startup_event():
-    Base.metadata.create_all(bind=engine)
-    init_qdrant()   
+    # Tables, Qdrant, the embedding model and the Llama tokenizer load
+    # in the background; /health/ready turns 200 once they are all
+    # available.
+    model_registry.start_warmup()
 
 
 app.include_router(health_router, prefix="/health")
@@ -25,3 +37,5 @@ app.include_router(ingest_router, prefix="/ingest")
 app.include_router(query_router, prefix="/query")
 app.include_router(agent_router, prefix="/agent")
 app.include_router(multimodal_router, prefix="/multimodal")
+app.include_router(admin_router, prefix="/admin")
+app.include_router(sessions_router, prefix="/sessions")
@@ -5,8 +5,8 @@ from sqlalchemy.orm import Session
 
 from app.services.whisper_service import transcribe_audio
 from app.utils.chunker import chunk_text
-from app.services.embedding_service import embed_text
-from app.services.qdrant_service import insert_embedding
+from app.services.embedding_service import embed_texts
+from app.services.vector_store import insert_embeddings
 from app.db import crud
 
 
@@ -27,23 +27,26 @@ def process_audio(doc_id: str, audio_path: str, db: Session) -> Dict:
     crud.update_document_transcript(db, doc_id, transcript)
 
     chunks = chunk_text(transcript, max_words=250, overlap_words=40)
+    vectors = embed_texts(chunks)
 
-    for idx, chunk_text_str in enumerate(chunks):
-        chunk_id = str(uuid.uuid4())
-        vector = embed_text(chunk_text_str)
+    chunk_ids = [str(uuid.uuid4()) for _ in chunks]
 
-        insert_embedding(
-            doc_id=doc_id,
-            chunk_id=chunk_id,
-            vector=vector,
-            metadata={
+    insert_embeddings(
+        doc_id=doc_id,
+        chunk_ids=chunk_ids,
+        vectors=vectors,
+        metadatas=[
+            {
                 "type": "audio",
                 "source": "transcript",
                 "chunk_index": idx,
                 "text": chunk_text_str
-            },
-        )
+            }
+            for idx, chunk_text_str in enumerate(chunks)
+        ],
+    )
 
+    for idx, (chunk_id, chunk_text_str) in enumerate(zip(chunk_ids, chunks)):
         crud.create_chunk(
             db=db,
             chunk_id=chunk_id,
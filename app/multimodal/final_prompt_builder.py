@@ -1,4 +1,13 @@
-def build_multimodal_prompt(query, caption=None, transcript=None, video_text=None, rag_results=None):
+from app.services.rag_context_builder import build_rag_context
+from app.services.prompt_compressor import compress_results
+
+
+def build_multimodal_prompt(query, caption=None, transcript=None, video_text=None, rag_results=None, compress=None):
+    """
+    Final LLaMA prompt. `rag_results` are compressed against `query`
+    when `compress` (default PROMPT_COMPRESSION_ENABLED) is on; pass
+    compress=False for results that were already compressed.
+    """
     context_text = ""
 
     if caption:
@@ -11,7 +20,8 @@ def build_multimodal_prompt(query, caption=None, transcript=None, video_text=Non
         context_text += f"\nVideo Summary:\n{video_text}\n"
 
     if rag_results:
-        merged = "\n".join([r["text"] for r in rag_results if r.get("text")])
+        rag_results, _ = compress_results(query, rag_results, enabled=compress)
+        merged = build_rag_context(rag_results)
         context_text += f"\nRetrieved Document Context:\n{merged}\n"
 
     prompt = f"""
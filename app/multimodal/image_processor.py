@@ -1,4 +1,4 @@
-from app.services.llava_service import run_llava_caption
+from app.services.llava_service import run_llava_caption, arun_llava_caption
 from app.services.embedding_service import embed_text
 
 
@@ -39,3 +39,16 @@ def process_image_for_query(image_path: str) -> str:
         caption = "No description available from the image."
 
     return caption.strip()
+
+
+async def aprocess_image_for_query(image_path: str) -> str:
+    """
+    process_image_for_query() for async endpoints.
+    """
+
+    caption = await arun_llava_caption(image_path)
+
+    if not caption:
+        caption = "No description available from the image."
+
+    return caption.strip()
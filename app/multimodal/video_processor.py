@@ -1,14 +1,21 @@
 import os
 import uuid
+import asyncio
+import tempfile
 from typing import Dict, List
 
 from sqlalchemy.orm import Session
 
-from app.utils.video_utils import extract_keyframes_ffmpeg, extract_audio_ffmpeg
-from app.services.llava_service import run_llava_caption
-from app.services.embedding_service import embed_text
-from app.services.qdrant_service import insert_embedding
-from app.services.whisper_service import transcribe_audio
+from app.utils.video_utils import (
+    extract_keyframes_ffmpeg,
+    extract_audio_ffmpeg,
+    aextract_keyframes_ffmpeg,
+    aextract_audio_ffmpeg,
+)
+from app.services.llava_service import run_llava_caption, arun_llava_caption
+from app.services.embedding_service import embed_texts
+from app.services.vector_store import insert_embeddings
+from app.services.whisper_service import transcribe_audio, atranscribe_audio
 from app.utils.chunker import chunk_text
 from app.db import crud
 
@@ -42,28 +49,34 @@ def process_video(doc_id: str, video_path: str, db: Session) -> Dict:
 
     frame_results = []
 
+    captioned = []
     for idx, frame_path in enumerate(frame_paths):
         caption = run_llava_caption(frame_path)
-        if not caption:
-            continue
+        if caption:
+            captioned.append((idx, frame_path, caption))
 
-        vector = embed_text(caption)
+    frame_vectors = embed_texts([caption for _, _, caption in captioned])
 
-        chunk_id = str(uuid.uuid4())
+    frame_chunk_ids = [str(uuid.uuid4()) for _ in captioned]
 
-        # Store in Qdrant
-        insert_embedding(
-            doc_id=doc_id,
-            chunk_id=chunk_id,
-            vector=vector,
-            metadata={
+    # Store in Qdrant
+    insert_embeddings(
+        doc_id=doc_id,
+        chunk_ids=frame_chunk_ids,
+        vectors=frame_vectors,
+        metadatas=[
+            {
                 "type": "video_frame",
                 "source": "frame_caption",
                 "frame_index": idx,
                 "file_path": frame_path,
-            },
-        )
+                "text": caption,
+            }
+            for idx, frame_path, caption in captioned
+        ],
+    )
 
+    for (idx, frame_path, caption), chunk_id in zip(captioned, frame_chunk_ids):
         crud.create_chunk(
             db=db,
             chunk_id=chunk_id,
@@ -103,21 +116,26 @@ def process_video(doc_id: str, video_path: str, db: Session) -> Dict:
             overlap_words=40,
         )
 
-        for idx, chunk_text_str in enumerate(transcript_chunks):
-            chunk_id = str(uuid.uuid4())
-            vector = embed_text(chunk_text_str)
+        transcript_vectors = embed_texts(transcript_chunks)
 
-            insert_embedding(
-                doc_id=doc_id,
-                chunk_id=chunk_id,
-                vector=vector,
-                metadata={
+        transcript_chunk_ids = [str(uuid.uuid4()) for _ in transcript_chunks]
+
+        insert_embeddings(
+            doc_id=doc_id,
+            chunk_ids=transcript_chunk_ids,
+            vectors=transcript_vectors,
+            metadatas=[
+                {
                     "type": "video_audio",
                     "source": "transcript",
                     "chunk_index": idx,
-                },
-            )
+                    "text": chunk_text_str,
+                }
+                for idx, chunk_text_str in enumerate(transcript_chunks)
+            ],
+        )
 
+        for idx, (chunk_id, chunk_text_str) in enumerate(zip(transcript_chunk_ids, transcript_chunks)):
             crud.create_chunk(
                 db=db,
                 chunk_id=chunk_id,
@@ -165,6 +183,42 @@ def process_video_for_query(video_path: str) -> str:
     extract_audio_ffmpeg(video_path, tmp_audio_path)
     transcript = transcribe_audio(tmp_audio_path)
 
+    return _combine(frame_captions, transcript)
+
+
+async def aprocess_video_for_query(video_path: str) -> str:
+    """
+    process_video_for_query() for async endpoints: ffmpeg runs as an
+    asyncio subprocess, frames are captioned concurrently (at most
+    LLAVA_MAX_CONCURRENCY at once, see arun_llava_caption()) and the
+    audio is transcribed alongside them. Each call works in its own temporary
+    directory, so concurrent requests do not share frames.
+    """
+
+    with tempfile.TemporaryDirectory(prefix="query_video_") as work_dir:
+        frame_paths = await aextract_keyframes_ffmpeg(
+            video_path,
+            os.path.join(work_dir, "frames"),
+            seconds_interval=3,
+        )
+
+        audio_path = await aextract_audio_ffmpeg(video_path, os.path.join(work_dir, "audio.wav"))
+
+        *captions, transcript = await asyncio.gather(
+            *(arun_llava_caption(fp) for fp in frame_paths),
+            atranscribe_audio(audio_path),
+        )
+
+    frame_captions = [
+        f"Frame {idx}: {caption}"
+        for idx, caption in enumerate(captions)
+        if caption
+    ]
+
+    return _combine(frame_captions, transcript)
+
+
+def _combine(frame_captions: List[str], transcript: str) -> str:
     frames_text = (
         "\n".join(frame_captions)
         if frame_captions
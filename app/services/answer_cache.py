@@ -0,0 +1,187 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL_S,
+)
+from app.core.metrics import incr
+from app.services.embedding_service import embed_text
+from app.services.vector_store import add_ingest_listener
+
+
+class _Entry(NamedTuple):
+    scope: str
+    chunk_ids: FrozenSet[str]
+    doc_ids: FrozenSet[str]
+    value: Dict
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Generated answers keyed by question embedding + retrieved chunk set.
+
+    A lookup hits when a cached question in the same `scope` has cosine
+    similarity >= `threshold` with the new one and was answered from
+    exactly the same chunks. Question vectors live in one preallocated
+    matrix, so a lookup is a single matrix-vector product. Entries
+    expire after `ttl_s` and the least recently used one is evicted
+    when the cache is full.
+
+    The cache is per process. Entries are dropped when any of their
+    chunks or documents are written again (see invalidate()).
+    """
+
+    def __init__(self, max_entries: int, ttl_s: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._free: List[int] = list(range(max_entries - 1, -1, -1))
+        self._by_chunk: Dict[str, Set[int]] = {}
+        self._by_doc: Dict[str, Set[int]] = {}
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _remove(self, slot: int):
+        entry = self._entries.pop(slot)
+        for chunk_id in entry.chunk_ids:
+            self._by_chunk.get(chunk_id, set()).discard(slot)
+        for doc_id in entry.doc_ids:
+            self._by_doc.get(doc_id, set()).discard(slot)
+        self._free.append(slot)
+
+    def get(self, vector, scope: str, chunk_ids: FrozenSet[str]) -> Optional[Tuple[Dict, float]]:
+        """
+        (cached value, similarity) or None.
+        """
+        query = self._normalize(vector)
+
+        with self._lock:
+            if not self._entries:
+                return None
+
+            slots = np.fromiter(self._entries.keys(), dtype=np.int64, count=len(self._entries))
+            scores = self._matrix[slots] @ query
+            candidates = np.where(scores >= self.threshold)[0]
+
+            now = time.time()
+            for i in candidates[np.argsort(-scores[candidates])]:
+                slot = int(slots[i])
+                entry = self._entries[slot]
+
+                if entry.expires_at < now:
+                    self._remove(slot)
+                    continue
+
+                if entry.scope == scope and entry.chunk_ids == chunk_ids:
+                    self._entries.move_to_end(slot)
+                    return entry.value, float(scores[i])
+
+        return None
+
+    def put(self, vector, scope: str, chunk_ids: FrozenSet[str], doc_ids: FrozenSet[str], value: Dict):
+        if self.max_entries <= 0:
+            return
+
+        vector = self._normalize(vector)
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            if not self._free:
+                self._remove(next(iter(self._entries)))
+
+            slot = self._free.pop()
+            self._matrix[slot] = vector
+            self._entries[slot] = _Entry(scope, chunk_ids, doc_ids, value, time.time() + self.ttl_s)
+
+            for chunk_id in chunk_ids:
+                self._by_chunk.setdefault(chunk_id, set()).add(slot)
+            for doc_id in doc_ids:
+                self._by_doc.setdefault(doc_id, set()).add(slot)
+
+    def invalidate(self, doc_ids: Optional[Set[str]] = None, chunk_ids: Optional[Set[str]] = None):
+        """
+        Drop entries built from any of `chunk_ids` / `doc_ids`;
+        everything when both are None.
+        """
+        with self._lock:
+            if doc_ids is None and chunk_ids is None:
+                for slot in list(self._entries):
+                    self._remove(slot)
+                return
+
+            stale = set()
+            for chunk_id in chunk_ids or ():
+                stale |= self._by_chunk.pop(chunk_id, set())
+            for doc_id in doc_ids or ():
+                stale |= self._by_doc.pop(doc_id, set())
+
+            for slot in stale:
+                if slot in self._entries:
+                    self._remove(slot)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_cache = SemanticAnswerCache(ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_S, ANSWER_CACHE_THRESHOLD)
+
+add_ingest_listener(_cache.invalidate)
+
+
+def _chunk_set(results: List[Dict]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    chunk_ids = frozenset(str(r["chunk_id"]) for r in results)
+    doc_ids = frozenset(str(r["doc_id"]) for r in results if r.get("doc_id"))
+    return chunk_ids, doc_ids
+
+
+def get_cached_answer(query_text: str, results: List[Dict], scope: str) -> Optional[Dict]:
+    """
+    Cached {"answer", "cost_info", "similarity"} for a paraphrase of
+    `query_text` that retrieved the same chunks, or None.
+
+    The question embedding comes from the embedding cache, so this does
+    not re-run the model after rag_search().
+    """
+    if not ANSWER_CACHE_ENABLED or not results:
+        return None
+
+    chunk_ids, _ = _chunk_set(results)
+    hit = _cache.get(embed_text(query_text), scope, chunk_ids)
+
+    if hit is None:
+        incr("answer_cache.misses")
+        return None
+
+    incr("answer_cache.hits")
+    value, similarity = hit
+    return {**value, "similarity": round(similarity, 4)}
+
+
+def cache_answer(query_text: str, results: List[Dict], scope: str, answer: str, cost_info: Dict):
+    if not ANSWER_CACHE_ENABLED or not results:
+        return
+
+    # The LLM helpers return a fallback message with zero tokens when
+    # generation fails; never serve that again.
+    if not cost_info.get("input_tokens"):
+        return
+
+    chunk_ids, doc_ids = _chunk_set(results)
+    _cache.put(embed_text(query_text), scope, chunk_ids, doc_ids, {"answer": answer, "cost_info": cost_info})
@@ -0,0 +1,59 @@
+import re
+import hashlib
+from collections import Counter
+from typing import List
+
+from qdrant_client.http import models as qmodels
+
+from app.core.config import BM25_K1, BM25_B, BM25_AVG_DOC_LEN
+
+
+SPARSE_VECTOR_NAME = "bm25"
+
+# Words joined by - _ . / stay one token as well ("ab-1234", "v2.1"),
+# so part numbers and versions match exactly.
+_TOKEN_RE = re.compile(r"\w+(?:[-_./]\w+)*")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or "
+    "that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in _TOKEN_RE.findall((text or "").lower()):
+        parts = re.split(r"[-_./]", match)
+        if len(parts) > 1:
+            tokens.append(match)
+        tokens.extend(p for p in parts if p and p not in _STOPWORDS)
+    return tokens
+
+
+def _term_id(token: str) -> int:
+    # Stable across processes (unlike hash()); 32-bit sparse index space.
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def document_vector(text: str) -> qmodels.SparseVector:
+    """
+    BM25 term weights for a stored chunk: saturated, length-normalized
+    term frequency. The collection's IDF modifier supplies the IDF.
+    """
+    tokens = tokenize(text)
+    length_norm = 1 - BM25_B + BM25_B * len(tokens) / BM25_AVG_DOC_LEN
+
+    weights = {}
+    for token, tf in Counter(tokens).items():
+        term = _term_id(token)
+        weights[term] = weights.get(term, 0.0) + tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+    return qmodels.SparseVector(indices=list(weights), values=list(weights.values()))
+
+
+def query_vector(text: str) -> qmodels.SparseVector:
+    """
+    One unit weight per distinct query term.
+    """
+    terms = sorted({_term_id(t) for t in tokenize(text)})
+    return qmodels.SparseVector(indices=terms, values=[1.0] * len(terms))
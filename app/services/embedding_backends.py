@@ -0,0 +1,91 @@
+import os
+from typing import Callable, Dict
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.core.config import EMBEDDING_MODEL_NAME, EMBEDDING_ONNX_FILE
+
+
+def load_torch_model(model_name: str = EMBEDDING_MODEL_NAME) -> SentenceTransformer:
+    """
+    Reference fp32 PyTorch model.
+    """
+    return SentenceTransformer(
+        model_name,
+        trust_remote_code=True
+    )
+
+
+def load_onnx_model(
+    model_name: str = EMBEDDING_MODEL_NAME,
+    file_name: str = EMBEDDING_ONNX_FILE,
+) -> SentenceTransformer:
+    """
+    Same model served by ONNX Runtime on CPU.
+
+    `file_name` points at the exported graph inside the model repo or
+    local directory, e.g. the int8 "onnx/model_quantized.onnx".
+    Needs `optimum[onnxruntime]` (requirements-optional.txt).
+    """
+    return SentenceTransformer(
+        model_name,
+        trust_remote_code=True,
+        backend="onnx",
+        model_kwargs={
+            "file_name": file_name,
+            "provider": "CPUExecutionProvider",
+        },
+    )
+
+
+def matryoshka_truncate(vectors: np.ndarray, dim: int) -> np.ndarray:
+    """
+    Shrink full-size embeddings to their first `dim` components.
+
+    Follows the nomic-embed recipe: layer-norm the full vector, keep the
+    leading `dim` values, then L2-normalize so cosine scores stay comparable.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dim >= vectors.shape[-1]:
+        return vectors
+
+    mean = vectors.mean(axis=-1, keepdims=True)
+    var = vectors.var(axis=-1, keepdims=True)
+    normed = (vectors - mean) / np.sqrt(var + 1e-5)
+
+    truncated = normed[..., :dim]
+    norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+    return truncated / np.maximum(norms, 1e-12)
+
+
+BACKENDS: Dict[str, Callable[[], SentenceTransformer]] = {
+    "torch": load_torch_model,
+    "onnx": load_onnx_model,
+}
+
+
+def load_backend(name: str) -> SentenceTransformer:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {name} (expected one of {list(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+def export_int8_onnx(output_dir: str, model_name: str = EMBEDDING_MODEL_NAME, config: str = "avx512_vnni") -> str:
+    """
+    Export the model to ONNX and apply dynamic int8 quantization.
+
+    `config` is the ONNX Runtime quantization target: "arm64", "avx2",
+    "avx512" or "avx512_vnni". Returns the directory to use as
+    EMBEDDING_MODEL_NAME, with EMBEDDING_ONNX_FILE set to the printed file.
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    model = SentenceTransformer(model_name, trust_remote_code=True, backend="onnx")
+    model.save_pretrained(output_dir)
+
+    export_dynamic_quantized_onnx_model(model, config, output_dir)
+
+    quantized = os.path.join("onnx", f"model_qint8_{config}.onnx")
+    print(f"[EMBED ONNX] Exported {model_name} → {os.path.join(output_dir, quantized)}")
+    return output_dir
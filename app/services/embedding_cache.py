@@ -0,0 +1,280 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.metrics import incr
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """
+    Content hash of (model name, normalized text).
+    Whitespace is collapsed so re-chunked copies of the same text match.
+    """
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"{model_name}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+class _DiskTier:
+    """
+    Embeddings stored in a memory-mapped float32 matrix.
+
+    Files inside `cache_dir`:
+    - vectors.f32  : (capacity, dim) float32 rows
+    - index.log    : append-only "key row" lines, replayed on start
+    - meta.json    : {"dim": ..., "capacity": ...}
+
+    Rows are reused in ring order once `capacity` is reached, so the
+    oldest written entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: str, capacity: int):
+        self.cache_dir = cache_dir
+        self.capacity = capacity
+        self.dim = None
+        self.next_row = 0
+        self.key_to_row: Dict[str, int] = {}
+        self.row_to_key: Dict[int, str] = {}
+        self._vectors = None
+        self._log = None
+        self._log_lines = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.cache_dir, "meta.json")
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.cache_dir, "vectors.f32")
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "index.log")
+
+    def _load(self):
+        if not os.path.exists(self._meta_path):
+            return
+
+        try:
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if meta.get("capacity") != self.capacity or not os.path.exists(self._vectors_path):
+            # Different layout: start from an empty cache.
+            return
+
+        self._open(meta["dim"])
+
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) != 2:
+                        continue
+                    row = int(parts[1])
+                    self._assign(parts[0], row)
+                    self.next_row = (row + 1) % self.capacity
+                    self._log_lines += 1
+
+        print(f"[EMBED CACHE] Loaded {len(self.key_to_row)} vectors from {self.cache_dir}")
+
+    def _open(self, dim: int):
+        self.dim = dim
+        mode = "r+" if os.path.exists(self._vectors_path) else "w+"
+        self._vectors = np.memmap(
+            self._vectors_path,
+            dtype=np.float32,
+            mode=mode,
+            shape=(self.capacity, dim),
+        )
+
+        with open(self._meta_path, "w") as f:
+            json.dump({"dim": dim, "capacity": self.capacity}, f)
+
+        self._log = open(self._index_path, "a")
+
+    def _reset(self, dim: int):
+        if self._log is not None:
+            self._log.close()
+        self._vectors = None
+
+        for path in (self._vectors_path, self._index_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+        self.key_to_row.clear()
+        self.row_to_key.clear()
+        self.next_row = 0
+        self._log_lines = 0
+        self._open(dim)
+
+    def _assign(self, key: str, row: int):
+        old_key = self.row_to_key.get(row)
+        if old_key is not None and old_key != key:
+            self.key_to_row.pop(old_key, None)
+
+        old_row = self.key_to_row.get(key)
+        if old_row is not None and old_row != row:
+            self.row_to_key.pop(old_row, None)
+
+        self.key_to_row[key] = row
+        self.row_to_key[row] = key
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self.key_to_row.get(key)
+        if row is None:
+            return None
+        return np.array(self._vectors[row])
+
+    def put(self, key: str, vector: np.ndarray):
+        if self._vectors is None or vector.shape[0] != self.dim:
+            self._reset(vector.shape[0])
+
+        if key in self.key_to_row:
+            return
+
+        row = self.next_row
+        self._vectors[row] = vector
+        self._assign(key, row)
+        self.next_row = (row + 1) % self.capacity
+
+        self._log.write(f"{key} {row}\n")
+        self._log_lines += 1
+
+        if self._log_lines > 2 * self.capacity:
+            self._compact()
+
+    def _compact(self):
+        self._log.close()
+        tmp_path = self._index_path + ".tmp"
+
+        with open(tmp_path, "w") as f:
+            # Write in ring order so replay restores next_row correctly.
+            rows = sorted(self.row_to_key, key=lambda r: (r - self.next_row) % self.capacity)
+            for row in rows:
+                f.write(f"{self.row_to_key[row]} {row}\n")
+
+        os.replace(tmp_path, self._index_path)
+        self._log_lines = len(self.row_to_key)
+        self._log = open(self._index_path, "a")
+
+    def flush(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._log.flush()
+
+    def __len__(self):
+        return len(self.key_to_row)
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache.
+
+    - memory: LRU of the most recently used vectors
+    - disk:   memory-mapped float32 matrix that survives restarts
+
+    Hits and misses are reported through app.core.metrics.
+    """
+
+    def __init__(self, memory_entries: int, cache_dir: Optional[str] = None, disk_entries: int = 0):
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Separate, so a long disk write (ingest) never holds up memory hits.
+        self._disk_lock = threading.Lock()
+
+        self._disk = None
+        if cache_dir and disk_entries > 0:
+            try:
+                self._disk = _DiskTier(cache_dir, disk_entries)
+            except OSError as e:
+                print(f"[EMBED CACHE] Disk tier disabled → {e}")
+
+    @property
+    def has_disk(self) -> bool:
+        return self._disk is not None
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str], disk: bool = True) -> List[Optional[List[float]]]:
+        """
+        Cached vectors (None for misses). With disk=False only the memory
+        tier is checked, which never waits on disk I/O; its misses are
+        then left for a later get_many() to count.
+        """
+        found: List[Optional[np.ndarray]] = [None] * len(keys)
+        pending = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    incr("embedding_cache.memory_hits")
+                    found[i] = vector
+                else:
+                    pending.append(i)
+
+        if pending and disk and self._disk is not None:
+            with self._disk_lock:
+                from_disk = {i: self._disk.get(keys[i]) for i in pending}
+
+            with self._lock:
+                for i, vector in from_disk.items():
+                    if vector is not None:
+                        self._remember(keys[i], vector)
+                        incr("embedding_cache.disk_hits")
+                        found[i] = vector
+                        pending.remove(i)
+
+        if disk or self._disk is None:
+            for _ in pending:
+                incr("embedding_cache.misses")
+
+        return [vector.tolist() if vector is not None else None for vector in found]
+
+    def put_many(self, keys: List[str], vectors: List[List[float]], disk: bool = True):
+        """
+        Store vectors in memory and, unless disk=False, on disk
+        (see put_disk()).
+        """
+        arrays = [np.asarray(vector, dtype=np.float32) for vector in vectors]
+
+        with self._lock:
+            for key, arr in zip(keys, arrays):
+                self._remember(key, arr)
+
+        if disk:
+            self.put_disk(keys, arrays)
+
+    def put_disk(self, keys: List[str], vectors: List[List[float]]):
+        """
+        Write vectors to the disk tier and flush it; blocking file I/O.
+        """
+        if self._disk is None:
+            return
+
+        with self._disk_lock:
+            for key, vector in zip(keys, vectors):
+                self._disk.put(key, np.asarray(vector, dtype=np.float32))
+            self._disk.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk) if self._disk is not None else 0,
+        }
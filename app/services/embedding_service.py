@@ -1,17 +1,270 @@
-from sentence_transformers import SentenceTransformer
+import queue
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
 from typing import List
 
-_embedding_model = SentenceTransformer(
-    "nomic-ai/nomic-embed-text-v1",
-    trust_remote_code=True
+from app.core.config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    EMBEDDING_DIM,
+    EMBED_WORKERS_ENABLED,
+    EMBED_BATCH_SIZE,
+    EMBED_MICROBATCH_ENABLED,
+    EMBED_MICROBATCH_MAX_WAIT_MS,
+    EMBED_MICROBATCH_MAX_SIZE,
+    EMBED_CACHE_ENABLED,
+    EMBED_CACHE_MEMORY_ENTRIES,
+    EMBED_CACHE_DIR,
+    EMBED_CACHE_DISK_ENTRIES,
 )
+from app.services.embedding_cache import EmbeddingCache, cache_key
+from app.services.embedding_backends import load_backend, matryoshka_truncate
+from app.services import model_registry
+from app.core.executors import run_cpu, run_io
+
+# Vectors from different backends or dimensions differ, so both are part
+# of the cache key.
+_MODEL_TAG = f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}:{EMBEDDING_DIM}"
+
+
+def _load_embedding_model():
+    if EMBED_WORKERS_ENABLED:
+        from app.services.embedding_workers import EmbeddingWorkerClient
+        return EmbeddingWorkerClient()
+
+    return load_backend(EMBEDDING_BACKEND)
+
+
+model_registry.register("embedding_model", _load_embedding_model)
+
+_cache = (
+    EmbeddingCache(
+        memory_entries=EMBED_CACHE_MEMORY_ENTRIES,
+        cache_dir=EMBED_CACHE_DIR or None,
+        disk_entries=EMBED_CACHE_DISK_ENTRIES,
+    )
+    if EMBED_CACHE_ENABLED
+    else None
+)
+
+
+def _fallback_vector() -> List[float]:
+    return [0.0] * EMBEDDING_DIM
+
+
+def _token_lengths(texts: List[str]) -> List[int]:
+    """
+    Token count of each text, used to group inputs of similar length
+    so a batch is not padded up to one long outlier.
+    """
+    tokenizer = getattr(model_registry.get("embedding_model"), "tokenizer", None)
+    if tokenizer is None:
+        return [len(t.split()) for t in texts]
+
+    encoded = tokenizer(texts, add_special_tokens=True, truncation=False)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def _encode(texts: List[str], batch_size: int) -> List[List[float]]:
+    vectors = model_registry.get("embedding_model").encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return matryoshka_truncate(vectors, EMBEDDING_DIM).tolist()
+
+
+def _encode_by_length(texts: List[str], batch_size: int) -> List[List[float]]:
+    """
+    Encode non-empty texts sorted by token length, in batches of
+    `batch_size`, and return vectors in the original order.
+    """
+    vectors: List[List[float]] = [None] * len(texts)
+
+    lengths = _token_lengths(texts)
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        batch_vectors = _encode([texts[i] for i in batch_idx], batch_size)
+
+        for i, vector in zip(batch_idx, batch_vectors):
+            vectors[i] = vector
+
+    return vectors
+
+
+def embed_texts(texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+    """
+    Embed many texts at once.
+
+    Cached vectors are reused; the remaining unique texts are sorted by
+    token length, encoded in batches of `batch_size`, and returned in the
+    original order. Empty strings get the fallback vector, like embed_text().
+    """
+    vectors: List[List[float]] = [
+        None if t and t.strip() else _fallback_vector()
+        for t in texts
+    ]
+
+    todo = [i for i, v in enumerate(vectors) if v is None]
+    if not todo:
+        return vectors
+
+    keys = {i: cache_key(_MODEL_TAG, texts[i]) for i in todo}
+
+    if _cache is not None:
+        for i, vector in zip(todo, _cache.get_many([keys[i] for i in todo])):
+            vectors[i] = vector
+
+    # Encode each distinct missing text once.
+    missing: dict = {}
+    for i in todo:
+        if vectors[i] is None:
+            missing.setdefault(keys[i], []).append(i)
+
+    if not missing:
+        return vectors
+
+    miss_keys = list(missing)
+    miss_texts = [texts[missing[k][0]] for k in miss_keys]
+    miss_vectors = _encode_by_length(miss_texts, batch_size)
+
+    if _cache is not None:
+        _cache.put_many(miss_keys, miss_vectors)
+
+    for key, vector in zip(miss_keys, miss_vectors):
+        for i in missing[key]:
+            vectors[i] = vector
+
+    return vectors
+
+
+class _MicroBatcher:
+    """
+    Background thread that merges concurrent embed_text() calls.
+
+    The first request starts a window of `max_wait_ms`; anything that
+    arrives inside it (up to `max_size` texts) is encoded in the same
+    forward pass.
+    """
+
+    def __init__(self, max_wait_ms: float, max_size: int):
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_size = max_size
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="embedding-microbatcher",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+
+            while len(batch) < self.max_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            texts = [t for t, _ in batch]
+
+            try:
+                vectors = _encode_by_length(texts, batch_size=len(texts))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+_batcher = _MicroBatcher(EMBED_MICROBATCH_MAX_WAIT_MS, EMBED_MICROBATCH_MAX_SIZE)
+
 
 def embed_text(text: str) -> List[float]:
     """
     Create an embedding vector using Nomic embed text model.
+
+    Served from the embedding cache when possible. On a miss with the
+    micro-batcher enabled, concurrent callers (e.g. several rag_search
+    requests) share one encode() call.
+    """
+    if not text or not text.strip():
+        return _fallback_vector()
+
+    key = cache_key(_MODEL_TAG, text)
+
+    if _cache is not None:
+        cached = _cache.get_many([key])[0]
+        if cached is not None:
+            return cached
+
+    if EMBED_MICROBATCH_ENABLED:
+        vector = _batcher.submit(text).result()
+    else:
+        vector = _encode([text], 1)[0]
+
+    if _cache is not None:
+        _cache.put_many([key], [vector])
+
+    return vector
+
+
+async def aembed_text(text: str) -> List[float]:
     """
+    embed_text() for async callers. With the micro-batcher on, a cache
+    miss awaits the batcher's future on the event loop instead of
+    parking a thread on it; otherwise the encode runs on the CPU pool.
+    Only the memory tier of the cache is touched on the loop; disk-tier
+    reads and writes go through the I/O pool.
+    """
+    if not EMBED_MICROBATCH_ENABLED:
+        return await run_cpu(embed_text, text)
+
     if not text or not text.strip():
-        return [0.0] * 768  # fallback vector
+        return _fallback_vector()
+
+    key = cache_key(_MODEL_TAG, text)
+
+    if _cache is not None:
+        cached = _cache.get_many([key], disk=False)[0]
+        if cached is None and _cache.has_disk:
+            cached = (await run_io(_cache.get_many, [key]))[0]
+        if cached is not None:
+            return cached
+
+    vector = await asyncio.wrap_future(_batcher.submit(text))
+
+    if _cache is not None:
+        _cache.put_many([key], [vector], disk=False)
+        if _cache.has_disk:
+            await run_io(_cache.put_disk, [key], [vector])
 
-    vector = _embedding_model.encode(text, convert_to_numpy=True).tolist()
     return vector
@@ -0,0 +1,288 @@
+"""
+Out-of-process embedding workers.
+
+Run next to the API on the same host:
+
+    python -m app.services.embedding_workers
+
+This starts EMBED_WORKERS processes, each holding one copy of the
+embedding model, behind a bounded task queue. API processes started with
+EMBED_WORKERS_ENABLED=true connect to EMBED_WORKER_ADDRESS, send texts,
+and read the vectors back from a shared-memory block, so model RAM does
+not grow with the number of uvicorn workers.
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.core.config import (
+    EMBEDDING_BACKEND,
+    EMBED_WORKERS,
+    EMBED_WORKER_THREADS,
+    EMBED_WORKER_QUEUE_SIZE,
+    EMBED_WORKER_ADDRESS,
+    EMBED_WORKER_AUTHKEY,
+    EMBED_WORKER_TIMEOUT_S,
+)
+
+
+def _parse_address(address: str):
+    """
+    "/path/to.sock" → unix socket, "host:port" → TCP.
+    """
+    if address.startswith("/") or ":" not in address:
+        return address
+
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def _release(name: str):
+    try:
+        shm = SharedMemory(name=name)
+        shm.close()
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+# ------------------------------------------------------------
+# Worker processes
+# ------------------------------------------------------------
+def _worker_main(backend: str, threads: int, tasks, results):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    from app.services.embedding_backends import load_backend
+
+    model = load_backend(backend)
+    print(f"[EMBED WORKER {os.getpid()}] {backend} model loaded")
+
+    while True:
+        item = tasks.get()
+        if item is None:
+            return
+
+        task_id, texts, batch_size = item
+
+        try:
+            vectors = np.asarray(
+                model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False),
+                dtype=np.float32,
+            )
+
+            shm = SharedMemory(create=True, size=max(vectors.nbytes, 1))
+            # The API process unlinks the block after copying it out.
+            resource_tracker.unregister(shm._name, "shared_memory")
+
+            np.ndarray(vectors.shape, dtype=np.float32, buffer=shm.buf)[:] = vectors
+            results.put((task_id, shm.name, vectors.shape, None))
+            shm.close()
+
+        except Exception as e:
+            results.put((task_id, None, None, str(e)))
+
+
+class EmbeddingWorkerPool:
+    """
+    Fixed set of embedding processes fed from one bounded queue.
+    submit() fails fast with RuntimeError when the queue is full.
+    """
+
+    def __init__(
+        self,
+        workers: int = EMBED_WORKERS,
+        queue_size: int = EMBED_WORKER_QUEUE_SIZE,
+        backend: str = EMBEDDING_BACKEND,
+        threads: int = EMBED_WORKER_THREADS,
+    ):
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue(maxsize=queue_size)
+        self._results = ctx.Queue()
+        self._ids = itertools.count()
+        self._pending: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+        self._procs = [
+            ctx.Process(
+                target=_worker_main,
+                args=(backend, threads, self._tasks, self._results),
+                name=f"embed-worker-{i}",
+                daemon=True,
+            )
+            for i in range(workers)
+        ]
+        for p in self._procs:
+            p.start()
+
+        threading.Thread(target=self._dispatch, name="embed-dispatch", daemon=True).start()
+
+    def _dispatch(self):
+        while True:
+            task_id, name, shape, error = self._results.get()
+
+            with self._lock:
+                slot = self._pending.pop(task_id, None)
+
+            if slot is None:
+                # Caller already gave up; nobody will unlink the block.
+                if name:
+                    _release(name)
+                continue
+
+            slot["result"] = (name, shape, error)
+            slot["event"].set()
+
+    def submit(self, texts: List[str], batch_size: int, timeout: float = EMBED_WORKER_TIMEOUT_S) -> Tuple[str, tuple]:
+        task_id = next(self._ids)
+        slot = {"event": threading.Event(), "result": None}
+
+        with self._lock:
+            self._pending[task_id] = slot
+
+        try:
+            self._tasks.put((task_id, texts, batch_size), timeout=0.1)
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(task_id, None)
+            raise RuntimeError("Embedding worker queue is full")
+
+        if not slot["event"].wait(timeout):
+            with self._lock:
+                self._pending.pop(task_id, None)
+            raise TimeoutError(f"Embedding workers did not answer within {timeout}s")
+
+        name, shape, error = slot["result"]
+        if error:
+            raise RuntimeError(error)
+
+        return name, shape
+
+    def shutdown(self):
+        for _ in self._procs:
+            self._tasks.put(None)
+        for p in self._procs:
+            p.join(timeout=5)
+
+
+def _handle_connection(pool: EmbeddingWorkerPool, conn):
+    with conn:
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, OSError):
+                return
+
+            try:
+                name, shape = pool.submit(request["texts"], request.get("batch_size", 32))
+            except Exception as e:
+                conn.send({"error": str(e)})
+                continue
+
+            try:
+                conn.send({"shm": name, "shape": shape})
+            except OSError:
+                _release(name)
+                return
+
+
+def serve(address: str = EMBED_WORKER_ADDRESS):
+    pool = EmbeddingWorkerPool()
+    parsed = _parse_address(address)
+
+    if isinstance(parsed, str) and os.path.exists(parsed):
+        os.remove(parsed)
+
+    listener = Listener(parsed, authkey=EMBED_WORKER_AUTHKEY)
+    print(f"[EMBED WORKERS] {len(pool._procs)} workers listening on {address}")
+
+    try:
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle_connection, args=(pool, conn), daemon=True).start()
+    finally:
+        listener.close()
+        pool.shutdown()
+
+
+# ------------------------------------------------------------
+# API-side client
+# ------------------------------------------------------------
+class EmbeddingWorkerClient:
+    """
+    Drop-in for SentenceTransformer.encode() backed by the worker pool.
+    Keeps one connection per calling thread.
+    """
+
+    tokenizer = None
+
+    def __init__(
+        self,
+        address: str = EMBED_WORKER_ADDRESS,
+        authkey: bytes = EMBED_WORKER_AUTHKEY,
+        timeout: float = EMBED_WORKER_TIMEOUT_S,
+    ):
+        self.address = _parse_address(address)
+        self.authkey = authkey
+        self.timeout = timeout
+        self._local = threading.local()
+
+        # Fail at warmup, not on the first request, if the pool is down.
+        self._connection()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True, show_progress_bar: bool = False):
+        single = isinstance(texts, str)
+        conn = self._connection()
+
+        try:
+            conn.send({"texts": [texts] if single else list(texts), "batch_size": batch_size})
+
+            if not conn.poll(self.timeout):
+                self._drop_connection()
+                raise TimeoutError(f"Embedding workers did not answer within {self.timeout}s")
+
+            reply = conn.recv()
+        except (EOFError, OSError):
+            self._drop_connection()
+            raise
+
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+
+        shm = SharedMemory(name=reply["shm"])
+        try:
+            vectors = np.ndarray(reply["shape"], dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return vectors[0] if single else vectors
+
+
+if __name__ == "__main__":
+    serve()
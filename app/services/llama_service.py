@@ -1,10 +1,38 @@
 import ollama
 from app.utils.latency import measure_latency
 from app.eval.cost_metrics import estimate_cost
+from app.services.ollama_client import (
+    FALLBACK_ANSWER,
+    astream_generate,
+    fallback_cost,
+    get_async_client,
+    record_prefill,
+    stream_generate,
+)
 
 
 LLAMA_MODEL_NAME = "llama3.1"  
 
+def _fallback():
+    return FALLBACK_ANSWER, fallback_cost(LLAMA_MODEL_NAME)
+
+
+def _cost(prompt: str, answer: str):
+    return estimate_cost(
+        model=LLAMA_MODEL_NAME,
+        input_tokens=len(prompt.split()),
+        output_tokens=len(answer.split())
+    )
+
+
+def _finish(prompt: str, result):
+    record_prefill(result)
+
+    answer = result.get("response", "").strip()
+    clean = " ".join(answer.split())  
+
+    return clean, _cost(prompt, clean)
+
 
 @measure_latency("LLaMA Inference")
 def run_llama(prompt: str):
@@ -24,31 +52,48 @@ def run_llama(prompt: str):
             stream=False
         )
 
-        answer = result.get("response", "").strip()
+        return _finish(prompt, result)
 
-        clean = " ".join(answer.split())  
 
-    
-        input_tokens = len(prompt.split())
-        output_tokens = len(clean.split())
+    except Exception as e:
+        print(f"[LLaMA SDK Error] {e}")
+        return _fallback()
 
-        cost_info = estimate_cost(
+
+@measure_latency("LLaMA Inference (async)")
+async def arun_llama(prompt: str):
+    """
+    run_llama() on the async Ollama client; the event loop stays free
+    while the model generates.
+    """
+    try:
+        result = await get_async_client().generate(
             model=LLAMA_MODEL_NAME,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens
+            prompt=prompt,
+            stream=False
         )
-
-        return clean, cost_info
-
+        return _finish(prompt, result)
 
     except Exception as e:
         print(f"[LLaMA SDK Error] {e}")
+        return _fallback()
 
-        return (
-            "Sorry, the model could not generate an answer right now.",
-            {
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "estimated_cost_usd": 0.0
-            }
-        )
+
+def _request(prompt: str):
+    return {"model": LLAMA_MODEL_NAME, "prompt": prompt}
+
+
+def stream_llama(prompt: str):
+    """
+    Streaming run_llama(): yields (token, None) as Ollama produces them,
+    then ("", cost_info) once generation is finished (see
+    ollama_client.astream_generate()).
+    """
+    return stream_generate(_request(prompt), lambda final, answer, ttft_ms: _cost(prompt, answer), "LLaMA SDK Error")
+
+
+def astream_llama(prompt: str):
+    """
+    Async stream_llama(), same (token, cost_info) protocol.
+    """
+    return astream_generate(_request(prompt), lambda final, answer, ttft_ms: _cost(prompt, answer), "LLaMA SDK Error")
@@ -0,0 +1,61 @@
+import re
+
+from app.core.config import LLAMA_TOKENIZER_NAME
+from app.services import model_registry
+
+
+# Rough stand-in for BPE tokens when the real tokenizer is unavailable.
+_FALLBACK_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Registry value meaning "no tokenizer, estimate with the regex".
+_ESTIMATE = "estimate"
+
+
+def _load_tokenizer():
+    """
+    Llama tokenizer (a download on a cold start). When it is not
+    available this still counts as loaded, with token estimates, so it
+    never holds back /health/ready.
+    """
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(LLAMA_TOKENIZER_NAME)
+    except Exception as e:
+        print(f"[TOKENIZER] {LLAMA_TOKENIZER_NAME} unavailable, estimating tokens → {e}")
+        return _ESTIMATE
+
+
+# Loaded by the startup warmup, before the first /query needs it.
+model_registry.register("llama_tokenizer", _load_tokenizer)
+
+
+def _get_tokenizer():
+    tokenizer = model_registry.get("llama_tokenizer")
+    return None if tokenizer is _ESTIMATE else tokenizer
+
+
+def count_tokens(text: str) -> int:
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return len(_FALLBACK_TOKEN_RE.findall(text))
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Longest prefix of `text` that is at most `max_tokens` tokens.
+    """
+    if max_tokens <= 0:
+        return ""
+
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        matches = list(_FALLBACK_TOKEN_RE.finditer(text))
+        if len(matches) <= max_tokens:
+            return text
+        return text[:matches[max_tokens - 1].end()]
+
+    ids = tokenizer.encode(text, add_special_tokens=False)
+    if len(ids) <= max_tokens:
+        return text
+    return tokenizer.decode(ids[:max_tokens])
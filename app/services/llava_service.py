@@ -1,9 +1,27 @@
+import asyncio
+import weakref
+
 import ollama
 from app.utils.latency import measure_latency
+from app.core.config import LLAVA_MAX_CONCURRENCY
+from app.core.executors import run_io
+from app.services.ollama_client import get_async_client
 
 
 LLAVA_MODEL = "llava:7b"   
 
+# Async captions in flight at once across the process (per event loop),
+# so a long video cannot flood Ollama ahead of /query generations.
+_caption_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _caption_slots.get(loop)
+    if slots is None:
+        slots = _caption_slots[loop] = asyncio.Semaphore(LLAVA_MAX_CONCURRENCY)
+    return slots
+
 
 @measure_latency("LLaVA Captioning")
 def run_llava_caption(image_path: str) -> str:
@@ -31,6 +49,37 @@ def run_llava_caption(image_path: str) -> str:
         return ""
 
 
+@measure_latency("LLaVA Captioning (async)")
+async def arun_llava_caption(image_path: str) -> str:
+    """
+    run_llava_caption() on the async Ollama client; at most
+    LLAVA_MAX_CONCURRENCY calls run at once, the rest wait their turn.
+    """
+
+    try:
+        image_bytes = await run_io(_read_bytes, image_path)
+
+        async with _slots():
+            result = await get_async_client().generate(
+                model=LLAVA_MODEL,
+                prompt="Describe this image in one clear and accurate sentence.",
+                images=[image_bytes],
+                stream=False
+            )
+
+        caption = result.get("response", "").strip()
+        return caption if caption else ""
+
+    except Exception as e:
+        print(f"[LLaVA Error] {e}")
+        return ""
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
 @measure_latency("LLaVA VQA")
 def run_llava_vqa(image_path: str, question: str) -> str:
     """
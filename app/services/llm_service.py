@@ -1,10 +1,35 @@
 import ollama
 from app.utils.latency import measure_latency
 from app.eval.cost_metrics import estimate_cost
+from app.services.ollama_client import (
+    FALLBACK_ANSWER,
+    astream_generate,
+    fallback_cost,
+    get_async_client,
+    record_prefill,
+)
 
 
 LLAMA_MODEL_NAME = "llama3.1"  
 
+def _fallback():
+    return FALLBACK_ANSWER, fallback_cost(LLAMA_MODEL_NAME)
+
+
+def _cost(prompt: str, answer: str):
+    return estimate_cost(
+        model=LLAMA_MODEL_NAME,
+        input_tokens=len(prompt.split()),
+        output_tokens=len(answer.split())
+    )
+
+
+def _finish(prompt: str, result):
+    record_prefill(result)
+
+    answer = result.get("response", "").strip()
+    return answer, _cost(prompt, answer)
+
 
 @measure_latency("LLaMA RAG Inference")
 def run_llama_rag(prompt: str):
@@ -22,27 +47,39 @@ def run_llama_rag(prompt: str):
             stream=False
         )
 
-        answer = result.get("response", "").strip()
+        return _finish(prompt, result)
 
-       
-        input_tokens = len(prompt.split())
-        output_tokens = len(answer.split())
+    except Exception as e:
+        print(f"[LLaMA RAG Error] {e}")
+        return _fallback()
 
-        cost_info = estimate_cost(
+
+@measure_latency("LLaMA RAG Inference (async)")
+async def arun_llama_rag(prompt: str):
+    """
+    run_llama_rag() on the async Ollama client.
+    """
+    try:
+        result = await get_async_client().generate(
             model=LLAMA_MODEL_NAME,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens
+            prompt=prompt,
+            stream=False
         )
-
-        return answer, cost_info
+        return _finish(prompt, result)
 
     except Exception as e:
         print(f"[LLaMA RAG Error] {e}")
-        return (
-            "Sorry, the model could not generate an answer right now.",
-            {
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost_usd": 0.0
-            }
-        )
+        return _fallback()
+
+
+def astream_llama_rag(prompt: str):
+    """
+    Streaming arun_llama_rag(): yields (token, None) as Ollama produces
+    them, then ("", cost_info) once generation is finished (see
+    ollama_client.astream_generate()).
+    """
+    return astream_generate(
+        {"model": LLAMA_MODEL_NAME, "prompt": prompt},
+        lambda final, answer, ttft_ms: _cost(prompt, answer),
+        "LLaMA RAG Error",
+    )
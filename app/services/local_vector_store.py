@@ -0,0 +1,349 @@
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from app.core.config import (
+    LOCAL_STORE_HNSW_THRESHOLD,
+    LOCAL_STORE_HNSW_M,
+    LOCAL_STORE_HNSW_EF_CONSTRUCTION,
+    LOCAL_STORE_HNSW_EF_SEARCH,
+)
+from app.services.qdrant_service import PAYLOAD_INDEX_FIELDS
+from app.services.vector_store import SearchHit, VectorStore
+
+try:
+    import hnswlib
+except ImportError:  # optional; brute force only
+    hnswlib = None
+
+
+_INITIAL_CAPACITY = 1024
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index for single-node installs, CI and offline
+    benchmarks.
+
+    Files inside `path`:
+    - vectors.f32    : (capacity, dim) float32 rows, L2-normalized
+    - payloads.jsonl : append-only {"row", "id", "payload"} lines,
+                       replayed on start (later lines win)
+    - meta.json      : {"dim": ...}
+
+    Search is cosine similarity. Up to `hnsw_threshold` vectors (and for
+    filtered queries with at most that many candidates) it is an exact
+    vectorized scan; above it an HNSW graph is built on first search
+    when hnswlib is installed. The graph lives in memory only and is
+    rebuilt after a restart.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dim: int,
+        hnsw_threshold: int = LOCAL_STORE_HNSW_THRESHOLD,
+    ):
+        self.path = path
+        self.dim = dim
+        self.hnsw_threshold = hnsw_threshold
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._capacity = 0
+        self._ids: List = []
+        self._payloads: List[Dict] = []
+        self._rows: Dict[str, int] = {}
+        # field -> value -> rows, for PAYLOAD_INDEX_FIELDS filters
+        self._field_rows: Dict[str, Dict[str, Set[int]]] = {f: {} for f in PAYLOAD_INDEX_FIELDS}
+        self._log = None
+        self._log_lines = 0
+        self._hnsw = None
+
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _payloads_path(self):
+        return os.path.join(self.path, "payloads.jsonl")
+
+    def _load(self):
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                stored_dim = json.load(f)["dim"]
+            if stored_dim != self.dim:
+                raise ValueError(
+                    f"{self.path} stores {stored_dim}-dim vectors but EMBEDDING_DIM={self.dim}; "
+                    f"use a new LOCAL_STORE_DIR or reindex."
+                )
+        else:
+            with open(self._meta_path, "w") as f:
+                json.dump({"dim": self.dim}, f)
+
+        if os.path.exists(self._vectors_path):
+            rows = os.path.getsize(self._vectors_path) // (4 * self.dim)
+            self._open(max(rows, _INITIAL_CAPACITY))
+        else:
+            self._open(_INITIAL_CAPACITY)
+
+        if os.path.exists(self._payloads_path):
+            with open(self._payloads_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    self._assign(entry["row"], entry["id"], entry["payload"])
+                    self._log_lines += 1
+
+        if self._log_lines > 2 * len(self._ids):
+            self._compact()
+
+        self._log = open(self._payloads_path, "a")
+        print(f"[LOCAL STORE] Loaded {len(self._ids)} vectors from {self.path}")
+
+    def _open(self, capacity: int):
+        """
+        (Re)map vectors.f32 with room for `capacity` rows, growing the
+        file if needed. Existing rows are kept.
+        """
+        if self._vectors is not None:
+            self._vectors.flush()
+
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(max(os.path.getsize(self._vectors_path), capacity * self.dim * 4))
+
+        self._vectors = np.memmap(
+            self._vectors_path,
+            dtype=np.float32,
+            mode="r+",
+            shape=(capacity, self.dim),
+        )
+        self._capacity = capacity
+
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+
+    def _assign(self, row: int, point_id, payload: Dict):
+        if row == len(self._ids):
+            self._ids.append(point_id)
+            self._payloads.append(payload)
+        else:
+            self._unindex(row)
+            self._ids[row] = point_id
+            self._payloads[row] = payload
+
+        self._rows[str(point_id)] = row
+
+        for field, rows_by_value in self._field_rows.items():
+            value = payload.get(field)
+            if value is not None:
+                rows_by_value.setdefault(str(value), set()).add(row)
+
+    def _unindex(self, row: int):
+        old = self._payloads[row]
+        for field, rows_by_value in self._field_rows.items():
+            value = old.get(field)
+            if value is not None:
+                rows_by_value.get(str(value), set()).discard(row)
+
+    def _compact(self):
+        tmp_path = self._payloads_path + ".tmp"
+
+        with open(tmp_path, "w") as f:
+            for row, (point_id, payload) in enumerate(zip(self._ids, self._payloads)):
+                f.write(json.dumps({"row": row, "id": point_id, "payload": payload}) + "\n")
+
+        os.replace(tmp_path, self._payloads_path)
+        self._log_lines = len(self._ids)
+
+    def upsert(self, points: List[Dict]) -> int:
+        if not points:
+            return 0
+
+        vectors = np.asarray([p["vector"] for p in points], dtype=np.float32)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}")
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            rows = []
+            new_rows: Dict[str, int] = {}
+            next_row = len(self._ids)
+            for p in points:
+                key = str(p["id"])
+                row = self._rows.get(key, new_rows.get(key))
+                if row is None:
+                    row = new_rows[key] = next_row
+                    next_row += 1
+                rows.append(row)
+
+            if next_row > self._capacity:
+                capacity = self._capacity
+                while capacity < next_row:
+                    capacity *= 2
+                self._open(capacity)
+
+            # Vectors first, then the sidecar: a row only becomes visible
+            # once its payload line is written.
+            self._vectors[rows] = vectors
+            self._vectors.flush()
+
+            for row, p in zip(rows, points):
+                self._assign(row, p["id"], p["payload"])
+                self._log.write(json.dumps({"row": row, "id": p["id"], "payload": p["payload"]}) + "\n")
+            self._log.flush()
+            self._log_lines += len(points)
+
+            if self._hnsw is not None:
+                self._hnsw.add_items(vectors, rows)
+
+            if self._log_lines > 2 * len(self._ids):
+                self._log.close()
+                self._compact()
+                self._log = open(self._payloads_path, "a")
+
+        return len(points)
+
+    def _candidates(self, filters: Optional[Dict[str, List[str]]]) -> Optional[np.ndarray]:
+        """
+        Rows matching `filters`, or None when there is nothing to filter.
+        """
+        if not filters:
+            return None
+
+        selected = None
+        for field, values in filters.items():
+            if field not in PAYLOAD_INDEX_FIELDS:
+                raise ValueError(f"Cannot filter on '{field}'; allowed: {list(PAYLOAD_INDEX_FIELDS)}")
+
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+
+            values = list(values)
+            if not values:
+                continue
+
+            rows = set()
+            for value in values:
+                rows |= self._field_rows[field].get(str(value), set())
+
+            selected = rows if selected is None else selected & rows
+
+        if selected is None:
+            return None
+        return np.fromiter(sorted(selected), dtype=np.int64, count=len(selected))
+
+    def _use_hnsw(self, size: int, candidates: Optional[np.ndarray]) -> bool:
+        if hnswlib is None or self.hnsw_threshold <= 0:
+            return False
+        if candidates is not None and len(candidates) <= self.hnsw_threshold:
+            return False
+        return size > self.hnsw_threshold
+
+    def _build_hnsw(self, size: int):
+        with self._lock:
+            if self._hnsw is not None:
+                return
+
+            print(f"[LOCAL STORE] Building HNSW graph over {size} vectors")
+            index = hnswlib.Index(space="ip", dim=self.dim)
+            index.init_index(
+                max_elements=self._capacity,
+                M=LOCAL_STORE_HNSW_M,
+                ef_construction=LOCAL_STORE_HNSW_EF_CONSTRUCTION,
+            )
+            size = len(self._ids)
+            index.add_items(np.asarray(self._vectors[:size]), np.arange(size))
+            self._hnsw = index
+
+    def _hit(self, row: int, score: float) -> SearchHit:
+        return SearchHit(self._ids[row], float(score), self._payloads[row])
+
+    def _brute_force(self, queries: np.ndarray, size: int, k: int, candidates) -> List[List[SearchHit]]:
+        rows = np.arange(size) if candidates is None else candidates[candidates < size]
+        if len(rows) == 0:
+            return [[] for _ in queries]
+
+        matrix = self._vectors[:size] if candidates is None else self._vectors[rows]
+        scores = queries @ matrix.T
+
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [self._hit(int(rows[i]), s) for i, s in zip(idx, sc)]
+            for idx, sc in zip(top, top_scores)
+        ]
+
+    def _hnsw_search(self, queries: np.ndarray, k: int, candidates) -> List[List[SearchHit]]:
+        if self._hnsw is None:
+            self._build_hnsw(len(self._ids))
+
+        allowed = None
+        if candidates is not None:
+            allowed = set(candidates.tolist())
+            k = min(k, len(allowed))
+
+        k = min(k, self._hnsw.get_current_count())
+        self._hnsw.set_ef(max(LOCAL_STORE_HNSW_EF_SEARCH, k))
+        labels, distances = self._hnsw.knn_query(
+            queries,
+            k=k,
+            filter=(lambda row: row in allowed) if allowed is not None else None,
+        )
+
+        # "ip" distance is 1 - dot product; vectors are normalized.
+        return [
+            [self._hit(int(row), 1.0 - d) for row, d in zip(lbl, dist)]
+            for lbl, dist in zip(labels, distances)
+        ]
+
+    def search_batch(self, vectors, top_k=5, filters=None) -> List[List[SearchHit]]:
+        queries = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        size = len(self._ids)
+        candidates = self._candidates(filters)
+
+        if size == 0 or top_k <= 0:
+            return [[] for _ in queries]
+
+        if self._use_hnsw(size, candidates):
+            return self._hnsw_search(queries, top_k, candidates)
+
+        return self._brute_force(queries, size, top_k, candidates)
+
+    def search(self, vector, top_k=5, filters=None) -> List[SearchHit]:
+        return self.search_batch([vector], top_k, filters)[0]
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def scroll(self, batch_size=256):
+        size = len(self._ids)
+        for start in range(0, size, batch_size):
+            end = min(start + batch_size, size)
+            vectors = np.array(self._vectors[start:end])
+            yield [
+                (self._ids[row], vectors[row - start].tolist(), self._payloads[row])
+                for row in range(start, end)
+            ]
@@ -0,0 +1,157 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from app.core.config import WARMUP_RETRY_INTERVAL_S
+from app.utils.latency import measure_latency
+
+
+# name -> loader; loaders are registered by the services that own them
+_loaders: Dict[str, Callable[[], Any]] = {}
+_warmup_loaders: Dict[str, Callable[[], Any]] = {}
+_instances: Dict[str, Any] = {}
+# name -> time of the last failed load
+_failed_at: Dict[str, float] = {}
+_load_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+_warmup = {
+    "status": "cold",        # cold | warming | ready | failed
+    "started_at": None,
+    "finished_at": None,
+    "loaded": [],
+    "errors": {},
+}
+
+
+def register(name: str, loader: Callable[[], Any], warmup_loader: Callable[[], Any] = None):
+    """
+    Register a lazily created shared resource (model, client, ...).
+    The loader runs at most once per process, on first get() or warmup.
+    A loader that returns None is treated as failed and retried later.
+
+    `warmup_loader`, if given, is used by the background warmup instead
+    of `loader` (e.g. one that retries while `loader` tries once).
+    """
+    with _registry_lock:
+        _loaders[name] = loader
+        _warmup_loaders[name] = warmup_loader or loader
+        _load_locks.setdefault(name, threading.Lock())
+
+
+def is_loaded(name: str) -> bool:
+    return name in _instances
+
+
+def _load(name: str, loader: Callable[[], Any]) -> Any:
+    # Caller holds _load_locks[name].
+    if name in _instances:
+        return _instances[name]
+
+    try:
+        instance = measure_latency(f"Load {name}")(loader)()
+    except Exception:
+        _failed_at[name] = time.time()
+        raise
+
+    if instance is None:
+        _failed_at[name] = time.time()
+        raise RuntimeError(f"{name} could not be initialized")
+
+    _failed_at.pop(name, None)
+    _instances[name] = instance
+    print(f"[REGISTRY] Loaded {name}")
+    return instance
+
+
+def get(name: str) -> Any:
+    """
+    Return the shared instance, loading it on first use.
+
+    Once a load has failed, requests do not wait on another attempt:
+    for WARMUP_RETRY_INTERVAL_S, or while the background warmup is
+    retrying, get() raises at once.
+    """
+    if name in _instances:
+        return _instances[name]
+
+    if name not in _loaders:
+        raise KeyError(f"Unknown resource: {name}")
+
+    lock = _load_locks[name]
+    failed_at = _failed_at.get(name)
+
+    if failed_at is None:
+        with lock:
+            return _load(name, _loaders[name])
+
+    if time.time() - failed_at < WARMUP_RETRY_INTERVAL_S or not lock.acquire(blocking=False):
+        raise RuntimeError(f"{name} is unavailable (last load failed {time.time() - failed_at:.0f}s ago)")
+    try:
+        return _load(name, _loaders[name])
+    finally:
+        lock.release()
+
+
+def _warm(names: List[str]):
+    for name in names:
+        try:
+            with _load_locks[name]:
+                _load(name, _warmup_loaders[name])
+            _warmup["loaded"].append(name)
+            _warmup["errors"].pop(name, None)
+        except Exception as e:
+            print(f"[REGISTRY] Warmup of {name} failed → {e}")
+            _warmup["errors"][name] = str(e)
+
+
+def _run_warmup(names: List[str]):
+    _warmup["status"] = "warming"
+    _warmup["started_at"] = time.time()
+
+    _warm(names)
+
+    _warmup["finished_at"] = time.time()
+    _warmup["status"] = "failed" if _warmup["errors"] else "ready"
+
+    # Keep retrying what failed, so a dependency that comes up late
+    # (e.g. Qdrant) is picked up here rather than on a request.
+    while _warmup["errors"]:
+        time.sleep(WARMUP_RETRY_INTERVAL_S)
+        _warm([name for name in names if name not in _instances])
+        if not _warmup["errors"]:
+            _warmup["finished_at"] = time.time()
+            _warmup["status"] = "ready"
+
+
+def start_warmup() -> threading.Thread:
+    """
+    Load every registered resource in a background thread so the
+    server can accept connections (and answer /health/ready) at once.
+    """
+    thread = threading.Thread(
+        target=_run_warmup,
+        args=(list(_loaders),),
+        name="model-warmup",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    return all(name in _instances for name in _loaders)
+
+
+def readiness() -> Dict:
+    return {
+        "ready": is_ready(),
+        "status": _warmup["status"],
+        "resources": {name: name in _instances for name in _loaders},
+        "errors": dict(_warmup["errors"]),
+        "warmup_seconds": (
+            round(_warmup["finished_at"] - _warmup["started_at"], 4)
+            if _warmup["finished_at"] and _warmup["started_at"]
+            else None
+        ),
+    }
@@ -0,0 +1,106 @@
+import asyncio
+from typing import Callable, Dict, Optional
+
+import ollama
+
+from app.core.metrics import observe, timer
+from app.eval.cost_metrics import estimate_cost
+
+
+FALLBACK_ANSWER = "Sorry, the model could not generate an answer right now."
+
+_async_client = None
+
+
+def get_async_client() -> ollama.AsyncClient:
+    """
+    Shared ollama.AsyncClient (OLLAMA_HOST is read by the SDK). One
+    client keeps one connection pool for the process's event loop.
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = ollama.AsyncClient()
+    return _async_client
+
+
+def record_prefill(result):
+    """Ollama reports prefill time; prompt compression uses the average."""
+    if result.get("prompt_eval_count") and result.get("prompt_eval_duration"):
+        observe("llm.prefill_ms_per_token", result["prompt_eval_duration"] / 1e6 / result["prompt_eval_count"])
+
+
+def fallback_cost(model: str) -> Dict:
+    """Zero-token cost of a failed generation; cache_answer() skips these."""
+    return estimate_cost(model=model, input_tokens=0, output_tokens=0)
+
+
+async def astream_generate(
+    request: Dict,
+    finish: Callable[[Dict, str, Optional[float]], Dict],
+    label: str,
+    client: Optional[ollama.AsyncClient] = None,
+):
+    """
+    Stream one Ollama generate() call (`request` holds its arguments).
+
+    Yields (token, None) as tokens arrive, then ("", cost_info) with
+    cost_info = finish(done_chunk, answer, ttft_ms). A call that fails
+    or ends without Ollama's done chunk is incomplete: FALLBACK_ANSWER
+    is yielded if nothing was streamed yet, and cost_info is
+    fallback_cost(), so the partial answer is never cached.
+    """
+    start = timer()
+    parts = []
+    ttft_ms = None
+    final = None
+
+    try:
+        async for chunk in await (client or get_async_client()).generate(**request, stream=True):
+            token = chunk.get("response", "")
+            if token:
+                if ttft_ms is None:
+                    ttft_ms = (timer() - start) * 1000
+                    observe("llm.ttft_ms", ttft_ms)
+                parts.append(token)
+                yield token, None
+
+            if chunk.get("done"):
+                final = chunk
+
+    except Exception as e:
+        print(f"[{label}] {e}")
+
+    if final is None:
+        if not parts:
+            yield FALLBACK_ANSWER, None
+        yield "", fallback_cost(request["model"])
+        return
+
+    record_prefill(final)
+    yield "", finish(final, "".join(parts).strip(), ttft_ms)
+
+
+def stream_generate(
+    request: Dict,
+    finish: Callable[[Dict, str, Optional[float]], Dict],
+    label: str,
+):
+    """
+    Blocking astream_generate() for worker threads (e.g. agents on the
+    I/O pool): runs it on a private event loop with its own client, as
+    the shared client belongs to the server's loop.
+    """
+    loop = asyncio.new_event_loop()
+    client = ollama.AsyncClient()
+    stream = astream_generate(request, finish, label, client)
+
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(stream.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(stream.aclose())
+        loop.run_until_complete(client.close())
+        loop.close()
@@ -0,0 +1,121 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import (
+    PROMPT_COMPRESSION_ENABLED,
+    PROMPT_COMPRESSION_RATIO,
+    PREFILL_MS_PER_TOKEN,
+)
+from app.core.metrics import get_summaries, observe, timer
+from app.services.embedding_service import embed_text, embed_texts
+from app.services.llama_tokenizer import count_tokens
+
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text or "") if s.strip()]
+
+
+def _prefill_ms_per_token() -> float:
+    measured = get_summaries().get("llm.prefill_ms_per_token")
+    return measured["avg"] if measured else PREFILL_MS_PER_TOKEN
+
+
+def compress_results(
+    query_text: str,
+    results: List[Dict],
+    ratio: Optional[float] = None,
+    enabled: Optional[bool] = None,
+) -> Tuple[List[Dict], Dict]:
+    """
+    Extractive compression of rag_search() results.
+
+    Every result text is split into sentences; all sentences are
+    embedded in one batch and scored against the query embedding with a
+    single matrix-vector product. The best ones are kept until `ratio`
+    of the original tokens is used, then put back into their own result
+    in original order, so chunk_id/doc_id/metadata still identify the
+    source. Results left without sentences are dropped.
+
+    Returns (results, report); with compression off the results are
+    returned unchanged.
+    """
+    enabled = PROMPT_COMPRESSION_ENABLED if enabled is None else enabled
+    ratio = PROMPT_COMPRESSION_RATIO if ratio is None else ratio
+
+    report = {
+        "applied": False,
+        "target_ratio": ratio,
+        "ratio": 1.0,
+        "tokens_before": None,
+        "tokens_after": None,
+        "sentences_total": None,
+        "sentences_kept": None,
+        "prefill_saved_ms": 0.0,
+        "latency_ms": 0.0,
+    }
+
+    if not enabled or not results or ratio >= 1:
+        return results, report
+
+    start = timer()
+
+    # (result index, sentence) for every sentence, in reading order.
+    sentences = [
+        (i, s)
+        for i, r in enumerate(results)
+        for s in split_sentences(r.get("text"))
+    ]
+    if not sentences:
+        return results, report
+
+    query = np.asarray(embed_text(query_text), dtype=np.float32)
+    matrix = np.asarray(embed_texts([s for _, s in sentences]), dtype=np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1) * max(float(np.linalg.norm(query)), 1e-12)
+    scores = (matrix @ query) / np.maximum(norms, 1e-12)
+
+    tokens = [count_tokens(s) for _, s in sentences]
+    total = sum(tokens)
+    budget = max(int(total * ratio), 1)
+
+    kept = set()
+    used = 0
+    for j in np.argsort(-scores):
+        j = int(j)
+        if used + tokens[j] > budget and kept:
+            continue
+        kept.add(j)
+        used += tokens[j]
+
+    texts: Dict[int, List[str]] = {}
+    for j in sorted(kept):
+        i, sentence = sentences[j]
+        texts.setdefault(i, []).append(sentence)
+
+    compressed = [
+        {**r, "text": " ".join(texts[i])}
+        for i, r in enumerate(results)
+        if i in texts
+    ]
+
+    saved = total - used
+    report.update({
+        "applied": True,
+        "ratio": round(used / total, 4) if total else 1.0,
+        "tokens_before": total,
+        "tokens_after": used,
+        "sentences_total": len(sentences),
+        "sentences_kept": len(kept),
+        "prefill_saved_ms": round(saved * _prefill_ms_per_token(), 2),
+        "latency_ms": round((timer() - start) * 1000, 2),
+    })
+
+    observe("compression.ratio", report["ratio"])
+    observe("compression.tokens_saved", saved)
+
+    return compressed, report
@@ -1,111 +1,525 @@
 
-import os
 import time
-from qdrant_client import QdrantClient
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models as qmodels
 from typing import List, Dict, Optional
 
-QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
-QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+from app.core.config import (
+    EMBEDDING_DIM,
+    QDRANT_HOST,
+    QDRANT_PORT,
+    QDRANT_GRPC_PORT,
+    QDRANT_PREFER_GRPC,
+    QDRANT_TIMEOUT_S,
+    QDRANT_POOL_SIZE,
+    QDRANT_KEEPALIVE_S,
+    QDRANT_STORAGE_PROFILE,
+    QDRANT_PROFILE_REFRESH_S,
+    QDRANT_UPSERT_BATCH_SIZE,
+    QDRANT_UPSERT_PARALLEL,
+    VECTOR_STORE_BACKEND,
+)
+from app.services import model_registry
+from app.services.bm25 import SPARSE_VECTOR_NAME, document_vector
 
 COLLECTION_NAME = "agentforge_embeddings"
 
+# Payload fields with a keyword index; rag_search/search_similar filters
+# may only use these (with either vector store backend).
+PAYLOAD_INDEX_FIELDS = ("doc_id", "type", "source")
+
+# Named vector storage layouts. Quantized profiles keep a compressed copy
+# in RAM for the HNSW walk and rescore the oversampled candidates with the
+# original vectors, so queries must send matching search params.
+STORAGE_PROFILES: Dict[str, Dict] = {
+    "memory": {
+        "on_disk": False,
+        "quantization": None,
+        "search_params": None,
+    },
+    "scalar_int8": {
+        "on_disk": False,
+        "quantization": qmodels.ScalarQuantization(
+            scalar=qmodels.ScalarQuantizationConfig(
+                type=qmodels.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,
+            )
+        ),
+        "search_params": qmodels.SearchParams(
+            quantization=qmodels.QuantizationSearchParams(rescore=True, oversampling=2.0)
+        ),
+    },
+    "binary": {
+        "on_disk": False,
+        "quantization": qmodels.BinaryQuantization(
+            binary=qmodels.BinaryQuantizationConfig(always_ram=True)
+        ),
+        "search_params": qmodels.SearchParams(
+            quantization=qmodels.QuantizationSearchParams(rescore=True, oversampling=3.0)
+        ),
+    },
+    "on_disk_int8": {
+        "on_disk": True,
+        "quantization": qmodels.ScalarQuantization(
+            scalar=qmodels.ScalarQuantizationConfig(
+                type=qmodels.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,
+            )
+        ),
+        "search_params": qmodels.SearchParams(
+            quantization=qmodels.QuantizationSearchParams(rescore=True, oversampling=2.0)
+        ),
+    },
+}
+
 client = None
+_async_client = None
+_async_lock = threading.Lock()
+
+# Storage profile of the live collection as last read from Qdrant, so
+# every worker follows a migration made through any of them.
+_profile_state = {"name": None, "checked_at": 0.0}
+
+# collection/alias name -> whether it has the BM25 sparse vector
+_sparse_support: Dict[str, bool] = {}
+
+
+def _client_kwargs() -> Dict:
+    """
+    Connection settings shared by the sync and async clients: one
+    keep-alive HTTP pool, or a gRPC channel when QDRANT_PREFER_GRPC is set.
+    """
+    return {
+        "host": QDRANT_HOST,
+        "port": QDRANT_PORT,
+        "grpc_port": QDRANT_GRPC_PORT,
+        "prefer_grpc": QDRANT_PREFER_GRPC,
+        "timeout": QDRANT_TIMEOUT_S,
+        "limits": httpx.Limits(
+            max_connections=QDRANT_POOL_SIZE,
+            max_keepalive_connections=QDRANT_POOL_SIZE,
+            keepalive_expiry=QDRANT_KEEPALIVE_S,
+        ),
+        "grpc_options": {
+            "grpc.keepalive_time_ms": int(QDRANT_KEEPALIVE_S * 1000),
+            "grpc.keepalive_permit_without_calls": 1,
+        },
+    }
+
+
+def create_client() -> QdrantClient:
+    return QdrantClient(**_client_kwargs())
+
+
+def _warn_on_dim_mismatch(client: QdrantClient):
+    params = client.get_collection(COLLECTION_NAME).config.params.vectors
+    size = getattr(params, "size", None)
+
+    if size is not None and size != EMBEDDING_DIM:
+        print(
+            f"[QDRANT] WARNING: {COLLECTION_NAME} stores {size}-dim vectors "
+            f"but EMBEDDING_DIM={EMBEDDING_DIM}; run a reindex into a new collection."
+        )
+
+
+def ensure_payload_indexes(client: QdrantClient, name: str = COLLECTION_NAME):
+    """
+    Keyword indexes so filtered searches are resolved inside HNSW
+    instead of over-fetching and filtering in Python. Idempotent.
+    """
+    for field in PAYLOAD_INDEX_FIELDS:
+        client.create_payload_index(
+            collection_name=name,
+            field_name=field,
+            field_schema=qmodels.PayloadSchemaType.KEYWORD,
+        )
+
+
+def _get_profile(profile: str) -> Dict:
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile: {profile} (expected one of {list(STORAGE_PROFILES)})")
+    return STORAGE_PROFILES[profile]
+
+
+def create_collection(
+    client: QdrantClient,
+    name: str,
+    dim: int = EMBEDDING_DIM,
+    profile: Optional[str] = None,
+):
+    """
+    New collection with `profile`; by default the live collection's
+    profile (so a reindex keeps a migrated one), or
+    QDRANT_STORAGE_PROFILE when there is no live collection yet.
+    """
+    if profile is None:
+        profile = get_storage_profile(client)
+        if profile not in STORAGE_PROFILES:
+            profile = QDRANT_STORAGE_PROFILE
+
+    settings = _get_profile(profile)
+
+    client.create_collection(
+        collection_name=name,
+        vectors_config=qmodels.VectorParams(
+            size=dim,
+            distance=qmodels.Distance.COSINE,
+            on_disk=settings["on_disk"],
+        ),
+        quantization_config=settings["quantization"],
+        sparse_vectors_config={
+            SPARSE_VECTOR_NAME: qmodels.SparseVectorParams(modifier=qmodels.Modifier.IDF),
+        },
+    )
+    ensure_payload_indexes(client, name)
+    _sparse_support[name] = True
+
+
+def has_sparse_vectors(client: QdrantClient, name: str = COLLECTION_NAME) -> bool:
+    """
+    Whether `name` stores BM25 sparse vectors. Collections created before
+    hybrid search do not; a reindex moves them to one that does.
+    """
+    if name not in _sparse_support:
+        target = get_alias_target(client, name) or name
+        sparse = client.get_collection(target).config.params.sparse_vectors or {}
+        _sparse_support[name] = SPARSE_VECTOR_NAME in sparse
+
+    return _sparse_support[name]
+
+
+def make_point(point_id, vector: list, payload: dict, sparse: bool = True) -> qmodels.PointStruct:
+    """
+    Point with the dense vector and, if `sparse`, the BM25 vector of
+    payload["text"] next to it.
+    """
+    if sparse:
+        vector = {"": vector, SPARSE_VECTOR_NAME: document_vector(payload.get("text", ""))}
+
+    return qmodels.PointStruct(id=point_id, vector=vector, payload=payload)
+
+
+def apply_storage_profile(client: QdrantClient, profile: str, name: str = COLLECTION_NAME):
+    """
+    Migrate an existing collection to `profile` in place. Qdrant rebuilds
+    the quantized copy / moves vectors in the background; queries keep
+    working meanwhile. Other workers pick the change up from the
+    collection within QDRANT_PROFILE_REFRESH_S.
+    """
+    settings = _get_profile(profile)
+    target = get_alias_target(client, name) or name
+
+    client.update_collection(
+        collection_name=target,
+        vectors_config={"": qmodels.VectorParamsDiff(on_disk=settings["on_disk"])},
+        quantization_config=settings["quantization"] or qmodels.Disabled.DISABLED,
+    )
+
+    _profile_state.update({"name": profile, "checked_at": time.time()})
+    print(f"[QDRANT] {target} switched to storage profile '{profile}'")
+
+
+def _layout(on_disk, quantization) -> tuple:
+    return bool(on_disk), type(quantization).__name__ if quantization else None
+
+
+def detect_storage_profile(client: QdrantClient, name: str = COLLECTION_NAME) -> Optional[str]:
+    """
+    Profile matching the collection's on-disk and quantization settings,
+    "custom" for a layout no profile describes, or None if there is no
+    such collection.
+    """
+    target = get_alias_target(client, name) or name
+    if not client.collection_exists(target):
+        return None
+
+    config = client.get_collection(target).config
+    vectors = config.params.vectors
+    if isinstance(vectors, dict):
+        vectors = vectors.get("")
+
+    on_disk = vectors.on_disk if vectors is not None else False
+    quantization = (vectors.quantization_config if vectors is not None else None) or config.quantization_config
+
+    layout = _layout(on_disk, quantization)
+    for profile, settings in STORAGE_PROFILES.items():
+        if _layout(settings["on_disk"], settings["quantization"]) == layout:
+            return profile
+
+    return "custom" if quantization else "memory"
+
+
+def profile_is_stale() -> bool:
+    return time.time() - _profile_state["checked_at"] >= QDRANT_PROFILE_REFRESH_S
+
+
+def get_storage_profile(client: Optional[QdrantClient] = None) -> str:
+    """
+    Storage profile of the live collection, re-read from Qdrant at most
+    every QDRANT_PROFILE_REFRESH_S. Falls back to the last known value
+    (or QDRANT_STORAGE_PROFILE) when Qdrant cannot be asked.
+    """
+    if profile_is_stale():
+        try:
+            detected = detect_storage_profile(client or get_client())
+        except Exception as e:
+            print(f"[QDRANT] Could not read the storage profile → {e}")
+            detected = None
+
+        if detected is not None:
+            _profile_state["name"] = detected
+        _profile_state["checked_at"] = time.time()
+
+    return _profile_state["name"] or QDRANT_STORAGE_PROFILE
+
+
+def get_search_params() -> Optional[qmodels.SearchParams]:
+    """
+    Oversampling/rescore settings that match the active storage profile.
+    """
+    profile = get_storage_profile()
+    if profile == "custom":
+        return qmodels.SearchParams(
+            quantization=qmodels.QuantizationSearchParams(rescore=True, oversampling=2.0)
+        )
+    return STORAGE_PROFILES[profile]["search_params"]
+
+
+def build_filter(filters: Optional[Dict[str, List[str]]]) -> Optional[qmodels.Filter]:
+    """
+    {"type": ["video_frame"], "doc_id": ["a", "b"]} → Qdrant filter that
+    requires every given field to match one of its values.
+    """
+    if not filters:
+        return None
+
+    conditions = []
+    for field, values in filters.items():
+        if field not in PAYLOAD_INDEX_FIELDS:
+            raise ValueError(f"Cannot filter on '{field}'; allowed: {list(PAYLOAD_INDEX_FIELDS)}")
+
+        if values is None:
+            continue
+        if isinstance(values, str):
+            values = [values]
+
+        values = list(values)
+        if not values:
+            continue
+
+        conditions.append(
+            qmodels.FieldCondition(
+                key=field,
+                match=qmodels.MatchValue(value=values[0]) if len(values) == 1 else qmodels.MatchAny(any=values),
+            )
+        )
+
+    return qmodels.Filter(must=conditions) if conditions else None
+
+
+def get_alias_target(client: QdrantClient, alias: str = COLLECTION_NAME) -> Optional[str]:
+    """
+    Collection currently behind `alias`, or None if `alias` is not an alias.
+    """
+    for a in client.get_aliases().aliases:
+        if a.alias_name == alias:
+            return a.collection_name
+    return None
+
+
+def swap_alias(client: QdrantClient, new_collection: str, alias: str = COLLECTION_NAME) -> Optional[str]:
+    """
+    Point `alias` at `new_collection` in one atomic alias update and
+    return the collection it pointed to before.
+
+    If `alias` is still a plain collection (deployments that predate
+    versioned collections), that collection has to be deleted before the
+    alias can take its name, so this one-time migration has a short gap.
+    """
+    previous = get_alias_target(client, alias)
+    operations = []
+
+    if previous is not None:
+        operations.append(
+            qmodels.DeleteAliasOperation(delete_alias=qmodels.DeleteAlias(alias_name=alias))
+        )
+    elif alias in [c.name for c in client.get_collections().collections]:
+        print(f"[QDRANT] Replacing legacy collection {alias} with an alias")
+        client.delete_collection(alias)
+
+    operations.append(
+        qmodels.CreateAliasOperation(
+            create_alias=qmodels.CreateAlias(collection_name=new_collection, alias_name=alias)
+        )
+    )
 
+    client.update_collection_aliases(change_aliases_operations=operations)
+    _sparse_support.pop(alias, None)
+    print(f"[QDRANT] Alias {alias} → {new_collection}")
+    return previous
 
-def init_qdrant():
+
+def init_qdrant(attempts: int = 10):
     """
     Safe Qdrant initialization with retries.
     Prevents API from crashing if Qdrant starts slowly.
     """
     global client
 
-    for attempt in range(1, 11):  # 10 retries
+    for attempt in range(1, attempts + 1):
         try:
-            print(f"[QDRANT] Trying to connect ({attempt}/10) to {QDRANT_HOST}:{QDRANT_PORT}")
+            print(f"[QDRANT] Trying to connect ({attempt}/{attempts}) to {QDRANT_HOST}:{QDRANT_PORT}")
 
-            client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+            client = create_client()
 
             # Simple check
             collections = client.get_collections().collections
 
             print("[QDRANT] Connection successful.")
 
-            # Create collection if missing
+            # Create collection if missing (COLLECTION_NAME may be an alias
+            # to a versioned collection after a reindex)
             existing = [c.name for c in collections]
-            if COLLECTION_NAME not in existing:
-                client.create_collection(
-                    collection_name=COLLECTION_NAME,
-                    vectors_config=qmodels.VectorParams(
-                        size=768,
-                        distance=qmodels.Distance.COSINE
-                    ),
-                )
+            if COLLECTION_NAME not in existing and get_alias_target(client) is None:
+                create_collection(client, COLLECTION_NAME)
                 print(f"✅ Created Qdrant collection: {COLLECTION_NAME}")
             else:
                 print(f"ℹ️ Collection already exists: {COLLECTION_NAME}")
+                _warn_on_dim_mismatch(client)
+                ensure_payload_indexes(client)
+
+            _profile_state["checked_at"] = 0.0
+            print(f"[QDRANT] Storage profile: {get_storage_profile(client)}")
 
             return client
 
         except Exception as e:
             print(f"[QDRANT] Not ready yet → {e}")
-            time.sleep(2)
+            if attempt < attempts:
+                time.sleep(2)
 
     print("[QDRANT] FAILED after retries. Continuing without Qdrant.")
     client = None
     return None
 
 
+# The local vector store backend runs without a Qdrant server.
+# Requests try to connect once; the background warmup retries.
+if VECTOR_STORE_BACKEND == "qdrant":
+    model_registry.register("qdrant", lambda: init_qdrant(attempts=1), warmup_loader=init_qdrant)
+
+
 def get_client():
-    return client
+    """
+    Shared Qdrant client; connects (one attempt) on first use if the
+    startup warmup has not done so yet.
+    """
+    return model_registry.get("qdrant")
 
 
-def insert_embedding(doc_id: str, chunk_id: str, vector: list, metadata: dict):
-    if client is None:
-        raise RuntimeError("Qdrant client not initialized")
+def get_async_client() -> AsyncQdrantClient:
+    """
+    Shared AsyncQdrantClient for async endpoints, with the same pooling
+    and transport settings as get_client(). The collection itself is
+    created by the sync client during warmup.
+    """
+    global _async_client
 
-    client.upsert(
-        collection_name=COLLECTION_NAME,
-        points=[
-            qmodels.PointStruct(
-                id=chunk_id,
-                vector=vector,
-                payload={"doc_id": doc_id, **metadata},
-            )
-        ],
-    )
+    if _async_client is None:
+        with _async_lock:
+            if _async_client is None:
+                _async_client = AsyncQdrantClient(**_client_kwargs())
 
+    return _async_client
 
-def search_similar(query_vector: List[float], top_k: int = 5, filter_doc_id: Optional[str] = None):
-    if client is None:
-        raise RuntimeError("Qdrant client not initialized")
 
-    query_filter = None
-    if filter_doc_id:
-        query_filter = qmodels.Filter(
-            must=[
-                qmodels.FieldCondition(
-                    key="doc_id",
-                    match=qmodels.MatchValue(value=filter_doc_id),
-                )
-            ]
+class EmbeddingWriter:
+    """
+    Buffered, pipelined upserts.
+
+    Points are sent in batches of `batch_size` with wait=False, with up
+    to `parallel` requests in flight. close() holds back the last batch
+    until every earlier request is acknowledged and then sends it with
+    wait=True. Qdrant applies updates in order, so when close() returns
+    all points are searchable.
+
+        with EmbeddingWriter() as writer:
+            writer.add(doc_id, chunk_id, vector, metadata)
+    """
+
+    def __init__(
+        self,
+        batch_size: int = QDRANT_UPSERT_BATCH_SIZE,
+        parallel: int = QDRANT_UPSERT_PARALLEL,
+        collection_name: str = COLLECTION_NAME,
+    ):
+        self.batch_size = batch_size
+        self.parallel = max(parallel, 1)
+        self.collection_name = collection_name
+        self.written = 0
+
+        self._client = get_client()
+        self.sparse = has_sparse_vectors(self._client, collection_name)
+        self._buffer: List[qmodels.PointStruct] = []
+        self._in_flight = deque()
+        self._executor = ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="qdrant-upsert")
+
+    def add(self, doc_id: str, chunk_id: str, vector: list, metadata: dict):
+        self.add_points([make_point(chunk_id, vector, {"doc_id": doc_id, **metadata}, self.sparse)])
+
+    def add_points(self, points: List[qmodels.PointStruct]):
+        self._buffer.extend(points)
+
+        # Keep one batch buffered so close() always has a final batch
+        # to use as the consistency barrier.
+        while len(self._buffer) > self.batch_size:
+            batch = self._buffer[:self.batch_size]
+            self._buffer = self._buffer[self.batch_size:]
+            self._send(batch)
+
+    def _send(self, batch: List[qmodels.PointStruct]):
+        # Bound the number of concurrent requests.
+        while len(self._in_flight) >= self.parallel:
+            self._in_flight.popleft().result()
+
+        self._in_flight.append(
+            self._executor.submit(
+                self._client.upsert,
+                collection_name=self.collection_name,
+                points=batch,
+                wait=False,
+            )
         )
+        self.written += len(batch)
 
-    results = client.search(
-        collection_name=COLLECTION_NAME,
-        query_vector=query_vector,
-        limit=top_k,
-        query_filter=query_filter,
-        with_payload=True,
-        with_vectors=False,
-    )
+    def close(self):
+        try:
+            while self._in_flight:
+                self._in_flight.popleft().result()
+
+            if self._buffer:
+                self._client.upsert(
+                    collection_name=self.collection_name,
+                    points=self._buffer,
+                    wait=True,
+                )
+                self.written += len(self._buffer)
+                self._buffer = []
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True)
 
-    return [
-        {
-            "doc_id": point.payload.get("doc_id"),
-            "chunk_id": point.id,
-            "score": point.score,
-            "payload": point.payload,
-        }
-        for point in results
-    ]
@@ -1,54 +1,138 @@
-from typing import List, Dict
+from typing import Dict, List, Optional
 
+from app.core.config import CONTEXT_TOKEN_BUDGET
+from app.services.llama_tokenizer import count_tokens, truncate_to_tokens
 
-def build_rag_context(results: List[Dict], max_chars: int = 4000) -> str:
+
+SEPARATOR = "\n\n"
+
+# A truncated segment shorter than this is not worth its label.
+_MIN_TAIL_TOKENS = 16
+
+
+def _relevance(r: Dict) -> float:
+    if r.get("rerank_score") is not None:
+        return r["rerank_score"]
+    return r.get("score") or 0.0
+
+
+def _join_overlapping(left: str, right: str) -> str:
     """
-    Build a clean context string from Qdrant search results.
-
-    results = [
-      {
-        "doc_id": "...",
-        "chunk_id": "...",
-        "score": 0.89,
-        "payload": {
-            "type": "text" | "image" | "audio" | "video",
-            "text": "...",
-            "sequence": 0,
-            ...
-        }
-      }
-    ]
+    Concatenate two neighbouring chunks, dropping the words `right`
+    repeats from the end of `left` (chunk_text overlap).
     """
+    left_words = left.split()
+    right_words = right.split()
 
-    sorted_results = sorted(results, key=lambda x: x["score"], reverse=True)
+    for k in range(min(len(left_words), len(right_words)), 0, -1):
+        if left_words[-k:] == right_words[:k]:
+            return " ".join(left_words + right_words[k:])
 
+    return " ".join(left_words + right_words)
+
+
+def _segments(results: List[Dict]) -> List[Dict]:
+    """
+    Merge hits that are consecutive chunks of the same document into
+    one segment each. Hits without a chunk_index stay on their own.
+    """
     seen = set()
     unique = []
-    for r in sorted_results:
-        cid = r["chunk_id"]
-        if cid not in seen:
+    for r in results:
+        if r.get("text") and r["chunk_id"] not in seen:
+            seen.add(r["chunk_id"])
             unique.append(r)
-            seen.add(cid)
 
-    unique = sorted(unique, key=lambda x: x["payload"].get("sequence", 0))
+    groups: Dict[tuple, List[Dict]] = {}
+    singles = []
+    for r in unique:
+        meta = r.get("metadata") or {}
+        if r.get("doc_id") is None or meta.get("chunk_index") is None:
+            singles.append([r])
+        else:
+            groups.setdefault((r["doc_id"], meta.get("type")), []).append(r)
 
-    context_parts = []
+    runs = list(singles)
+    for hits in groups.values():
+        hits.sort(key=lambda r: r["metadata"]["chunk_index"])
+        run = [hits[0]]
+        for r in hits[1:]:
+            if r["metadata"]["chunk_index"] == run[-1]["metadata"]["chunk_index"] + 1:
+                run.append(r)
+            else:
+                runs.append(run)
+                run = [r]
+        runs.append(run)
 
-    for r in unique:
-        p = r["payload"]
-        chunk_type = p.get("type", "text")
-        text = p.get("text", "").strip()
+    segments = []
+    for run in runs:
+        text = run[0]["text"].strip()
+        for r in run[1:]:
+            text = _join_overlapping(text, r["text"])
 
-        if not text:
+        label = ((run[0].get("metadata") or {}).get("type") or "text").upper()
+        segments.append({
+            "text": f"[{label}] {text}",
+            "relevance": max(_relevance(r) for r in run),
+            "chunk_ids": [r["chunk_id"] for r in run],
+        })
+
+    segments.sort(key=lambda s: s["relevance"], reverse=True)
+    return segments
+
+
+def pack_context(results: List[Dict], max_tokens: Optional[int] = None) -> Dict:
+    """
+    Pack rag_search() results into at most `max_tokens` Llama tokens.
+
+    Adjacent chunks of the same document are merged with their overlap
+    removed, segments go in order of their best hit, and the last one
+    that fits is cut at the token boundary.
+
+    Returns {"text", "tokens", "segments", "chunks_used", "dropped"}.
+    """
+    if max_tokens is None:
+        max_tokens = CONTEXT_TOKEN_BUDGET
+
+    segments = _segments(results)
+    sep_tokens = count_tokens(SEPARATOR)
+
+    parts = []
+    chunks_used = []
+    used = 0
+
+    for segment in segments:
+        cost = count_tokens(segment["text"]) + (sep_tokens if parts else 0)
+
+        if used + cost <= max_tokens:
+            parts.append(segment["text"])
+            chunks_used.extend(segment["chunk_ids"])
+            used += cost
             continue
 
-        label = chunk_type.upper()
+        remaining = max_tokens - used - (sep_tokens if parts else 0)
+        if remaining >= _MIN_TAIL_TOKENS:
+            parts.append(truncate_to_tokens(segment["text"], remaining))
+            chunks_used.extend(segment["chunk_ids"])
+        break
+
+    text = SEPARATOR.join(parts)
 
-        context_parts.append(f"[{label}] {text}")
+    # Per-part counts can differ slightly from the count of the joined
+    # text at the boundaries; the budget applies to the final string.
+    tokens = count_tokens(text)
+    if tokens > max_tokens:
+        text = truncate_to_tokens(text, max_tokens)
+        tokens = count_tokens(text)
 
-    context = "\n\n".join(context_parts)
+    return {
+        "text": text,
+        "tokens": tokens,
+        "segments": len(parts),
+        "chunks_used": chunks_used,
+        "dropped": len({r["chunk_id"] for r in results}) - len(chunks_used),
+    }
 
-    if len(context) > max_chars:
-        context = context[:max_chars] + "\n...[trimmed]"
 
-    return context
+def build_rag_context(results: List[Dict], max_tokens: Optional[int] = None) -> str:
+    return pack_context(results, max_tokens)["text"]
@@ -1,41 +1,251 @@
-from typing import Dict
-from qdrant_client import QdrantClient
-from app.services.embedding_service import embed_text
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from app.core.executors import run_cpu, run_io
+from app.core.config import (
+    RAG_SEARCH_MODE,
+    RAG_ROUGE_MODE,
+    RAG_ROUGE_QUEUE_SIZE,
+    RERANK_ENABLED,
+    RERANK_CANDIDATES,
+)
+from app.core.metrics import incr, observe
+from app.services import model_registry
+from app.services.embedding_service import aembed_text, embed_text, embed_texts
+from app.services.qdrant_service import COLLECTION_NAME
+from app.services.vector_store import get_vector_store
+from app.services.retrieval_cache import get_hits, put_hits, retrieval_key
+from app.services.reranker import rerank_batch
 from app.utils.latency import measure_latency
 from app.utils.rouge_utils import compute_rouge_l
 
-client = QdrantClient(host="qdrant", port=6333)
-COLLECTION = "agentforge_embeddings"
+COLLECTION = COLLECTION_NAME
+
+# ROUGE-L is a diagnostic; unless a request asks for it inline it is
+# scored on one background thread after the results are returned.
+_rouge_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-rouge")
+_rouge_slots = threading.BoundedSemaphore(RAG_ROUGE_QUEUE_SIZE)
 
 
 @measure_latency("RAG Search")
-def rag_search(query_text: str, top_k: int = 5) -> Dict:
+def rag_search(
+    query_text: str,
+    top_k: int = 5,
+    filters: Optional[Dict[str, List[str]]] = None,
+    mode: Optional[str] = None,
+    with_rouge: bool = False,
+    rerank: Optional[bool] = None,
+) -> Dict:
+    """
+    Retrieval for `query_text`.
 
-    vector = embed_text(query_text)
+    `filters` restricts hits by indexed payload fields, e.g.
+    {"type": ["video_frame"]} or {"doc_id": [id1, id2]}.
 
-   
-    hits = client.query_points(
-        collection_name=COLLECTION,
-        query=vector,
-        limit=top_k,
-        with_payload=True,
-        with_vectors=False
-    )
+    `mode` is "dense" or "hybrid" (dense + BM25 fused with RRF; scores
+    are then rank-fusion scores); defaults to RAG_SEARCH_MODE.
+
+    `with_rouge` scores ROUGE-L per hit inline and fills "rougeL" /
+    "rouge_stats"; otherwise they are None and the scores go to
+    /health/metrics (see RAG_ROUGE_MODE).
+
+    `rerank` (default RERANK_ENABLED) fetches RERANK_CANDIDATES hits and
+    keeps the cross-encoder's best `top_k`; the cost is under "rerank".
+    One pass runs at a time per process: a search waits up to
+    RERANK_QUEUE_WAIT_MS for a running pass and otherwise keeps the
+    vector-search order ("skipped" in the report, rerank.skipped). The
+    same happens on a timeout or a scoring error.
+
+    Identical searches are served from the retrieval cache until the
+    next ingestion.
+    """
+
+    mode = _resolve_mode(mode)
+    use_rerank = _use_rerank(rerank)
+    fetch_k = _fetch_k(top_k, use_rerank)
+    key = retrieval_key(query_text, fetch_k, filters, mode)
+
+    hits = get_hits(key)
+    if hits is None:
+        vector = embed_text(query_text)
+
+        store = get_vector_store()
+        if mode == "hybrid":
+            hits = store.hybrid_search(vector, query_text, fetch_k, filters)
+        else:
+            hits = store.search(vector, fetch_k, filters)
+
+        put_hits(key, hits)
+
+    return _finish([query_text], [hits], top_k, use_rerank, with_rouge)[0]
+
+
+@measure_latency("RAG Search (async)")
+async def arag_search(
+    query_text: str,
+    top_k: int = 5,
+    filters: Optional[Dict[str, List[str]]] = None,
+    mode: Optional[str] = None,
+    with_rouge: bool = False,
+    rerank: Optional[bool] = None,
+) -> Dict:
+    """
+    Same as rag_search(), for async endpoints: the embedding awaits the
+    micro-batcher, the search goes through the store's async path
+    (AsyncQdrantClient, or the CPU pool for the local store) and
+    reranking / inline ROUGE run on the CPU pool, so concurrent requests
+    do not block the event loop.
+    """
+
+    mode = _resolve_mode(mode)
+    use_rerank = _use_rerank(rerank)
+    fetch_k = _fetch_k(top_k, use_rerank)
+    key = retrieval_key(query_text, fetch_k, filters, mode)
+
+    hits = get_hits(key)
+    if hits is None:
+        vector = await aembed_text(query_text)
+
+        # A store that is not loaded yet may connect or read files.
+        store = get_vector_store() if model_registry.is_loaded("vector_store") else await run_io(get_vector_store)
+        if mode == "hybrid":
+            hits = await store.ahybrid_search(vector, query_text, fetch_k, filters)
+        else:
+            hits = await store.asearch(vector, fetch_k, filters)
+
+        put_hits(key, hits)
+
+    if use_rerank or with_rouge:
+        results = await run_cpu(_finish, [query_text], [hits], top_k, use_rerank, with_rouge)
+        return results[0]
+
+    return _finish([query_text], [hits], top_k, False, False)[0]
+
+
+@measure_latency("RAG Search (batch)")
+def rag_search_batch(
+    query_texts: List[str],
+    top_k: int = 5,
+    filters: Optional[Dict[str, List[str]]] = None,
+    mode: Optional[str] = None,
+    with_rouge: bool = False,
+    rerank: Optional[bool] = None,
+) -> List[Dict]:
+    """
+    rag_search() for many queries: one batched embedding call and one
+    batched vector store request. Results are in input order. Only
+    queries missing from the retrieval cache are embedded and searched,
+    and all candidates are reranked in one pass.
+    """
+    if not query_texts:
+        return []
+
+    mode = _resolve_mode(mode)
+    use_rerank = _use_rerank(rerank)
+    fetch_k = _fetch_k(top_k, use_rerank)
+    keys = [retrieval_key(q, fetch_k, filters, mode) for q in query_texts]
+    hits = [get_hits(key) for key in keys]
+
+    todo = [i for i, h in enumerate(hits) if h is None]
+    if todo:
+        texts = [query_texts[i] for i in todo]
+        vectors = embed_texts(texts)
+
+        store = get_vector_store()
+        if mode == "hybrid":
+            found = store.hybrid_search_batch(vectors, texts, fetch_k, filters)
+        else:
+            found = store.search_batch(vectors, fetch_k, filters)
+
+        for i, result in zip(todo, found):
+            hits[i] = result
+            put_hits(keys[i], result)
+
+    return _finish(query_texts, hits, top_k, use_rerank, with_rouge)
+
+
+def _use_rerank(rerank: Optional[bool]) -> bool:
+    # The cross-encoder is only loaded when RERANK_ENABLED is set.
+    return RERANK_ENABLED and (rerank is None or rerank)
+
+
+def _fetch_k(top_k: int, use_rerank: bool) -> int:
+    return max(RERANK_CANDIDATES, top_k) if use_rerank else top_k
+
+
+def _finish(query_texts: List[str], hits_per_query: List[List], top_k: int, use_rerank: bool, with_rouge: bool) -> List[Dict]:
+    if not use_rerank:
+        return [_build_rag_result(q, hits, with_rouge) for q, hits in zip(query_texts, hits_per_query)]
+
+    reranked, report = rerank_batch(query_texts, hits_per_query, top_k)
+    if len(query_texts) > 1:
+        report = {**report, "queries": len(query_texts)}
+
+    return [
+        _build_rag_result(
+            q,
+            [hit for hit, _ in scored],
+            with_rouge,
+            rerank_scores=[score for _, score in scored],
+            rerank_report=report,
+        )
+        for q, scored in zip(query_texts, reranked)
+    ]
+
+
+def _resolve_mode(mode: Optional[str]) -> str:
+    mode = (mode or RAG_SEARCH_MODE).lower()
+    if mode not in ("dense", "hybrid"):
+        raise ValueError(f"Unknown search mode: {mode} (expected 'dense' or 'hybrid')")
+    return mode
+
+
+def _record_rouge(query_text: str, texts: List[str]):
+    try:
+        scores = [compute_rouge_l(query_text, t) for t in texts]
+        for score in scores:
+            observe("rag.rouge_l", score)
+        observe("rag.rouge_l.query_avg", sum(scores) / len(scores))
+    except Exception as e:
+        print(f"[RAG] Background ROUGE failed → {e}")
+    finally:
+        _rouge_slots.release()
+
+
+def _schedule_rouge(query_text: str, texts: List[str]):
+    if RAG_ROUGE_MODE != "background" or not texts:
+        return
+
+    if not _rouge_slots.acquire(blocking=False):
+        incr("rag.rouge_l.dropped")
+        return
+
+    _rouge_executor.submit(_record_rouge, query_text, texts)
+
+
+def _build_rag_result(
+    query_text: str,
+    points,
+    with_rouge: bool = False,
+    rerank_scores: Optional[List[Optional[float]]] = None,
+    rerank_report: Optional[Dict] = None,
+) -> Dict:
 
     results = []
     rouge_scores = []
 
-    for h in hits.points:
+    for i, h in enumerate(points):
 
         payload = h.payload or {}
         text = payload.get("text", "")
 
-        rouge = compute_rouge_l(query_text, text)
+        rouge = compute_rouge_l(query_text, text) if with_rouge else None
         rouge_scores.append(rouge)
 
         results.append({
             "score": float(h.score),
             "rougeL": rouge,
+            "rerank_score": rerank_scores[i] if rerank_scores else None,
             "doc_id": payload.get("doc_id"),
             "chunk_id": h.id,
             "text": text,
@@ -55,15 +265,20 @@ def rag_search(query_text: str, top_k: int = 5) -> Dict:
         if sim_scores else 0
     )
 
-    rouge_stats = {
-        "max_rouge": max(rouge_scores) if rouge_scores else 0,
-        "min_rouge": min(rouge_scores) if rouge_scores else 0,
-        "avg_rouge": sum(rouge_scores) / len(rouge_scores) if rouge_scores else 0
-    }
+    rouge_stats = None
+    if with_rouge:
+        rouge_stats = {
+            "max_rouge": max(rouge_scores) if rouge_scores else 0,
+            "min_rouge": min(rouge_scores) if rouge_scores else 0,
+            "avg_rouge": sum(rouge_scores) / len(rouge_scores) if rouge_scores else 0
+        }
+    else:
+        _schedule_rouge(query_text, [r["text"] for r in results])
 
     return {
         "results": results,
         "similarity_stats": sim_stats,
         "hit_rate": hit_rate,
         "rouge_stats": rouge_stats,
+        "rerank": rerank_report,
     }
@@ -0,0 +1,214 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import REINDEX_BATCH_SIZE, VECTOR_STORE_BACKEND
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.embedding_service import embed_texts
+from app.services.vector_store import notify_ingest
+from app.services.qdrant_service import (
+    COLLECTION_NAME,
+    EmbeddingWriter,
+    create_collection,
+    get_alias_target,
+    get_client,
+    make_point,
+    swap_alias,
+)
+
+
+_lock = threading.Lock()
+
+_status: Dict = {
+    "state": "idle",         # idle | running | done | failed
+    "source": None,
+    "target": None,
+    "total": 0,
+    "processed": 0,
+    "chunks_per_sec": 0.0,
+    "eta_seconds": None,
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+}
+
+
+def get_status() -> Dict:
+    return dict(_status)
+
+
+def is_running() -> bool:
+    return _lock.locked()
+
+
+def _iter_chunk_batches(
+    db: Session,
+    batch_size: int,
+    since: Optional[datetime] = None,
+) -> Iterator[List[Tuple[models.Chunk, Optional[str]]]]:
+    """
+    Stream (chunk, document type) rows from Postgres in batches.
+    """
+    query = (
+        db.query(models.Chunk, models.Document.type)
+        .outerjoin(models.Document, models.Chunk.doc_id == models.Document.id)
+    )
+    if since is not None:
+        query = query.filter(models.Chunk.created_at >= since)
+
+    batch = []
+    for row in query.order_by(models.Chunk.id).yield_per(batch_size):
+        batch.append(tuple(row))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _build_points(client, source: Optional[str], batch, vectors) -> List:
+    ids = [chunk.vector_id or chunk.id for chunk, _ in batch]
+
+    # Keep the payload already stored for each point (type, source,
+    # frame paths, ...); Postgres only has the text.
+    existing = {}
+    if source is not None:
+        for point in client.retrieve(source, ids=ids, with_payload=True, with_vectors=False):
+            existing[str(point.id)] = point.payload or {}
+
+    points = []
+    for point_id, (chunk, doc_type), vector in zip(ids, batch, vectors):
+        payload = dict(existing.get(str(point_id)) or {
+            "doc_id": chunk.doc_id,
+            "type": doc_type or "text",
+            "chunk_index": chunk.chunk_index,
+        })
+        payload.setdefault("text", chunk.text)
+
+        # Targets are created with the BM25 sparse vector.
+        points.append(make_point(point_id, vector, payload))
+
+    return points
+
+
+def _copy(db: Session, client, source: Optional[str], target: str, batch_size: int, since: Optional[datetime] = None) -> int:
+    copied = 0
+
+    # Upserts are pipelined so the next batch embeds while Qdrant writes.
+    with EmbeddingWriter(batch_size=batch_size, collection_name=target) as writer:
+        for batch in _iter_chunk_batches(db, batch_size, since=since):
+            vectors = embed_texts([chunk.text or "" for chunk, _ in batch], batch_size=batch_size)
+            writer.add_points(_build_points(client, source, batch, vectors))
+
+            copied += len(batch)
+            _status["processed"] += len(batch)
+            _report_progress()
+
+    return copied
+
+
+def _report_progress():
+    elapsed = max(time.time() - _status["started_at"], 1e-6)
+    rate = _status["processed"] / elapsed
+    remaining = max(_status["total"] - _status["processed"], 0)
+
+    _status["chunks_per_sec"] = round(rate, 2)
+    _status["eta_seconds"] = round(remaining / rate, 1) if rate > 0 else None
+
+    print(
+        f"[REINDEX] {_status['processed']}/{_status['total']} chunks "
+        f"({_status['chunks_per_sec']}/s, ETA {_status['eta_seconds']}s)"
+    )
+
+
+def reindex(
+    batch_size: int = REINDEX_BATCH_SIZE,
+    target: Optional[str] = None,
+    drop_old: bool = False,
+) -> Dict:
+    """
+    Re-embed every chunk in Postgres into a new versioned collection,
+    then switch the COLLECTION_NAME alias to it.
+
+    Queries keep reading the old collection until the alias swap.
+    Chunks ingested while the main pass runs are picked up by a
+    catch-up pass just before the swap. The old collection is kept for
+    rollback unless `drop_old` is set.
+    """
+    if VECTOR_STORE_BACKEND != "qdrant":
+        raise RuntimeError("Reindexing needs the Qdrant backend (VECTOR_STORE_BACKEND=qdrant)")
+
+    if not _lock.acquire(blocking=False):
+        raise RuntimeError("A reindex is already running")
+
+    try:
+        client = get_client()
+
+        source = get_alias_target(client)
+        if source is None and client.collection_exists(COLLECTION_NAME):
+            source = COLLECTION_NAME
+
+        target = target or f"{COLLECTION_NAME}_v{int(time.time() * 1000)}"
+        create_collection(client, target)
+
+        started = datetime.utcnow()
+
+        db = SessionLocal()
+        try:
+            _status.update({
+                "state": "running",
+                "source": source,
+                "target": target,
+                "total": db.query(models.Chunk).count(),
+                "processed": 0,
+                "chunks_per_sec": 0.0,
+                "eta_seconds": None,
+                "started_at": time.time(),
+                "finished_at": None,
+                "error": None,
+            })
+            print(f"[REINDEX] {source} → {target}: {_status['total']} chunks")
+
+            _copy(db, client, source, target, batch_size)
+
+            # Rows that arrived during the main pass.
+            caught_up = _copy(db, client, source, target, batch_size, since=started)
+            if caught_up:
+                print(f"[REINDEX] Catch-up pass re-embedded {caught_up} chunks")
+
+        finally:
+            db.close()
+
+        previous = swap_alias(client, target)
+        notify_ingest()
+
+        if drop_old and previous and previous != target:
+            client.delete_collection(previous)
+            print(f"[REINDEX] Dropped {previous}")
+
+        _status.update({"state": "done", "finished_at": time.time()})
+        return get_status()
+
+    except Exception as e:
+        _status.update({"state": "failed", "error": str(e), "finished_at": time.time()})
+        raise
+
+    finally:
+        _lock.release()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-embed all chunks into a new Qdrant collection")
+    parser.add_argument("--batch-size", type=int, default=REINDEX_BATCH_SIZE)
+    parser.add_argument("--target", default=None, help="name of the new collection")
+    parser.add_argument("--drop-old", action="store_true")
+    args = parser.parse_args()
+
+    print(reindex(batch_size=args.batch_size, target=args.target, drop_old=args.drop_old))
@@ -0,0 +1,145 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+
+from sentence_transformers import CrossEncoder
+
+from app.core.config import (
+    RERANK_ENABLED,
+    RERANK_MODEL_NAME,
+    RERANK_TIMEOUT_MS,
+    RERANK_QUEUE_WAIT_MS,
+    RERANK_BATCH_SIZE,
+    RERANK_MAX_LENGTH,
+)
+from app.core.metrics import incr, observe
+from app.services import model_registry
+
+
+def _load_reranker():
+    return CrossEncoder(RERANK_MODEL_NAME, device="cpu", max_length=RERANK_MAX_LENGTH)
+
+
+# Only loaded (and warmed up) when the stage is enabled.
+if RERANK_ENABLED:
+    model_registry.register("reranker", _load_reranker)
+
+# One scoring pass at a time. _busy is held from submit until the pass
+# ends; a request arriving meanwhile waits up to RERANK_QUEUE_WAIT_MS
+# for it and otherwise skips reranking instead of queueing unbounded.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+_busy = threading.Lock()
+
+
+def _score(pairs: List[Tuple[str, str]], stop: threading.Event) -> Optional[List[float]]:
+    """
+    Score `pairs` RERANK_BATCH_SIZE at a time; None once `stop` is set
+    (the caller timed out), so an abandoned pass ends after one batch.
+    """
+    try:
+        model = model_registry.get("reranker")
+        scores = []
+        for start in range(0, len(pairs), RERANK_BATCH_SIZE):
+            if stop.is_set():
+                return None
+            batch = pairs[start:start + RERANK_BATCH_SIZE]
+            scores.extend(float(s) for s in model.predict(batch, batch_size=RERANK_BATCH_SIZE, show_progress_bar=False))
+        return scores
+    finally:
+        _busy.release()
+
+
+def rerank_batch(
+    queries: List[str],
+    hits_per_query: List[List],
+    top_k: int,
+    timeout_ms: float = RERANK_TIMEOUT_MS,
+) -> Tuple[List[List[Tuple[object, Optional[float]]]], Dict]:
+    """
+    Rescore each query's candidate hits with the cross-encoder, all
+    (query, chunk) pairs in one batched pass, and keep the best `top_k`.
+
+    Returns ([(hit, rerank_score), ...] per query, cost report). The
+    first `top_k` hits in vector-search order are kept, with
+    rerank_score None, when:
+    - another pass is still running after RERANK_QUEUE_WAIT_MS (skipped)
+    - the pass does not finish within `timeout_ms` per query, queue wait
+      included (timed_out; the pass is then stopped)
+    - scoring fails, e.g. the model cannot be loaded (error)
+    """
+    pairs = [
+        (query, (hit.payload or {}).get("text", ""))
+        for query, hits in zip(queries, hits_per_query)
+        for hit in hits
+    ]
+
+    report = {
+        "applied": False,
+        "model": RERANK_MODEL_NAME,
+        "candidates": len(pairs),
+        "kept": 0,
+        "latency_ms": 0.0,
+        "timed_out": False,
+        "skipped": False,
+        "error": None,
+    }
+
+    fallback = [[(hit, None) for hit in hits[:top_k]] for hits in hits_per_query]
+    if not pairs:
+        return fallback, report
+
+    report["kept"] = sum(len(h) for h in fallback)
+
+    timeout_s = timeout_ms * sum(1 for hits in hits_per_query if hits) / 1000
+    start = time.perf_counter()
+
+    if not _busy.acquire(timeout=min(RERANK_QUEUE_WAIT_MS / 1000, timeout_s)):
+        incr("rerank.skipped")
+        report.update({"skipped": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)})
+        return fallback, report
+
+    stop = threading.Event()
+    future = _executor.submit(_score, pairs, stop)
+    try:
+        scores = future.result(timeout=max(timeout_s - (time.perf_counter() - start), 0))
+    except FutureTimeout:
+        stop.set()
+        if future.cancel():
+            # Never started, so _score will not release it.
+            _busy.release()
+        incr("rerank.timeouts")
+        report.update({"timed_out": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)})
+        return fallback, report
+    except Exception as e:
+        # Optional quality stage: fall back instead of failing the query.
+        print(f"[RERANK] Scoring failed → {e}")
+        incr("rerank.errors")
+        report.update({"error": str(e), "latency_ms": round((time.perf_counter() - start) * 1000, 2)})
+        return fallback, report
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    observe("rerank.latency_ms", latency_ms)
+
+    reranked = []
+    offset = 0
+    for hits in hits_per_query:
+        scored = list(zip(hits, scores[offset:offset + len(hits)]))
+        offset += len(hits)
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        reranked.append(scored[:top_k])
+
+    report.update({
+        "applied": True,
+        "kept": sum(len(r) for r in reranked),
+        "latency_ms": round(latency_ms, 2),
+    })
+    return reranked, report
+
+
+def rerank(query: str, hits: List, top_k: int, timeout_ms: float = RERANK_TIMEOUT_MS):
+    """
+    rerank_batch() for a single query.
+    """
+    reranked, report = rerank_batch([query], [hits], top_k, timeout_ms)
+    return reranked[0], report
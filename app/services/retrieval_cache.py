@@ -0,0 +1,83 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from app.core.config import (
+    RETRIEVAL_CACHE_ENABLED,
+    RETRIEVAL_CACHE_MAX_ENTRIES,
+    RETRIEVAL_CACHE_TTL_S,
+)
+from app.core.metrics import incr
+from app.services.vector_store import get_corpus_generation
+
+
+class RetrievalCache:
+    """
+    LRU of vector store hits for repeated searches.
+
+    Keys carry the corpus generation (see vector_store.notify_ingest),
+    so an ingestion in this process makes every earlier entry
+    unreachable; they age out of the LRU. `ttl_s` bounds staleness from
+    writes this process does not see.
+    """
+
+    def __init__(self, max_entries: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            value, expires_at = item
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl_s)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_cache = RetrievalCache(RETRIEVAL_CACHE_MAX_ENTRIES, RETRIEVAL_CACHE_TTL_S)
+
+
+def retrieval_key(query_text: str, top_k: int, filters: Optional[Dict[str, List[str]]], mode: str) -> Hashable:
+    normalized_filters = json.dumps(
+        {k: sorted(v) if isinstance(v, list) else v for k, v in (filters or {}).items() if v},
+        sort_keys=True,
+    )
+    return (get_corpus_generation(), mode, " ".join(query_text.split()), top_k, normalized_filters)
+
+
+def get_hits(key: Hashable) -> Optional[List]:
+    if not RETRIEVAL_CACHE_ENABLED:
+        return None
+
+    hits = _cache.get(key)
+    incr("retrieval_cache.hits" if hits is not None else "retrieval_cache.misses")
+    return hits
+
+
+def put_hits(key: Hashable, hits: List):
+    if RETRIEVAL_CACHE_ENABLED:
+        _cache.put(key, hits)
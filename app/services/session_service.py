@@ -0,0 +1,267 @@
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+from app.core.config import (
+    SESSION_MAX_SESSIONS,
+    SESSION_IDLE_TTL_S,
+    SESSION_MAX_CONTEXT_TOKENS,
+    SESSION_KEEP_ALIVE,
+)
+from app.core.metrics import incr, observe
+from app.eval.cost_metrics import estimate_cost
+from app.services.llm_service import LLAMA_MODEL_NAME
+from app.services.llama_tokenizer import truncate_to_tokens
+from app.services.ollama_client import astream_generate, stream_generate
+
+
+class SessionNotFound(KeyError):
+    pass
+
+
+class SessionBusy(RuntimeError):
+    pass
+
+
+# A turn not ended after this long (e.g. a stream whose client went away
+# before it started) no longer blocks the session.
+_TURN_LEASE_S = 600
+
+# When the context outgrows SESSION_MAX_CONTEXT_TOKENS, the next turn
+# starts a fresh context seeded with (at most this much of) the last
+# answer.
+_RECAP_TOKENS = 512
+
+
+class ConversationSession:
+    """
+    One conversation. `context` is the token state Ollama returned after
+    the last turn (prompt + answer of every turn so far); sending it back
+    with the next prompt lets Ollama reuse its KV cache instead of
+    prefilling the whole history again.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.context = array("i")
+        # Chunks the model has already seen in this conversation.
+        self.sent_chunks = set()
+        # Last answer, sent ahead of the next prompt after a context reset.
+        self.recap = None
+        self.last_turn_reset = False
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.busy_since = None
+
+        self.turns = 0
+        self.context_resets = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.prefill_ms = 0.0
+        self.last_prefill_ms = None
+        self.last_ttft_ms = None
+
+    def metrics(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "turns": self.turns,
+            "context_tokens": len(self.context),
+            "context_bytes": len(self.context) * self.context.itemsize,
+            "context_resets": self.context_resets,
+            "context_reset": self.last_turn_reset,
+            "chunks_sent": len(self.sent_chunks),
+            "prompt_tokens_evaluated": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "prefill_ms_total": round(self.prefill_ms, 2),
+            "last_prefill_ms": self.last_prefill_ms,
+            "last_ttft_ms": self.last_ttft_ms,
+            "created_at": self.created_at,
+            "idle_s": round(time.time() - self.last_used, 1),
+        }
+
+
+class SessionStore:
+    """
+    Process-local sessions, least recently used first out when
+    `max_sessions` is reached and dropped after `idle_ttl_s` without a
+    turn. A session runs one turn at a time.
+    """
+
+    def __init__(self, max_sessions: int, idle_ttl_s: float):
+        self.max_sessions = max_sessions
+        self.idle_ttl_s = idle_ttl_s
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_idle(self):
+        cutoff = time.time() - self.idle_ttl_s
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= cutoff or self._busy(session):
+                break
+            del self._sessions[session.session_id]
+            incr("sessions.evicted_idle")
+
+    def create(self) -> ConversationSession:
+        session = ConversationSession(uuid.uuid4().hex)
+
+        with self._lock:
+            self._evict_idle()
+            # Least recently used first; a session mid-turn is never dropped.
+            for old in list(self._sessions.values()):
+                if len(self._sessions) < self.max_sessions:
+                    break
+                if not self._busy(old):
+                    del self._sessions[old.session_id]
+                    incr("sessions.evicted_capacity")
+            self._sessions[session.session_id] = session
+
+        incr("sessions.created")
+        return session
+
+    def get(self, session_id: str) -> ConversationSession:
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionNotFound(session_id)
+            return session
+
+    def delete(self, session_id: str):
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise SessionNotFound(session_id)
+
+    def list(self) -> List[ConversationSession]:
+        with self._lock:
+            self._evict_idle()
+            return list(self._sessions.values())
+
+    @staticmethod
+    def _busy(session: ConversationSession) -> bool:
+        return session.busy_since is not None and time.time() - session.busy_since < _TURN_LEASE_S
+
+    def begin(self, session_id: str) -> ConversationSession:
+        """
+        Hold `session_id` for one turn; SessionBusy if a turn is
+        already running on it. Pair with end().
+        """
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionNotFound(session_id)
+            if self._busy(session):
+                raise SessionBusy(session_id)
+            session.busy_since = time.time()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def end(self, session: ConversationSession):
+        with self._lock:
+            session.busy_since = None
+            session.last_used = time.time()
+
+    @contextmanager
+    def turn(self, session_id: str):
+        session = self.begin(session_id)
+        try:
+            yield session
+        finally:
+            self.end(session)
+
+
+store = SessionStore(SESSION_MAX_SESSIONS, SESSION_IDLE_TTL_S)
+
+
+def _request(session: ConversationSession, prompt: str) -> Dict:
+    if not session.context and session.recap:
+        prompt = f"Earlier in this conversation you answered:\n{session.recap}\n\n{prompt}"
+
+    return {
+        "model": LLAMA_MODEL_NAME,
+        "prompt": prompt,
+        "context": session.context.tolist() or None,
+        "keep_alive": SESSION_KEEP_ALIVE,
+    }
+
+
+def _record_turn(session: ConversationSession, final, prompt: str, answer: str, ttft_ms, chunk_ids: Iterable[str]):
+    context = final.get("context") or []
+    if len(context) > SESSION_MAX_CONTEXT_TOKENS:
+        # Ollama would truncate it anyway; start a new context that
+        # carries the last answer over.
+        session.context = array("i")
+        session.sent_chunks.clear()
+        session.recap = truncate_to_tokens(answer, _RECAP_TOKENS)
+        session.context_resets += 1
+        session.last_turn_reset = True
+        incr("sessions.context_resets")
+    else:
+        session.context = array("i", context)
+        session.sent_chunks.update(str(c) for c in chunk_ids)
+        session.recap = None
+        session.last_turn_reset = False
+
+    prefill_ms = (final.get("prompt_eval_duration") or 0) / 1e6
+    session.turns += 1
+    session.prompt_tokens += final.get("prompt_eval_count") or 0
+    session.output_tokens += final.get("eval_count") or 0
+    session.prefill_ms += prefill_ms
+    session.last_prefill_ms = round(prefill_ms, 2)
+    session.last_ttft_ms = round(ttft_ms, 2) if ttft_ms is not None else None
+    observe("sessions.prefill_ms", prefill_ms)
+
+    return estimate_cost(
+        model=LLAMA_MODEL_NAME,
+        input_tokens=len(prompt.split()),
+        output_tokens=len(answer.split())
+    )
+
+
+def _turn(session: ConversationSession, prompt: str, chunk_ids: Iterable[str]):
+    """
+    Arguments for ollama_client.astream_generate(). A failed turn leaves
+    the context unchanged; the next turn continues from the last good one.
+    """
+    def finish(final, answer, ttft_ms):
+        return _record_turn(session, final, prompt, answer, ttft_ms, chunk_ids)
+
+    return _request(session, prompt), finish, f"SESSION {session.session_id}"
+
+
+def stream_turn(session: ConversationSession, prompt: str, chunk_ids: Iterable[str] = ()):
+    """
+    One turn of `session`: yields (token, None) while generating, then
+    ("", cost_info). `prompt` holds only this turn's text; the history
+    travels as the session context. `chunk_ids` are the retrieved
+    chunks included in `prompt`.
+    """
+    return stream_generate(*_turn(session, prompt, chunk_ids))
+
+
+def astream_turn(session: ConversationSession, prompt: str, chunk_ids: Iterable[str] = ()):
+    """
+    Async stream_turn(), same (token, cost_info) protocol.
+    """
+    return astream_generate(*_turn(session, prompt, chunk_ids))
+
+
+def run_turn(session: ConversationSession, prompt: str, chunk_ids: Iterable[str] = ()):
+    """Blocking turn: (answer, cost_info)."""
+    parts = []
+    for token, cost_info in stream_turn(session, prompt, chunk_ids):
+        parts.append(token)
+    return "".join(parts).strip(), cost_info
+
+
+async def arun_turn(session: ConversationSession, prompt: str, chunk_ids: Iterable[str] = ()):
+    """Async turn: (answer, cost_info)."""
+    parts = []
+    async for token, cost_info in astream_turn(session, prompt, chunk_ids):
+        parts.append(token)
+    return "".join(parts).strip(), cost_info
@@ -0,0 +1,411 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import DateTime, func
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    EMBEDDING_DIM,
+    EMBEDDING_MODEL_NAME,
+    SNAPSHOT_BATCH_SIZE,
+    SNAPSHOT_DIR,
+    VECTOR_STORE_BACKEND,
+)
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.vector_store import get_vector_store, notify_ingest
+
+
+FORMAT_VERSION = 1
+
+# Restored vectors may differ from the exported ones by float rounding
+# (both backends re-normalize on insert).
+_VECTOR_TOLERANCE = 1e-4
+
+# Snapshot names are single directory names under SNAPSHOT_DIR.
+_NAME_RE = re.compile(r"^[\w.-]+$")
+
+_lock = threading.Lock()
+
+_status: Dict = {
+    "state": "idle",         # idle | exporting | importing | done | failed
+    "snapshot": None,
+    "started_at": None,
+    "finished_at": None,
+    "result": None,
+    "error": None,
+}
+
+
+def get_status() -> Dict:
+    return dict(_status)
+
+
+def is_running() -> bool:
+    return _lock.locked()
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _row_to_dict(row) -> Dict:
+    data = {}
+    for column in row.__table__.columns:
+        value = getattr(row, column.name)
+        data[column.name] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+def _dict_to_row(model, data: Dict) -> Dict:
+    row = dict(data)
+    for column in model.__table__.columns:
+        if isinstance(column.type, DateTime) and row.get(column.name):
+            row[column.name] = datetime.fromisoformat(row[column.name])
+    return row
+
+
+def _dump_rows(db: Session, model, path: str, batch_size: int) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for row in db.query(model).order_by(model.id).yield_per(batch_size):
+            f.write(json.dumps(_row_to_dict(row)) + "\n")
+            count += 1
+    return count
+
+
+def _read_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _batched(items: Iterator, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def list_snapshots() -> List[Dict]:
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return []
+
+    snapshots = []
+    for name in sorted(os.listdir(SNAPSHOT_DIR)):
+        manifest_path = os.path.join(SNAPSHOT_DIR, name, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            snapshots.append({"name": name, "created_at": manifest["created_at"], "counts": manifest["counts"]})
+    return snapshots
+
+
+def snapshot_path(name: str) -> str:
+    """
+    SNAPSHOT_DIR/<name>; ValueError unless `name` is a plain directory
+    name (letters, digits, "_", "." and "-"; not "." or "..").
+    """
+    if not _NAME_RE.match(name or "") or set(name) == {"."}:
+        raise ValueError(f"Invalid snapshot name: {name!r}")
+    return os.path.join(SNAPSHOT_DIR, name)
+
+
+def export_snapshot(name: Optional[str] = None, batch_size: int = SNAPSHOT_BATCH_SIZE) -> Dict:
+    """
+    Write the documents/chunks rows and their vectors to
+    SNAPSHOT_DIR/<name>:
+
+    - documents.jsonl, chunks.jsonl : Postgres rows
+    - points.jsonl                  : {"id", "payload"} per point
+    - vectors.f32                   : float32 rows in points.jsonl order
+    - manifest.json                 : model, dim, counts, sha256 per file
+
+    The rows are read first, in one repeatable-read transaction on
+    Postgres. Only points backing those chunks are exported. Points
+    written after the rows were read are left out, so the two halves
+    match.
+    """
+    name = name or f"snapshot_{int(time.time())}"
+    path = snapshot_path(name)
+    os.makedirs(path)
+
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+        documents = _dump_rows(db, models.Document, os.path.join(path, "documents.jsonl"), batch_size)
+        chunks = _dump_rows(db, models.Chunk, os.path.join(path, "chunks.jsonl"), batch_size)
+
+        vector_ids: Set[str] = {
+            str(vector_id or chunk_id)
+            for chunk_id, vector_id in db.query(models.Chunk.id, models.Chunk.vector_id).yield_per(batch_size)
+        }
+    finally:
+        db.close()
+
+    points = 0
+    with open(os.path.join(path, "points.jsonl"), "w", encoding="utf-8") as payloads, \
+            open(os.path.join(path, "vectors.f32"), "wb") as vectors:
+        for batch in get_vector_store().scroll(batch_size):
+            batch = [p for p in batch if str(p[0]) in vector_ids]
+            if not batch:
+                continue
+
+            vectors.write(np.asarray([v for _, v, _ in batch], dtype=np.float32).tobytes())
+            for point_id, _, payload in batch:
+                payloads.write(json.dumps({"id": point_id, "payload": payload}) + "\n")
+            points += len(batch)
+
+    files = ("documents.jsonl", "chunks.jsonl", "points.jsonl", "vectors.f32")
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "dim": EMBEDDING_DIM,
+        "source_backend": VECTOR_STORE_BACKEND,
+        "counts": {"documents": documents, "chunks": chunks, "points": points},
+        "chunks_without_vector": len(vector_ids) - points,
+        "sha256": {f: _sha256(os.path.join(path, f)) for f in files},
+    }
+
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"[SNAPSHOT] Exported {name}: {manifest['counts']}")
+    if manifest["chunks_without_vector"]:
+        print(f"[SNAPSHOT] WARNING: {manifest['chunks_without_vector']} chunks have no stored vector")
+
+    return {"name": name, "path": path, **manifest}
+
+
+def _load_manifest(path: str, force: bool) -> Dict:
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    for filename, expected in manifest["sha256"].items():
+        if _sha256(os.path.join(path, filename)) != expected:
+            raise ValueError(f"Checksum mismatch for {filename}; snapshot is corrupt or incomplete")
+
+    if not force and (manifest["embedding_model"], manifest["dim"]) != (EMBEDDING_MODEL_NAME, EMBEDDING_DIM):
+        raise ValueError(
+            f"Snapshot vectors come from {manifest['embedding_model']} ({manifest['dim']} dims), "
+            f"this node uses {EMBEDDING_MODEL_NAME} ({EMBEDDING_DIM} dims)"
+        )
+
+    return manifest
+
+
+def _load_rows(db: Session, model, path: str, batch_size: int) -> int:
+    """
+    Bulk-insert rows whose id is not in the table yet.
+    """
+    inserted = 0
+    for batch in _batched(_read_jsonl(path), batch_size):
+        ids = [row["id"] for row in batch]
+        existing = {i for (i,) in db.query(model.id).filter(model.id.in_(ids))}
+
+        new_rows = [_dict_to_row(model, row) for row in batch if row["id"] not in existing]
+        if new_rows:
+            db.bulk_insert_mappings(model, new_rows)
+            db.commit()
+            inserted += len(new_rows)
+
+    return inserted
+
+
+def _iter_points(path: str, manifest: Dict) -> Iterator[Dict]:
+    count = manifest["counts"]["points"]
+    if count == 0:
+        return
+
+    vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(count, manifest["dim"]))
+    for row, entry in enumerate(_read_jsonl(os.path.join(path, "points.jsonl"))):
+        yield {"id": entry["id"], "vector": vectors[row].tolist(), "payload": entry["payload"]}
+
+
+def _count_present(db: Session, model, path: str, batch_size: int) -> int:
+    present = 0
+    for batch in _batched((row["id"] for row in _read_jsonl(path)), batch_size):
+        present += db.query(func.count(model.id)).filter(model.id.in_(batch)).scalar()
+    return present
+
+
+def _verify_points(path: str, manifest: Dict, batch_size: int) -> Dict:
+    """
+    Re-read the store and compare every snapshot point's vector and
+    payload with the exported copy.
+    """
+    count = manifest["counts"]["points"]
+    expected = {}
+    if count:
+        vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(count, manifest["dim"]))
+        for row, entry in enumerate(_read_jsonl(os.path.join(path, "points.jsonl"))):
+            expected[str(entry["id"])] = (row, entry["payload"])
+
+    found = 0
+    mismatched = 0
+    for batch in get_vector_store().scroll(batch_size):
+        for point_id, vector, payload in batch:
+            match = expected.get(str(point_id))
+            if match is None:
+                continue
+
+            found += 1
+            row, expected_payload = match
+            restored = np.asarray(vector, dtype=np.float32)
+            original = vectors[row]
+            restored = restored / max(np.linalg.norm(restored), 1e-12)
+            original = original / max(np.linalg.norm(original), 1e-12)
+
+            if payload != expected_payload or np.max(np.abs(restored - original)) > _VECTOR_TOLERANCE:
+                mismatched += 1
+
+    return {"expected": count, "found": found, "mismatched": mismatched}
+
+
+def import_snapshot(
+    name_or_path: str,
+    batch_size: int = SNAPSHOT_BATCH_SIZE,
+    verify: bool = True,
+    force: bool = False,
+    allow_path: bool = False,
+) -> Dict:
+    """
+    Restore a snapshot into the configured vector store and database.
+
+    File checksums and the embedding model are checked first. Points
+    are bulk-upserted (idempotent by id). Then documents and chunks
+    rows that do not exist yet are inserted, in the same order that
+    ingestion writes them. With `verify`, the restored counts are
+    checked, and every restored vector and payload is compared with the
+    snapshot.
+
+    `name_or_path` is a snapshot name under SNAPSHOT_DIR; with
+    `allow_path` (the CLI) it may also be any snapshot directory.
+    """
+    if allow_path and os.path.isdir(name_or_path):
+        path = name_or_path
+    else:
+        path = snapshot_path(name_or_path)
+    manifest = _load_manifest(path, force)
+
+    store = get_vector_store()
+    restored_points = 0
+    for batch in _batched(_iter_points(path, manifest), batch_size):
+        restored_points += store.upsert(batch)
+    notify_ingest()
+
+    db = SessionLocal()
+    try:
+        documents = _load_rows(db, models.Document, os.path.join(path, "documents.jsonl"), batch_size)
+        chunks = _load_rows(db, models.Chunk, os.path.join(path, "chunks.jsonl"), batch_size)
+
+        result = {
+            "snapshot": path,
+            "restored": {"documents": documents, "chunks": chunks, "points": restored_points},
+        }
+
+        if verify:
+            present = {
+                "documents": _count_present(db, models.Document, os.path.join(path, "documents.jsonl"), batch_size),
+                "chunks": _count_present(db, models.Chunk, os.path.join(path, "chunks.jsonl"), batch_size),
+            }
+            points = _verify_points(path, manifest, batch_size)
+
+            result["verification"] = {
+                "documents": present["documents"] == manifest["counts"]["documents"],
+                "chunks": present["chunks"] == manifest["counts"]["chunks"],
+                "points": points["found"] == points["expected"] and points["mismatched"] == 0,
+                "details": {"rows": present, "points": points},
+            }
+            result["verified"] = all(
+                result["verification"][k] for k in ("documents", "chunks", "points")
+            )
+    finally:
+        db.close()
+
+    print(f"[SNAPSHOT] Imported {path}: {result['restored']}")
+    if verify and not result["verified"]:
+        print(f"[SNAPSHOT] WARNING: verification failed → {result['verification']}")
+
+    return result
+
+
+def run(action: str, **kwargs) -> Dict:
+    """
+    export_snapshot / import_snapshot with the status tracking used by
+    the admin endpoints; only one snapshot job runs at a time.
+    """
+    if not _lock.acquire(blocking=False):
+        raise RuntimeError("A snapshot job is already running")
+
+    try:
+        _status.update({
+            "state": "exporting" if action == "export" else "importing",
+            "snapshot": kwargs.get("name") or kwargs.get("name_or_path"),
+            "started_at": time.time(),
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        })
+
+        result = export_snapshot(**kwargs) if action == "export" else import_snapshot(**kwargs)
+
+        _status.update({"state": "done", "result": result, "finished_at": time.time()})
+        return result
+
+    except Exception as e:
+        _status.update({"state": "failed", "error": str(e), "finished_at": time.time()})
+        raise
+
+    finally:
+        _lock.release()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export or restore a vector + Postgres snapshot")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    export_parser = sub.add_parser("export")
+    export_parser.add_argument("--name", default=None)
+    export_parser.add_argument("--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE)
+
+    import_parser = sub.add_parser("import")
+    import_parser.add_argument("snapshot", help="name under SNAPSHOT_DIR or a path")
+    import_parser.add_argument("--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE)
+    import_parser.add_argument("--no-verify", action="store_true")
+    import_parser.add_argument("--force", action="store_true", help="skip the embedding model check")
+
+    sub.add_parser("list")
+
+    args = parser.parse_args()
+
+    if args.action == "export":
+        print(json.dumps(export_snapshot(args.name, args.batch_size), indent=2))
+    elif args.action == "import":
+        print(json.dumps(
+            import_snapshot(args.snapshot, args.batch_size, verify=not args.no_verify, force=args.force, allow_path=True),
+            indent=2,
+        ))
+    else:
+        print(json.dumps(list_snapshots(), indent=2))
@@ -0,0 +1,396 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.core.executors import run_cpu, run_io
+from qdrant_client.http import models as qmodels
+
+from app.core.config import (
+    EMBEDDING_DIM,
+    HYBRID_PREFETCH_LIMIT,
+    LOCAL_STORE_DIR,
+    VECTOR_STORE_BACKEND,
+)
+from app.services import bm25, model_registry
+from app.services.qdrant_service import (
+    COLLECTION_NAME,
+    EmbeddingWriter,
+    build_filter,
+    get_async_client,
+    get_client,
+    get_search_params,
+    get_storage_profile,
+    has_sparse_vectors,
+    make_point,
+    profile_is_stale,
+)
+
+
+class SearchHit(NamedTuple):
+    id: Any
+    score: float
+    payload: Dict
+
+
+class VectorStore(ABC):
+    """
+    Storage backend behind insert_embedding() / search_similar() /
+    rag_search().
+
+    Points are {"id": ..., "vector": [...], "payload": {...}} dicts.
+    `filters` use the rag_search() form, e.g. {"doc_id": ["a", "b"]}:
+    every given field must match one of its values.
+
+    Backends implement upsert(), search(), count() and scroll(); the
+    batch, async and hybrid methods have generic fallbacks.
+    """
+
+    @abstractmethod
+    def upsert(self, points: List[Dict]) -> int:
+        ...
+
+    @abstractmethod
+    def search(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> List[SearchHit]:
+        ...
+
+    def search_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> List[List[SearchHit]]:
+        return [self.search(v, top_k, filters) for v in vectors]
+
+    async def asearch(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> List[SearchHit]:
+        return await run_cpu(self.search, vector, top_k, filters)
+
+    def hybrid_search(
+        self,
+        vector: List[float],
+        text: str,
+        top_k: int = 5,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> List[SearchHit]:
+        """
+        Dense + lexical search over `text`, fused by rank. Backends
+        without sparse vectors fall back to dense search.
+        """
+        return self.search(vector, top_k, filters)
+
+    async def ahybrid_search(
+        self,
+        vector: List[float],
+        text: str,
+        top_k: int = 5,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> List[SearchHit]:
+        return await run_cpu(self.hybrid_search, vector, text, top_k, filters)
+
+    def hybrid_search_batch(
+        self,
+        vectors: List[List[float]],
+        texts: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> List[List[SearchHit]]:
+        return [self.hybrid_search(v, t, top_k, filters) for v, t in zip(vectors, texts)]
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def scroll(self, batch_size: int = 256) -> Iterator[List[Tuple[Any, List[float], Dict]]]:
+        """
+        Every stored point as batches of (id, dense vector, payload).
+        """
+
+
+class QdrantVectorStore(VectorStore):
+    """
+    Qdrant server backend (COLLECTION_NAME, pooled clients, pipelined
+    upserts and storage-profile search params from qdrant_service).
+    """
+
+    def upsert(self, points: List[Dict]) -> int:
+        with EmbeddingWriter() as writer:
+            writer.add_points([
+                make_point(p["id"], p["vector"], p["payload"], writer.sparse)
+                for p in points
+            ])
+
+        return writer.written
+
+    def _request_kwargs(self, top_k: int, filters) -> Dict:
+        return {
+            "limit": top_k,
+            "query_filter": build_filter(filters),
+            "search_params": get_search_params(),
+            "with_payload": True,
+            "with_vectors": False,
+        }
+
+    @staticmethod
+    def _hits(points) -> List[SearchHit]:
+        return [SearchHit(p.id, float(p.score), p.payload or {}) for p in points]
+
+    def search(self, vector, top_k=5, filters=None) -> List[SearchHit]:
+        response = get_client().query_points(
+            collection_name=COLLECTION_NAME,
+            query=vector,
+            **self._request_kwargs(top_k, filters),
+        )
+        return self._hits(response.points)
+
+    def search_batch(self, vectors, top_k=5, filters=None) -> List[List[SearchHit]]:
+        kwargs = self._request_kwargs(top_k, filters)
+        requests = [
+            qmodels.QueryRequest(
+                query=list(vector),
+                limit=kwargs["limit"],
+                filter=kwargs["query_filter"],
+                params=kwargs["search_params"],
+                with_payload=True,
+                with_vector=False,
+            )
+            for vector in vectors
+        ]
+
+        responses = get_client().query_batch_points(
+            collection_name=COLLECTION_NAME,
+            requests=requests,
+        )
+        return [self._hits(r.points) for r in responses]
+
+    @staticmethod
+    async def _arefresh_profile():
+        # get_search_params() re-reads the profile with the sync client.
+        if profile_is_stale():
+            await run_io(get_storage_profile)
+
+    async def asearch(self, vector, top_k=5, filters=None) -> List[SearchHit]:
+        await self._arefresh_profile()
+        response = await get_async_client().query_points(
+            collection_name=COLLECTION_NAME,
+            query=vector,
+            **self._request_kwargs(top_k, filters),
+        )
+        return self._hits(response.points)
+
+    def _hybrid_kwargs(self, vector, text: str, top_k: int, filters) -> Dict:
+        """
+        One query: dense and BM25 candidates are prefetched (both
+        filtered) and fused server-side with reciprocal-rank fusion.
+        Scores are RRF scores, not cosine similarities.
+        """
+        query_filter = build_filter(filters)
+        limit = max(HYBRID_PREFETCH_LIMIT, top_k)
+
+        return {
+            "prefetch": [
+                qmodels.Prefetch(
+                    query=vector,
+                    filter=query_filter,
+                    params=get_search_params(),
+                    limit=limit,
+                ),
+                qmodels.Prefetch(
+                    query=bm25.query_vector(text),
+                    using=bm25.SPARSE_VECTOR_NAME,
+                    filter=query_filter,
+                    limit=limit,
+                ),
+            ],
+            "query": qmodels.FusionQuery(fusion=qmodels.Fusion.RRF),
+            "limit": top_k,
+            "with_payload": True,
+            "with_vectors": False,
+        }
+
+    def hybrid_search(self, vector, text, top_k=5, filters=None) -> List[SearchHit]:
+        client = get_client()
+        if not has_sparse_vectors(client):
+            return self.search(vector, top_k, filters)
+
+        response = client.query_points(
+            collection_name=COLLECTION_NAME,
+            **self._hybrid_kwargs(vector, text, top_k, filters),
+        )
+        return self._hits(response.points)
+
+    def hybrid_search_batch(self, vectors, texts, top_k=5, filters=None) -> List[List[SearchHit]]:
+        client = get_client()
+        if not has_sparse_vectors(client):
+            return self.search_batch(vectors, top_k, filters)
+
+        requests = []
+        for vector, text in zip(vectors, texts):
+            kwargs = self._hybrid_kwargs(list(vector), text, top_k, filters)
+            requests.append(
+                qmodels.QueryRequest(
+                    prefetch=kwargs["prefetch"],
+                    query=kwargs["query"],
+                    limit=kwargs["limit"],
+                    with_payload=True,
+                    with_vector=False,
+                )
+            )
+
+        responses = client.query_batch_points(collection_name=COLLECTION_NAME, requests=requests)
+        return [self._hits(r.points) for r in responses]
+
+    async def ahybrid_search(self, vector, text, top_k=5, filters=None) -> List[SearchHit]:
+        if not await run_io(lambda: has_sparse_vectors(get_client())):
+            return await self.asearch(vector, top_k, filters)
+
+        await self._arefresh_profile()
+        response = await get_async_client().query_points(
+            collection_name=COLLECTION_NAME,
+            **self._hybrid_kwargs(vector, text, top_k, filters),
+        )
+        return self._hits(response.points)
+
+    def count(self) -> int:
+        return get_client().count(COLLECTION_NAME, exact=True).count
+
+    def scroll(self, batch_size=256):
+        client = get_client()
+        offset = None
+
+        while True:
+            points, offset = client.scroll(
+                collection_name=COLLECTION_NAME,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if points:
+                # Named vectors come back as {"": dense, "bm25": sparse}.
+                yield [
+                    (p.id, p.vector[""] if isinstance(p.vector, dict) else p.vector, p.payload or {})
+                    for p in points
+                ]
+            if offset is None:
+                break
+
+
+def _load_vector_store() -> Optional[VectorStore]:
+    if VECTOR_STORE_BACKEND == "local":
+        from app.services.local_vector_store import LocalVectorStore
+        return LocalVectorStore(LOCAL_STORE_DIR, EMBEDDING_DIM)
+
+    if VECTOR_STORE_BACKEND != "qdrant":
+        raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {VECTOR_STORE_BACKEND} (expected 'qdrant' or 'local')")
+
+    # Connects before the store is handed out.
+    get_client()
+    return QdrantVectorStore()
+
+
+model_registry.register("vector_store", _load_vector_store)
+
+
+def get_vector_store() -> VectorStore:
+    return model_registry.get("vector_store")
+
+
+# Called with (doc_ids, chunk_ids) after points are written; None means
+# "anything may have changed" (reindex, snapshot restore).
+_ingest_listeners: List[Callable[[Optional[set], Optional[set]], None]] = []
+
+# Bumped on every corpus change in this process; caches put it in their
+# keys so entries from before a write are never served.
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def get_corpus_generation() -> int:
+    return _generation
+
+
+def add_ingest_listener(listener: Callable[[Optional[set], Optional[set]], None]):
+    """
+    Register a callback for corpus changes, e.g. to invalidate caches.
+    """
+    _ingest_listeners.append(listener)
+
+
+def notify_ingest(doc_ids: Optional[Iterable[str]] = None, chunk_ids: Optional[Iterable[str]] = None):
+    global _generation
+
+    with _generation_lock:
+        _generation += 1
+
+    doc_ids = set(doc_ids) if doc_ids is not None else None
+    chunk_ids = {str(c) for c in chunk_ids} if chunk_ids is not None else None
+
+    for listener in _ingest_listeners:
+        try:
+            listener(doc_ids, chunk_ids)
+        except Exception as e:
+            print(f"[VECTOR STORE] Ingest listener failed → {e}")
+
+
+def insert_embedding(doc_id: str, chunk_id: str, vector: list, metadata: dict):
+    get_vector_store().upsert([
+        {"id": chunk_id, "vector": vector, "payload": {"doc_id": doc_id, **metadata}}
+    ])
+    notify_ingest([doc_id], [chunk_id])
+
+
+def insert_embeddings(
+    doc_id: str,
+    chunk_ids: List[str],
+    vectors: List[list],
+    metadatas: List[dict],
+) -> int:
+    """
+    Bulk version of insert_embedding() for all chunks of one document.
+    Returns once every point is stored.
+    """
+    written = get_vector_store().upsert([
+        {"id": chunk_id, "vector": vector, "payload": {"doc_id": doc_id, **metadata}}
+        for chunk_id, vector, metadata in zip(chunk_ids, vectors, metadatas)
+    ])
+    notify_ingest([doc_id], chunk_ids)
+    return written
+
+
+def _with_doc_id(filters, filter_doc_id):
+    filters = dict(filters or {})
+    if filter_doc_id:
+        filters["doc_id"] = [filter_doc_id]
+    return filters
+
+
+def _as_dicts(hits: List[SearchHit]) -> List[Dict]:
+    return [
+        {
+            "doc_id": hit.payload.get("doc_id"),
+            "chunk_id": hit.id,
+            "score": hit.score,
+            "payload": hit.payload,
+        }
+        for hit in hits
+    ]
+
+
+def search_similar(
+    query_vector: List[float],
+    top_k: int = 5,
+    filter_doc_id: Optional[str] = None,
+    filters: Optional[Dict[str, List[str]]] = None,
+) -> List[Dict]:
+    hits = get_vector_store().search(query_vector, top_k, _with_doc_id(filters, filter_doc_id))
+    return _as_dicts(hits)
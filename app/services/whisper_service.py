@@ -1,12 +1,47 @@
+import httpx
 import requests
+from app.core.config import WHISPER_URL, WHISPER_TIMEOUT_S
+from app.core.executors import run_io
 from app.utils.latency import measure_latency
 from app.eval.cost_metrics import estimate_cost
 
 
-# OLLAMA_URL = "http://localhost:11434/api/generate"
+OLLAMA_URL = WHISPER_URL
 WHISPER_MODEL = "whisper"
 
 
+def _request(audio_bytes: bytes):
+    files = {
+        "input": ("audio.wav", audio_bytes, "application/octet-stream")
+    }
+
+    data = {
+        "model": WHISPER_MODEL,
+        "prompt": "transcribe"  
+    }
+
+    return files, data
+
+
+def _transcript(raw: str) -> str:
+    transcript = raw.strip().replace("\n", " ").strip()
+
+    if "error" in transcript.lower():
+        print("[Whisper ERROR] Whisper returned system error:")
+        print(transcript)
+        return ""
+
+    output_tokens = len(transcript.split())
+    _ = estimate_cost("whisper", 0, output_tokens)
+
+    return transcript
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
 @measure_latency("Whisper Transcription")
 def transcribe_audio(audio_path: str) -> str:
     """
@@ -14,38 +49,36 @@ def transcribe_audio(audio_path: str) -> str:
     """
 
     try:
-        with open(audio_path, "rb") as f:
-            audio_bytes = f.read()
-
-        files = {
-            "input": ("audio.wav", audio_bytes, "application/octet-stream")
-        }
-
-        data = {
-            "model": WHISPER_MODEL,
-            "prompt": "transcribe"  
-        }
+        files, data = _request(_read_bytes(audio_path))
 
         response = requests.post(
             OLLAMA_URL,
             data=data,
             files=files,
-            timeout=300
+            timeout=WHISPER_TIMEOUT_S
         )
 
-        raw = response.text.strip()
+        return _transcript(response.text)
 
-        transcript = raw.replace("\n", " ").strip()
+    except Exception as e:
+        print(f"[Whisper Exception] {e}")
+        return ""
 
-        if "error" in transcript.lower():
-            print("[Whisper ERROR] Whisper returned system error:")
-            print(transcript)
-            return ""
 
-        output_tokens = len(transcript.split())
-        _ = estimate_cost("whisper", 0, output_tokens)
+@measure_latency("Whisper Transcription (async)")
+async def atranscribe_audio(audio_path: str) -> str:
+    """
+    transcribe_audio() with httpx.AsyncClient; the upload and the wait
+    for the transcript do not block the event loop.
+    """
+
+    try:
+        files, data = _request(await run_io(_read_bytes, audio_path))
+
+        async with httpx.AsyncClient(timeout=WHISPER_TIMEOUT_S) as client:
+            response = await client.post(OLLAMA_URL, data=data, files=files)
 
-        return transcript
+        return _transcript(response.text)
 
     except Exception as e:
         print(f"[Whisper Exception] {e}")
@@ -0,0 +1,15 @@
+import json
+
+
+# Keep proxies (nginx) from buffering the stream.
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data) -> str:
+    """
+    One server-sent event. `data` is sent as a single JSON line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
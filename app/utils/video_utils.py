@@ -1,5 +1,6 @@
 
 import os
+import asyncio
 import subprocess
 from typing import List
 
@@ -23,9 +24,46 @@ def extract_keyframes_ffmpeg(video_path: str, output_dir: str, seconds_interval:
     """
     ensure_dir(output_dir)
 
+    subprocess.run(_keyframes_cmd(video_path, output_dir, seconds_interval), check=True)
+
+    return _list_frames(output_dir)
+
+
+async def aextract_keyframes_ffmpeg(video_path: str, output_dir: str, seconds_interval: int = 3) -> List[str]:
+    """
+    extract_keyframes_ffmpeg() as an asyncio subprocess.
+    """
+    ensure_dir(output_dir)
+
+    await _run_async(_keyframes_cmd(video_path, output_dir, seconds_interval))
+
+    return _list_frames(output_dir)
+
+
+async def _run_async(cmd: List[str]):
+    """
+    Run `cmd` without blocking the event loop; raises
+    CalledProcessError on failure like subprocess.run(check=True).
+    """
+    process = await asyncio.create_subprocess_exec(*cmd, stderr=asyncio.subprocess.PIPE)
+    _, stderr = await process.communicate()
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+
+
+def _list_frames(output_dir: str) -> List[str]:
+    return [
+        os.path.join(output_dir, f)
+        for f in sorted(os.listdir(output_dir))
+        if f.lower().endswith(".jpg")
+    ]
+
+
+def _keyframes_cmd(video_path: str, output_dir: str, seconds_interval: int) -> List[str]:
     output_pattern = os.path.join(output_dir, "frame_%03d.jpg")
 
-    cmd = [
+    return [
         "ffmpeg",
         "-i",
         video_path,
@@ -39,16 +77,6 @@ def extract_keyframes_ffmpeg(video_path: str, output_dir: str, seconds_interval:
         "error",
     ]
 
-    subprocess.run(cmd, check=True)
-
-    frames = [
-        os.path.join(output_dir, f)
-        for f in sorted(os.listdir(output_dir))
-        if f.lower().endswith(".jpg")
-    ]
-
-    return frames
-
 
 def extract_audio_ffmpeg(video_path: str, output_audio_path: str) -> str:
     """
@@ -56,8 +84,22 @@ def extract_audio_ffmpeg(video_path: str, output_audio_path: str) -> str:
 
     Returns the path to the extracted audio file.
     """
-    cmd = [
+    subprocess.run(_audio_cmd(video_path, output_audio_path), check=True)
+    return output_audio_path
+
+
+async def aextract_audio_ffmpeg(video_path: str, output_audio_path: str) -> str:
+    """
+    extract_audio_ffmpeg() as an asyncio subprocess.
+    """
+    await _run_async(_audio_cmd(video_path, output_audio_path))
+    return output_audio_path
+
+
+def _audio_cmd(video_path: str, output_audio_path: str) -> List[str]:
+    return [
         "ffmpeg",
+        "-y",
         "-i",
         video_path,
         "-vn",
@@ -72,6 +114,3 @@ def extract_audio_ffmpeg(video_path: str, output_audio_path: str) -> str:
         "-loglevel",
         "error",
     ]
-
-    subprocess.run(cmd, check=True)
-    return output_audio_path
@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# app.core.config reads the environment at import time, so this must run
+# before anything under app/ is imported: a throwaway local vector store,
+# no on-disk embedding cache, and no answer cache or request coalescing
+# so every request really reaches retrieval and the LLM.
+os.environ.setdefault("VECTOR_STORE_BACKEND", "local")
+os.environ.setdefault("LOCAL_STORE_DIR", tempfile.mkdtemp(prefix="agentforge-store-"))
+os.environ.setdefault("EMBED_CACHE_DIR", "")
+os.environ.setdefault("EMBED_WORKERS_ENABLED", "false")
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+os.environ.setdefault("SINGLE_FLIGHT_ENABLED", "false")
@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import httpx
+import numpy as np
+import ollama
+import pytest
+
+from app.core.config import EMBEDDING_DIM
+from app.db import crud
+from app.eval.loop_responsiveness import _probe_once, _summary
+from app.main import app
+from app.multimodal import video_processor
+from app.services import model_registry, ollama_client
+from app.api import ingest_router
+from app.services.vector_store import insert_embeddings
+
+
+# Every stand-in for a blocking dependency (ffmpeg, LLaVA, Whisper, the
+# sync Ollama client) sleeps this long, so anything that runs it on the
+# event loop stalls the liveness probe well past MAX_LOOP_LAG_MS.
+BLOCKING_CALL_S = 0.3
+LLM_LATENCY_S = 0.2
+MAX_LOOP_LAG_MS = 100
+PROBE_INTERVAL_S = 0.02
+QUERY_CONCURRENCY = 16
+
+
+class FakeEncoder:
+    tokenizer = None
+
+    def encode(self, texts, **kwargs):
+        rng = np.random.default_rng(len(texts))
+        return rng.standard_normal((len(texts), EMBEDDING_DIM)).astype("float32")
+
+
+class FakeAsyncOllama:
+    async def generate(self, model, prompt, stream=False, **kwargs):
+        await asyncio.sleep(LLM_LATENCY_S)
+        if stream:
+            async def chunks():
+                yield {"response": "ok", "done": True}
+            return chunks()
+        return {"response": "ok", "prompt_eval_count": 5, "prompt_eval_duration": 5_000_000}
+
+
+class FakeDb:
+    def close(self):
+        pass
+
+
+def _blocking(result):
+    def call(*args, **kwargs):
+        time.sleep(BLOCKING_CALL_S)
+        return result
+    return call
+
+
+@pytest.fixture
+def offline_app(monkeypatch, tmp_path):
+    """app.main:app with Ollama, ffmpeg, Whisper and Postgres replaced."""
+    monkeypatch.chdir(tmp_path)
+
+    model_registry.register("embedding_model", FakeEncoder)
+    monkeypatch.setattr(ollama_client, "_async_client", FakeAsyncOllama())
+    monkeypatch.setattr(ollama, "generate", _blocking({"response": "ok"}))
+
+    monkeypatch.setattr(ingest_router, "SessionLocal", FakeDb)
+    for name in ("create_document", "create_chunk", "update_document_transcript"):
+        monkeypatch.setattr(crud, name, lambda *args, **kwargs: None)
+
+    frames = [str(tmp_path / f"frame_{i}.jpg") for i in range(3)]
+    monkeypatch.setattr(video_processor, "extract_keyframes_ffmpeg", _blocking(frames))
+    monkeypatch.setattr(video_processor, "run_llava_caption", _blocking("a person at a desk"))
+    monkeypatch.setattr(video_processor, "extract_audio_ffmpeg", _blocking(None))
+    monkeypatch.setattr(video_processor, "transcribe_audio", _blocking("hello from the video"))
+
+    texts = ["Paris is the capital of France.", "The cat sat on the mat."]
+    insert_embeddings(
+        "doc-1",
+        ["11111111-1111-1111-1111-111111111111", "22222222-2222-2222-2222-222222222222"],
+        FakeEncoder().encode(texts).tolist(),
+        [{"text": t, "doc_id": "doc-1", "type": "text", "chunk_index": i} for i, t in enumerate(texts)],
+    )
+    return app
+
+
+async def _probe(client, stop: asyncio.Event, samples: list):
+    scheduled = time.perf_counter()
+    while not stop.is_set():
+        samples.append(await _probe_once(client, scheduled))
+        scheduled = time.perf_counter() + PROBE_INTERVAL_S
+        await asyncio.sleep(PROBE_INTERVAL_S)
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_queries_and_video_ingest(offline_app):
+    transport = httpx.ASGITransport(app=offline_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        samples = []
+        stop = asyncio.Event()
+        prober = asyncio.create_task(_probe(client, stop, samples))
+        await asyncio.sleep(PROBE_INTERVAL_S)
+
+        ingest = asyncio.create_task(
+            client.post("/ingest/ingest", files={"file": ("clip.mp4", b"\x00" * 1024, "video/mp4")})
+        )
+        # Keep /query under load until every stage of the ingest is done.
+        queries = []
+        while not queries or not ingest.done():
+            queries += await asyncio.gather(*(
+                client.post("/query/", json={"question": "Where is Paris?"})
+                for _ in range(QUERY_CONCURRENCY)
+            ))
+        ingested = await ingest
+
+        stop.set()
+        await prober
+
+    assert ingested.status_code == 200, ingested.text
+    assert ingested.json()["frame_count"] == 3
+    assert all(r.status_code == 200 for r in queries)
+
+    lag = _summary(samples)
+    assert lag["max_ms"] < MAX_LOOP_LAG_MS, f"event loop blocked: {lag}"